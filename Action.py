@@ -1,10 +1,162 @@
-import pandas as pd
 import os
+import hashlib
+import itertools
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import metrics
+from memory_budget import MemoryBudget, estimate_memory
+
+
+def _markdown_cell(value):
+    """格式化Markdown表格单元格，转义竖线和换行"""
+    # value != value 用于识别NaN/NaT，避免在此处导入pandas
+    if value is None or value != value:
+        return ''
+    return str(value).replace('|', '\\|').replace('\r\n', '<br>').replace('\n', '<br>')
+
+
+def _markdown_line(values):
+    """把一行值渲染为Markdown表格行"""
+    return '| ' + ' | '.join(_markdown_cell(v) for v in values) + ' |\n'
+
+
+def _utf8_size(text):
+    return len(text.encode('utf-8'))
+
+
+def _estimate_tokens(text):
+    """粗略估算文本的token数：ASCII字符约4个一个token，其余字符各算一个"""
+    ascii_count = len(text.encode('ascii', 'ignore'))
+    return len(text) - ascii_count + (ascii_count + 3) // 4
+
+
+def _split_markdown_rows(rows, max_rows=None, max_size=None, header_size=0, measure=None):
+    """按行数或大小把表格行切分为若干部分
+    
+    逐行消费，任何时候只持有当前部分的行。单行超过大小上限时单独成为一部分。
+    
+    Args:
+        rows: (数据行号, Markdown行) 的可迭代对象
+        max_rows: 每部分的最大行数
+        max_size: 每部分的最大大小（含表头），按measure计算
+        header_size: 表头的大小
+        measure: 计算一行大小的函数，默认为UTF-8字节数
+    
+    Yields:
+        tuple: (起始行号, 结束行号, 行列表)；没有数据行时产生一个空部分
+    """
+    measure = measure or _utf8_size
+    part, size, start, end = [], header_size, None, 0
+    for number, line in rows:
+        line_size = measure(line)
+        if part and ((max_rows and len(part) >= max_rows)
+                     or (max_size and size + line_size > max_size)):
+            yield start, end, part
+            part, size = [], header_size
+        if not part:
+            start = number
+        part.append(line)
+        size += line_size
+        end = number
+    if part:
+        yield start, end, part
+    elif start is None:
+        yield 1, 0, part
+
+
+def _format_markdown_rows(records, formats, block_rows=10000):
+    """按块格式化并渲染Markdown行
+    
+    每块的行先组装为列，再按各列的数字格式整列格式化（见number_format），
+    避免逐个单元格转换字符串。
+    
+    Args:
+        records: (数据行号, 值列表) 的可迭代对象
+        formats: 每列的 (numFmtId, 格式代码)，None表示常规格式
+        block_rows: 每块的行数
+    
+    Yields:
+        tuple: (数据行号, Markdown行)
+    """
+    import pandas as pd
+    from number_format import compile_format
+    
+    formatters = [compile_format(*fmt) if fmt else compile_format() for fmt in formats]
+    records = iter(records)
+    while True:
+        block = list(itertools.islice(records, block_rows))
+        if not block:
+            return
+        numbers = [number for number, _ in block]
+        frame = pd.DataFrame([record for _, record in block], columns=range(len(formatters)))
+        yield from zip(numbers, _render_markdown_frame(frame, formatters))
+
+
+def _format_markdown_frames(frames):
+    """渲染已按块读取的DataFrame（索引为数据行号），各列按常规格式显示
+    
+    Yields:
+        tuple: (数据行号, Markdown行)
+    """
+    from number_format import compile_format
+    
+    formatters = None
+    for frame in frames:
+        if formatters is None:
+            formatters = [compile_format()] * frame.shape[1]
+        yield from zip(frame.index, _render_markdown_frame(frame, formatters))
+
+
+def _render_markdown_frame(frame, formatters):
+    """按列格式化一块数据并渲染为Markdown行"""
+    from number_format import render_markdown_lines
+    
+    if not formatters:
+        return [_markdown_line([])] * len(frame)
+    columns = [formatter.format(frame.iloc[:, i]) for i, formatter in enumerate(formatters)]
+    return render_markdown_lines(columns)
+
+
+def _tracked(operation):
+    """把方法的耗时、输入大小和结果记录到应用指标"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            path, size = self._file_identity[:2] if self._file_identity else (None, None)
+            with metrics.track(operation, size=size, file=path):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _write_markdown_part(path, header, lines):
+    """写出一个Markdown分片"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header)
+        f.writelines(lines)
+
+
 class ExcelProcessor:
-    def __init__(self):
+    def __init__(self, catalog=None, query_cache=None, parse_workers=None, memory_budget=None):
         self.file_path = None
+        # 可选的工作簿目录（catalog.WorkbookCatalog）
+        self.catalog = catalog
+        # 可选的查询结果缓存（query_cache.QueryCache）
+        self.query_cache = query_cache
+        # 大型xlsx工作表的解码进程数（见reader.XlsxWorkbook.iter_rows_parallel），None表示单进程
+        self.parse_workers = parse_workers
+        # 可选的内存预算（memory_budget.MemoryBudget，或字节数/"2G"这样的大小），
+        # 整表读入预计超出时改用流式处理，降级记录在memory_budget.events中
+        if memory_budget is not None and not isinstance(memory_budget, MemoryBudget):
+            memory_budget = MemoryBudget(memory_budget)
+        self.memory_budget = memory_budget
+        # 通过set_arrow设置的Arrow输入（pyarrow.Table），与file_path二选一
+        self.arrow_table = None
+        # 文件标识：(绝对路径, 大小, 修改时间, 内容哈希)
+        self._file_identity = None
         self.file_info = {
             'name': '',
             'size': '',
@@ -17,8 +169,32 @@ class ExcelProcessor:
             raise FileNotFoundError(f"文件不存在: {file_path}")
             
         self.file_path = file_path
+        self.arrow_table = None
         self._update_file_info()
     
+    def set_arrow(self, data, name='arrow'):
+        """使用Arrow数据作为输入
+        
+        Args:
+            data: pyarrow.Table/RecordBatch/RecordBatchReader，或实现Arrow
+                PyCapsule接口的对象（如polars.DataFrame）
+            name: 显示名称，用作输出文件名和块来源
+        """
+        import arrow_io
+        self.arrow_table = arrow_io.to_table(data)
+        self.file_path = None
+        self._file_identity = None
+        size = self.arrow_table.nbytes
+        self.file_info = {
+            'name': name,
+            'size': f"{size/(1024*1024):.2f} MB" if size >= 1024*1024 else f"{size/1024:.2f} KB",
+            'modified_date': ''
+        }
+    
+    def _require_source(self):
+        if not self.file_path and self.arrow_table is None:
+            raise ValueError("未设置文件路径")
+    
     def _update_file_info(self):
         """更新文件基本信息"""
         if not self.file_path:
@@ -42,36 +218,597 @@ class ExcelProcessor:
         # 修改日期
         timestamp = stat.st_mtime
         self.file_info['modified_date'] = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        
+        # 同步到工作簿目录（大小和修改时间未变化时不会重新计算哈希）
+        record = None
+        if self.catalog is not None:
+            record = self.catalog.update_file(self.file_path, stat)
+        
+        # 更新文件标识，文件发生变化时清除其查询缓存
+        path = os.path.abspath(self.file_path)
+        previous = self._file_identity
+        if previous is None or previous[:3] != (path, stat.st_size, stat.st_mtime):
+            content_hash = None
+            if record is not None:
+                content_hash = record['content_hash']
+            elif self.query_cache is not None and self.query_cache.use_hash:
+                from catalog import WorkbookCatalog
+                content_hash = WorkbookCatalog.compute_hash(path)
+            if previous is not None and previous[0] == path and self.query_cache is not None:
+                self.query_cache.invalidate(path)
+            self._file_identity = (path, stat.st_size, stat.st_mtime, content_hash)
     
-    def to_markdown(self):
-        """将Excel数据转换为Markdown表格"""
-        if not self.file_path:
-            raise ValueError("未设置文件路径")
+    @_tracked('conversion')
+    def to_markdown(self, columns=None, rows=None, row_filter=None):
+        """将Excel数据转换为Markdown表格
+        
+        Args:
+            columns: 只输出指定的列，列字母或列名，如 "A,C,F" 或 ["姓名", "城市"]
+            rows: 只输出指定的数据行范围（从1开始，不含表头），如 "1-1000"
+            row_filter: 行过滤函数，参数为 {列名: 值}
+        """
+        self._require_source()
+        
+        try:
+            # 逐块读取并按列格式化（列投影和行范围在读取时完成）
+            header, lines = self._iter_markdown_rows(columns=columns, rows=rows, row_filter=row_filter)
             
+            if self.memory_budget is None:
+                # 转换为Markdown表格
+                markdown_table = header + ''.join(line for _, line in lines)
+                self._record_conversion()
+                return markdown_table.rstrip('\n')
+            
+            # 设置了内存预算时渲染结果先写入缓冲区，超出预算后转存到临时文件，
+            # 避免拼接时行列表和完整文本同时占用内存；返回的文本本身仍需整体占用内存
+            with self.memory_budget.spool() as spool:
+                size = spool.write(header)
+                for _, line in lines:
+                    size += spool.write(line)
+                if self.memory_budget.exceeds(size):
+                    self.memory_budget.degrade('to_markdown', "返回的文本超出内存预算，"
+                                               "需要控制在预算内时改用write_markdown或iter_markdown",
+                                               self.file_info['name'], size)
+                spool.seek(0)
+                self._record_conversion()
+                return spool.read().rstrip('\n')
+        except Exception as e:
+            raise Exception(f"转换Markdown失败: {str(e)}")
+    
+    @_tracked('conversion')
+    def write_markdown(self, output_path, columns=None, rows=None, row_filter=None):
+        """将Markdown表格逐行写入文件，不在内存中拼接完整的输出
+        
+        Args:
+            output_path: 输出文件路径
+            columns: 只输出指定的列（同to_markdown）
+            rows: 只输出指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
+        """
+        self._require_source()
+        
         try:
-            # 读取Excel文件
-            df = pd.read_excel(self.file_path)
+            header, lines = self._iter_markdown_rows(columns=columns, rows=rows, row_filter=row_filter)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(header)
+                for _, line in lines:
+                    f.write(line)
+        except Exception as e:
+            raise Exception(f"转换Markdown失败: {str(e)}")
+        self._record_conversion(output_path)
+        return output_path
+    
+    def _record_conversion(self, output_path=None):
+        """在工作簿目录中记录本次转换，None表示结果直接返回给调用方"""
+        if self.catalog is not None and self.file_path:
+            if output_path is not None:
+                output_path = os.path.abspath(output_path)
+            self.catalog.record_conversion(self.file_path, output_path)
+    
+    def _over_budget(self, operation, sheet_name=0, reason="预计超出内存预算，改用流式处理"):
+        """整表读入是否会超出内存预算
+        
+        超出且可以流式读取时以reason记录降级并返回True；xls等只能整表读入的格式
+        记录后仍返回False。
+        """
+        budget = self.memory_budget
+        if budget is None:
+            return False
+        if self.arrow_table is not None:
+            # 转换为DataFrame时需要再复制一份
+            projected = self.arrow_table.nbytes * 2
+        else:
+            projected = estimate_memory(self.file_path, sheet_name)
+        if not budget.exceeds(projected):
+            return False
+        
+        from reader import is_csv
+        if self.arrow_table is None and not (self.file_path.lower().endswith('.xlsx') or is_csv(self.file_path)):
+            budget.degrade(operation, "预计超出内存预算，但该格式无法流式读取，仍整表读入",
+                           self.file_info['name'], projected)
+            return False
+        budget.degrade(operation, reason, self.file_info['name'], projected)
+        return True
+    
+    def _iter_frames(self, sheet_name=0, columns=None, rows=None, row_filter=None, chunk_rows=50000):
+        """按块读取工作表，每块是一个DataFrame，索引为数据行号减1（与整表读入时一致）
+        
+        Returns:
+            tuple: (列名列表, DataFrame块的迭代器)
+        """
+        import pandas as pd
+        from reader import is_csv
+        
+        if self.file_path and is_csv(self.file_path):
+            from reader import iter_csv_frames
+            names, frames = iter_csv_frames(self.file_path, columns, rows, row_filter, chunk_rows)
+            return names, (frame.set_axis(frame.index - 1) for frame in frames)
+        
+        names, records = self._iter_records(sheet_name, columns, rows, row_filter)
+        
+        def frames():
+            while True:
+                block = list(itertools.islice(records, chunk_rows))
+                if not block:
+                    return
+                yield pd.DataFrame([record for _, record in block], columns=names,
+                                   index=[number - 1 for number, _ in block])
+        
+        return names, frames()
+    
+    def _read_frames(self, sheet_name=0, columns=None, rows=None, row_filter=None, transform=None):
+        """按块读取并合并
+        
+        同一时间只有一块原始数据在内存中，其余是各块处理后的结果；合并时
+        这些结果再复制一份，因此峰值约为结果大小的两倍。transform过滤掉
+        大部分行（如查询）时可以保持在预算内，保留整块时不能。
+        
+        Args:
+            transform: 对每块的处理（如查询），None表示保留整块
+        """
+        import pandas as pd
+        
+        names, frames = self._iter_frames(sheet_name, columns, rows, row_filter)
+        results = [transform(frame) if transform is not None else frame for frame in frames]
+        results = [frame for frame in results if not frame.empty] or results[:1]
+        if not results:
+            return pd.DataFrame(columns=names)
+        return results[0] if len(results) == 1 else pd.concat(results)
+    
+    def _load_dataframe(self, sheet_name=0, columns=None, rows=None, row_filter=None, dtype=None):
+        """读取工作表；指定了列、行范围或过滤条件时使用流式读取层下推"""
+        # 延迟导入pandas，纯文件操作（如命令行扫描目录）无需加载
+        import pandas as pd
+        
+        if self.arrow_table is not None:
+            import arrow_io
+            table = arrow_io.select(self.arrow_table, columns, rows)
+            df = arrow_io.filter_rows(table, row_filter).to_pandas()
+            return df.astype(dtype) if dtype is not None else df
+        
+        from reader import is_csv, read_sheet
+        streaming = is_csv(self.file_path) or (
+            self.parse_workers and self.file_path.lower().endswith('.xlsx'))
+        if columns is None and rows is None and row_filter is None and not streaming:
+            return pd.read_excel(self.file_path, sheet_name=sheet_name, dtype=dtype)
+        
+        return read_sheet(self.file_path, sheet_name, columns, rows, row_filter, dtype,
+                          self.parse_workers)
+    
+    @_tracked('conversion')
+    def to_markdown_parts(self, output_dir, max_rows=100000, max_bytes=None, max_workers=4,
+                          columns=None, rows=None, row_filter=None):
+        """将Excel数据拆分为多个Markdown文件写出
+        
+        每个分片都重复表头，并生成索引文件链接所有分片。主线程逐行渲染，
+        分片写入由线程池并发完成；待写入的分片数有上限，不会在内存中
+        拼接完整的输出。
+        
+        Args:
+            output_dir: 输出目录
+            max_rows: 每个分片的最大数据行数
+            max_bytes: 每个分片的最大字节数（UTF-8）
+            max_workers: 写入线程数
+            columns: 只输出指定的列（同to_markdown）
+            rows: 只输出指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
             
-            # 转换为Markdown表格
-            markdown_table = df.to_markdown(index=False)
+        Returns:
+            str: 索引文件路径
+        """
+        self._require_source()
+        if not max_rows and not max_bytes:
+            raise ValueError("max_rows和max_bytes至少需要指定一个")
             
-            return markdown_table
+        try:
+            header, lines = self._iter_markdown_rows(0, columns, rows, row_filter)
         except Exception as e:
             raise Exception(f"转换Markdown失败: {str(e)}")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(self.file_info['name'])[0]
+        
+        parts = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            chunks = _split_markdown_rows(lines, max_rows, max_bytes, _utf8_size(header))
+            for number, (start, end, lines) in enumerate(chunks, 1):
+                name = f"{stem}_part{number:04d}.md"
+                pending.append(executor.submit(
+                    _write_markdown_part, os.path.join(output_dir, name), header, lines
+                ))
+                parts.append((name, start, end))
+                
+                # 渲染快于写入时等待，限制内存中的分片数
+                while len(pending) >= max_workers * 2:
+                    pending.popleft().result()
+            for future in pending:
+                future.result()
+        
+        # 写出索引文件
+        index_path = os.path.join(output_dir, f"{stem}_index.md")
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {self.file_info['name']}\n\n")
+            for number, (name, start, end) in enumerate(parts, 1):
+                f.write(f"- [第{number}部分]({name})：第{start}-{end}行\n")
+        
+        self._record_conversion(index_path)
+        return index_path
+    
+    def _iter_records(self, sheet_name=0, columns=None, rows=None, row_filter=None, with_formats=False):
+        """逐行读取工作表
+        
+        xlsx文件由流式读取层逐行产生，不构建DataFrame；CSV/TSV文件按块读取；
+        Arrow输入按批次转换；其他格式读取为DataFrame后逐行产生。
+        
+        Returns:
+            tuple: (列名列表, (数据行号, 值列表)的迭代器)，数据行号从1开始、不含表头；
+                with_formats为True时再加上每列的数字格式（只有xlsx文件有，其余为None）
+        """
+        from reader import is_csv, parse_rows
+        
+        if self.file_path and self.file_path.lower().endswith('.xlsx'):
+            from reader import iter_xlsx
+            return iter_xlsx(self.file_path, sheet_name, columns, rows, row_filter, with_formats,
+                             self.parse_workers)
+        if self.file_path and is_csv(self.file_path):
+            from reader import iter_csv
+            return iter_csv(self.file_path, columns, rows, row_filter, with_formats)
+        
+        if self.arrow_table is not None:
+            import arrow_io
+            table = arrow_io.select(self.arrow_table, columns, rows)
+            names = table.column_names
+            first = parse_rows(rows)[0] if rows is not None else 1
+            records = enumerate(arrow_io.iter_records(table), first)
+            if row_filter is not None:
+                records = ((number, record) for number, record in records
+                           if row_filter(dict(zip(names, record))))
+        else:
+            df = self._load_dataframe(sheet_name, columns, rows, row_filter)
+            names = list(df.columns)
+            # 读取时跳过的行和过滤掉的行不改变索引，据此还原数据行号
+            first = parse_rows(rows)[0] if rows is not None else 1
+            records = ((first + label, record) for label, record
+                       in zip(df.index, df.itertuples(index=False, name=None)))
+        if with_formats:
+            return names, records, [None] * len(names)
+        return names, records
+    
+    def _iter_markdown_rows(self, sheet_name=0, columns=None, rows=None, row_filter=None):
+        """渲染表头并返回逐行渲染的Markdown行，单元格按Excel数字格式显示
+        
+        Returns:
+            tuple: (表头两行, (数据行号, Markdown行)的迭代器)
+        """
+        from reader import is_csv
+        
+        if self.file_path and is_csv(self.file_path):
+            # CSV没有数字格式，按块读取的DataFrame直接整列格式化，不拆成逐行记录
+            from reader import iter_csv_frames
+            names, frames = iter_csv_frames(self.file_path, columns, rows, row_filter)
+            lines = _format_markdown_frames(frames)
+        else:
+            names, records, formats = self._iter_records(sheet_name, columns, rows, row_filter,
+                                                         with_formats=True)
+            lines = _format_markdown_rows(records, formats)
+        if not names:
+            # 空工作表没有列，输出为空；仍然读完行迭代器，让读取层按时关闭文件
+            return '', (line for line in lines if False)
+        header = _markdown_line(names) + _markdown_line(['---'] * len(names))
+        return header, lines
+    
+    def iter_markdown_chunks(self, max_tokens=None, max_bytes=None, token_counter=None,
+                             sheet_name=0, columns=None, rows=None, row_filter=None, dedupe=True):
+        """逐块产生Markdown表格，供检索和大模型处理
+        
+        每块都重复表头，按行边界切分，大小不超过max_tokens或max_bytes
+        （单行超过上限时单独成块）。转换过程中逐块产生，不拼接完整输出。
+        
+        Args:
+            max_tokens: 每块的最大token数（含表头）
+            max_bytes: 每块的最大字节数（UTF-8，含表头），与max_tokens二选一
+            token_counter: 计算token数的函数，默认按字符粗略估算；
+                可传入所用模型分词器的计数函数
+            sheet_name: 工作表名称或序号
+            columns: 只输出指定的列（同to_markdown）
+            rows: 只输出指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
+            dedupe: 是否跳过与之前内容完全相同的块
+            
+        Yields:
+            dict: 包含text（Markdown文本）、file、sheet、start_row、end_row
+                （数据行号，从1开始、不含表头）、row_count、size和digest（内容SHA-1）
+        """
+        self._require_source()
+        if bool(max_tokens) == bool(max_bytes):
+            raise ValueError("max_tokens和max_bytes需要且只能指定一个")
+        
+        if max_tokens:
+            measure, limit = token_counter or _estimate_tokens, max_tokens
+        else:
+            measure, limit = _utf8_size, max_bytes
+        
+        path, size = self._file_identity[:2] if self._file_identity else (self.file_info['name'], None)
+        with metrics.track('conversion', size=size, file=path):
+            try:
+                header, lines = self._iter_markdown_rows(sheet_name, columns, rows, row_filter)
+            except Exception as e:
+                raise Exception(f"转换Markdown失败: {str(e)}")
+            
+            seen = set()
+            for start, end, part in _split_markdown_rows(lines, max_size=limit,
+                                                         header_size=measure(header), measure=measure):
+                if not part:
+                    continue
+                body = ''.join(part)
+                digest = hashlib.sha1(body.encode('utf-8')).hexdigest()
+                if dedupe:
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+                text = header + body
+                yield {
+                    'text': text,
+                    'file': self.file_path or self.file_info['name'],
+                    'sheet': sheet_name,
+                    'start_row': start,
+                    'end_row': end,
+                    'row_count': len(part),
+                    'size': measure(text),
+                    'digest': digest,
+                }
+    
+    def iter_markdown(self, chunk_size=64 * 1024, sheet_name=0, columns=None, rows=None, row_filter=None):
+        """逐段产生同一个Markdown表格的文本，拼接起来即完整输出（表头只出现一次）
+        
+        与iter_markdown_chunks不同，各段不是独立的表格，适合边转换边写出
+        （如HTTP分块传输）。每段在凑满chunk_size个字符后产生，只有最后一段可能更短。
+        
+        Args:
+            chunk_size: 每段的字符数
+            sheet_name: 工作表名称或序号
+            columns: 只输出指定的列（同to_markdown）
+            rows: 只输出指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
+            
+        Yields:
+            str: Markdown文本片段
+        """
+        self._require_source()
+        
+        path, size = self._file_identity[:2] if self._file_identity else (None, None)
+        with metrics.track('conversion', size=size, file=path):
+            try:
+                header, lines = self._iter_markdown_rows(sheet_name, columns, rows, row_filter)
+            except Exception as e:
+                raise Exception(f"转换Markdown失败: {str(e)}")
+            
+            buffer, buffered = [header], len(header)
+            for _, line in lines:
+                buffer.append(line)
+                buffered += len(line)
+                if buffered >= chunk_size:
+                    yield ''.join(buffer)
+                    buffer, buffered = [], 0
+            if buffered:
+                yield ''.join(buffer)
+        self._record_conversion()
+    
+    def read_sheet(self, sheet_name=0, dtype=None, columns=None, rows=None, row_filter=None):
+        """读取工作表为DataFrame（.csv/.tsv文件按CSV读取）
+        
+        columns/rows/row_filter的含义同to_markdown。设置了内存预算且整表读入
+        预计超出时改为按块读取，省去整表解析的额外开销；但返回的DataFrame本身
+        必须整体在内存中，结果超出预算时无法保持在预算内（降级记录中会注明）。
+        """
+        self._require_source()
+        
+        try:
+            if self._over_budget('read_sheet', sheet_name,
+                                 "预计超出内存预算，改用按块读取；返回的DataFrame本身仍会超出预算"):
+                df = self._read_frames(sheet_name, columns, rows, row_filter)
+                return df.astype(dtype) if dtype is not None else df
+            return self._load_dataframe(sheet_name, columns, rows, row_filter, dtype)
+        except Exception as e:
+            raise Exception(f"读取文件失败: {str(e)}")
+    
+    @_tracked('query')
+    def query(self, expression, sheet_name=0):
+        """在工作表上执行查询（pandas DataFrame.query表达式）
+        
+        设置了query_cache时，相同查询、相同文件和工作表的结果直接从缓存返回；
+        每次查询前都会重新检查文件状态，文件变化后旧结果自动失效。
+        
+        设置了内存预算且整表读入预计超出时，按块读取并逐块查询，只保留匹配的行；
+        匹配的行本身超出预算时结果仍会超出。此时表达式按块求值，引用整列统计量
+        （如 "金额 > 金额.mean()"）的表达式结果会不同。
+        
+        Args:
+            expression: 查询表达式，如 "年龄 > 30 and 城市 == '北京'"
+            sheet_name: 工作表名称或序号
+            
+        Returns:
+            DataFrame: 查询结果
+        """
+        self._require_source()
+        
+        self._update_file_info()
+        key = None
+        if self.query_cache is not None and self._file_identity is not None:
+            key = self.query_cache.make_key(expression, self._file_identity, sheet_name)
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        try:
+            if self._over_budget('query', sheet_name):
+                result = self._read_frames(sheet_name,
+                                           transform=lambda frame: frame.query(expression))
+            else:
+                df = self._load_dataframe(sheet_name)
+                result = df.query(expression)
+        except Exception as e:
+            raise Exception(f"查询失败: {str(e)}")
+        
+        if key is not None:
+            self.query_cache.put(key, result)
+        return result
+    
+    def iter_record_batches(self, batch_size=65536, sheet_name=0, columns=None, rows=None,
+                            row_filter=None, dtype=None):
+        """以Arrow记录批次流读取工作表（需要pyarrow）
+        
+        xlsx文件在解析过程中逐批产生，不经过DataFrame；未指定行范围和过滤条件的
+        CSV/TSV文件由pyarrow直接流式解析；Arrow输入直接切分，不复制数据。
+        返回的RecordBatchReader可以直接交给DuckDB或Polars。
+        
+        流的列类型由第一批确定，之后的值无法无损转换时抛出异常而不是截断；
+        需要自动放宽类型时使用to_arrow。
+        
+        Args:
+            batch_size: 每批的行数
+            sheet_name: 工作表名称或序号
+            columns: 只读取指定的列（同to_markdown）
+            rows: 只读取指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
+            dtype: 为str时所有列都按字符串读取
+            
+        Returns:
+            pyarrow.RecordBatchReader
+        """
+        self._require_source()
+        
+        try:
+            import arrow_io
+            if self.arrow_table is not None:
+                table = arrow_io.select(self.arrow_table, columns, rows)
+                return arrow_io.table_reader(arrow_io.filter_rows(table, row_filter), batch_size)
+            if self.file_path.lower().endswith('.xlsx'):
+                from reader import iter_xlsx
+                names, records = iter_xlsx(self.file_path, sheet_name, columns, rows, row_filter,
+                                           workers=self.parse_workers)
+                return arrow_io.record_batch_reader(
+                    names, (record for _, record in records), batch_size, dtype
+                )
+            from reader import is_csv
+            if is_csv(self.file_path) and rows is None and row_filter is None:
+                return arrow_io.csv_reader(self.file_path, columns, batch_size, dtype)
+            df = self._load_dataframe(sheet_name, columns, rows, row_filter)
+            return arrow_io.dataframe_reader(df, batch_size, dtype)
+        except Exception as e:
+            raise Exception(f"读取Arrow数据失败: {str(e)}")
+    
+    def to_arrow(self, sheet_name=0, columns=None, rows=None, row_filter=None, dtype=None):
+        """读取工作表为pyarrow.Table，参数同iter_record_batches
+        
+        xlsx文件的列在后续行中出现更宽的类型时（如整数列后面出现1.5）放宽该列的类型。
+        """
+        if self.arrow_table is None and self.file_path and self.file_path.lower().endswith('.xlsx'):
+            try:
+                import arrow_io
+                from reader import iter_xlsx
+                names, records = iter_xlsx(self.file_path, sheet_name, columns, rows, row_filter,
+                                           workers=self.parse_workers)
+                return arrow_io.records_to_table(names, (record for _, record in records), dtype=dtype)
+            except Exception as e:
+                raise Exception(f"读取Arrow数据失败: {str(e)}")
+        
+        reader = self.iter_record_batches(sheet_name=sheet_name, columns=columns, rows=rows,
+                                          row_filter=row_filter, dtype=dtype)
+        try:
+            return reader.read_all()
+        except Exception as e:
+            raise Exception(f"读取Arrow数据失败: {str(e)}")
+    
+    @_tracked('profile')
+    def profile_columns(self, sheet_name=0, columns=None, rows=None, row_filter=None, top_k=10,
+                        quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """单遍统计每列的类型、空值率、近似不同值数量、最小/最大值、分位数和常见值
+        
+        逐行读取并更新每列固定大小的概要结构（见column_stats），
+        不会把整张表读入内存。
+        
+        Args:
+            sheet_name: 工作表名称或序号
+            columns: 只统计指定的列（同to_markdown）
+            rows: 只统计指定的数据行范围（同to_markdown）
+            row_filter: 行过滤函数（同to_markdown）
+            top_k: 每列报告的最常见值个数
+            quantiles: 数值列报告的分位数
+            
+        Returns:
+            dict: {'rows': 行数, 'columns': [每列的统计结果]}
+        """
+        self._require_source()
+        
+        try:
+            from column_stats import profile_records
+            names, records = self._iter_records(sheet_name, columns, rows, row_filter)
+            return profile_records(names, (record for _, record in records), top_k, quantiles)
+        except Exception as e:
+            raise Exception(f"统计列信息失败: {str(e)}")
+    
+    def profile_report(self, output_format='markdown', **kwargs):
+        """生成列统计报告
+        
+        Args:
+            output_format: 'markdown' 或 'json'
+            **kwargs: 传给profile_columns
+            
+        Returns:
+            str: 报告文本
+        """
+        import column_stats
+        
+        if output_format not in ('markdown', 'json'):
+            raise ValueError(f"不支持的报告格式: {output_format}")
+        report = self.profile_columns(**kwargs)
+        if output_format == 'json':
+            return column_stats.to_json(report)
+        return column_stats.to_markdown(report, title=self.file_info['name'])
     
     def get_file_info(self):
         """获取文件基本信息"""
         return self.file_info
 
     @staticmethod
-    def find_excel_files(directory):
-        """查找目录中的Excel文件"""
+    def find_excel_files(directory, catalog=None):
+        """查找目录中的Excel文件
+        
+        Args:
+            directory: 要扫描的目录
+            catalog: 可选的工作簿目录，传入时同时增量刷新目录记录
+        """
         if not os.path.isdir(directory):
             raise NotADirectoryError(f"无效的目录: {directory}")
             
         excel_files = []
         for file in os.listdir(directory):
-            if file.lower().endswith(('.xlsx', '.xls')):
+            if file.lower().endswith(('.xlsx', '.xls', '.csv', '.tsv')):
                 excel_files.append(os.path.join(directory, file))
+        
+        if catalog is not None:
+            catalog.refresh_directory(directory, excel_files)
                 
         return excel_files
\ No newline at end of file
@@ -1,40 +1,88 @@
 import json
 import os
+import hmac
 import hashlib
 import re
-from typing import Dict, Optional
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 class User:
+    # 密码哈希格式: pbkdf2_sha256$迭代次数$盐$哈希
+    HASH_ALGORITHM = 'pbkdf2_sha256'
+    # 旧格式（哈希:盐）固定使用的迭代次数
+    LEGACY_ITERATIONS = 100000
+    # 新密码使用的迭代次数，可通过calibrate_iterations按部署环境校准
+    iterations = 100000
+    
     def __init__(self, username: str, password: str, role: str = "user"):
         self.username = username
         self._password = self._encrypt_password(password)
         self.role = role
     
     @staticmethod
-    def _encrypt_password(password: str) -> str:
+    def _encrypt_password(password: str, iterations: Optional[int] = None) -> str:
         """使用PBKDF2加密密码"""
+        iterations = iterations or User.iterations
         salt = os.urandom(16).hex()
-        return hashlib.pbkdf2_hmac(
+        password_hash = hashlib.pbkdf2_hmac(
             'sha256',
             password.encode(),
             salt.encode(),
-            100000
-        ).hex() + ':' + salt
+            iterations
+        ).hex()
+        return f"{User.HASH_ALGORITHM}${iterations}${salt}${password_hash}"
     
     def verify_password(self, password: str) -> bool:
         """验证密码是否正确"""
-        if ':' not in self._password:
-            # 兼容旧密码
-            return self._password == hashlib.sha256(password.encode()).hexdigest()
+        if self._password.startswith(User.HASH_ALGORITHM + '$'):
+            _, iterations, salt, password_hash = self._password.split('$')
+            iterations = int(iterations)
+        elif ':' in self._password:
+            # 旧格式：哈希:盐
+            password_hash, salt = self._password.split(':')
+            iterations = User.LEGACY_ITERATIONS
+        else:
+            # 兼容旧密码（无盐SHA-256）
+            return hmac.compare_digest(self._password, hashlib.sha256(password.encode()).hexdigest())
             
-        password_hash, salt = self._password.split(':')
         new_hash = hashlib.pbkdf2_hmac(
             'sha256',
             password.encode(),
             salt.encode(),
-            100000
+            iterations
         ).hex()
-        return password_hash == new_hash
+        return hmac.compare_digest(password_hash, new_hash)
+    
+    def needs_rehash(self) -> bool:
+        """密码哈希是否为旧格式或迭代次数与当前配置不同"""
+        parts = self._password.split('$')
+        return not (len(parts) == 4 and parts[0] == User.HASH_ALGORITHM
+                    and parts[1] == str(User.iterations))
+    
+    @staticmethod
+    def calibrate_iterations(target_seconds: float = 0.1, minimum: int = 100000) -> int:
+        """测量本机PBKDF2速度，计算使单次验证约耗时target_seconds的迭代次数
+        
+        Args:
+            target_seconds: 目标验证耗时（秒）
+            minimum: 迭代次数下限
+            
+        Returns:
+            int: 迭代次数（取整到1000）
+        """
+        sample = 20000
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            hashlib.pbkdf2_hmac('sha256', b'calibration', os.urandom(16), sample)
+            best = min(best, time.perf_counter() - start)
+        iterations = int(sample * target_seconds / best) // 1000 * 1000
+        return max(minimum, iterations)
     
     def to_dict(self) -> Dict:
         """将用户数据转换为字典"""
@@ -43,14 +91,404 @@ class User:
             'password': self._password,
             'role': self.role
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'User':
+        """从存储的数据创建用户，直接使用已加密的密码，不重新计算哈希"""
+        user = cls.__new__(cls)
+        user.username = data['username']
+        user._password = data['password']
+        user.role = data['role']
+        return user
+
+class UserStore:
+    """用户存储：快照文件 + 追加日志
+    
+    users.json保存完整快照，每次修改只向users.json.journal追加一行JSON
+    并立即fsync，单条记录的写入是原子的；日志条目超过阈值时把快照
+    整体重写到临时文件再替换（压缩）。加载时只保留原始字典，按用户名
+    访问时才创建User对象。
+    
+    多个进程可能同时使用同一组文件：加载、追加和压缩都持有users.json.lock
+    上的文件锁，追加或压缩前先合并其他进程已写入的修改。
+    """
+    
+    def __init__(self, db_file: str, compact_threshold: int = 1000):
+        self.db_file = db_file
+        self.journal_file = db_file + '.journal'
+        self.lock_file = db_file + '.lock'
+        self.compact_threshold = compact_threshold
+        self._records = {}  # username: 用户数据字典
+        self._users = {}  # username: 已创建的User对象
+        self._journal_entries = 0
+        self._signature = None  # 最近一次读写后文件的(大小, 修改时间)
+    
+    def _disk_signature(self) -> Tuple:
+        """快照和日志文件的大小与修改时间"""
+        signature = []
+        for path in (self.db_file, self.journal_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def is_stale(self) -> bool:
+        """文件是否被其他进程或实例修改过"""
+        return self._signature != self._disk_signature()
+    
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的排他文件锁"""
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                while True:
+                    try:
+                        # LK_LOCK重试10秒后仍未拿到锁会抛出OSError，继续等待
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+                try:
+                    yield
+                finally:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+    
+    def exists(self) -> bool:
+        """快照或日志文件是否存在"""
+        return os.path.exists(self.db_file) or os.path.exists(self.journal_file)
+    
+    def load(self):
+        """读取快照并重放日志
+        
+        Raises:
+            json.JSONDecodeError: 快照文件损坏
+        """
+        with self._file_lock():
+            self._load()
+    
+    def _load(self):
+        """读取快照并重放日志（调用方持有文件锁）"""
+        self._records = {}
+        self._users = {}
+        self._journal_entries = 0
+        
+        if os.path.exists(self.db_file):
+            with open(self.db_file, 'r') as f:
+                data = json.load(f)
+            for user_data in data.values():
+                self._records[user_data['username']] = user_data
+        
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as f:
+                content = f.read()
+            # 写入中断会在末尾留下不完整的记录，截掉它以免后续追加的记录被污染
+            complete = content.rfind(b'\n') + 1
+            if complete < len(content):
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(complete)
+            for line in content[:complete].decode('utf-8').splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(entry)
+                self._journal_entries += 1
+        
+        self._signature = self._disk_signature()
+    
+    def _apply(self, entry: Dict):
+        if entry.get('op') == 'put':
+            user_data = entry['user']
+            self._records[user_data['username']] = user_data
+            self._users.pop(user_data['username'], None)
+    
+    def _catch_up(self):
+        """合并其他进程在上次读写之后的修改（调用方持有文件锁）"""
+        if self.is_stale():
+            self._load()
+    
+    def _append(self, entries):
+        """把若干日志条目一次性追加到日志文件（调用方持有文件锁并已调用_catch_up）"""
+        payload = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        fd = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, payload.encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._journal_entries += len(entries)
+        self._signature = self._disk_signature()
+    
+    def get(self, username: str) -> Optional[User]:
+        """按用户名获取用户，首次访问时才创建User对象"""
+        user = self._users.get(username)
+        if user is None:
+            user_data = self._records.get(username)
+            if user_data is None:
+                return None
+            user = User.from_dict(user_data)
+            self._users[username] = user
+        return user
+    
+    def put(self, user: User):
+        """新增或更新用户，写入一条日志记录"""
+        self.put_many([user])
+    
+    def put_many(self, users: List[User]):
+        """批量新增或更新用户，所有日志记录在一次写入中提交"""
+        if not users:
+            return
+        records = [user.to_dict() for user in users]
+        with self._file_lock():
+            # 先合并其他进程追加的记录，写入后记下的文件状态才不会掩盖它们
+            self._catch_up()
+            self._append([{'op': 'put', 'user': record} for record in records])
+            for user, record in zip(users, records):
+                self._records[user.username] = record
+                self._users[user.username] = user
+            if self._journal_entries >= self.compact_threshold:
+                self._compact()
+    
+    def replace_password(self, username: str, old_password: str, new_password: str) -> bool:
+        """只替换用户的密码哈希，其余字段以磁盘上的最新记录为准
+        
+        Args:
+            username: 用户名
+            old_password: 调用方读取到的密码哈希
+            new_password: 新的密码哈希
+            
+        Returns:
+            bool: 是否写入；记录已被删除或密码已被其他进程修改时不写入
+        """
+        with self._file_lock():
+            self._catch_up()
+            record = self._records.get(username)
+            if record is None or record['password'] != old_password:
+                return False
+            record = dict(record, password=new_password)
+            self._append([{'op': 'put', 'user': record}])
+            self._records[username] = record
+            self._users.pop(username, None)
+            if self._journal_entries >= self.compact_threshold:
+                self._compact()
+        return True
+    
+    def compact(self):
+        """把当前数据原子地写入快照并清空日志"""
+        with self._file_lock():
+            # 重新读取日志，其他进程已追加的记录一并写入快照，不会随日志被删除
+            self._catch_up()
+            self._compact()
+    
+    def _compact(self):
+        """写入快照并删除日志（调用方持有文件锁并已调用_catch_up）"""
+        temp_file = self.db_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self._records, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.db_file)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._journal_entries = 0
+        self._signature = self._disk_signature()
+    
+    def __contains__(self, username: str) -> bool:
+        return username in self._records
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+class LoginThrottle:
+    """登录失败限流
+    
+    按用户名和全局两个滑动窗口统计失败次数，超过阈值后按指数退避临时锁定。
+    被拒绝的尝试在任何密钥派生之前返回，不会消耗PBKDF2计算。
+    """
+    
+    def __init__(self, window: float = 300, user_threshold: int = 5,
+                 global_threshold: int = 100, base_delay: float = 1.0, max_delay: float = 900):
+        self.window = window
+        self.user_threshold = user_threshold
+        self.global_threshold = global_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._failures = {}  # username: deque[失败时间]
+        self._locked_until = {}  # username: 解锁时间
+        self._global_failures = deque()
+        self._global_locked_until = 0.0
+        self._lock = threading.Lock()
+        self.counters = {'allowed': 0, 'rejected': 0, 'successes': 0,
+                         'failures': 0, 'user_lockouts': 0, 'global_lockouts': 0}
+    
+    def _backoff(self, failures: int, threshold: int) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** (failures - threshold))
+    
+    def _prune(self, failures: deque, now: float):
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+    
+    def retry_after(self, username: str) -> float:
+        """距离允许再次尝试的秒数，0表示当前允许"""
+        now = time.monotonic()
+        with self._lock:
+            until = max(self._locked_until.get(username, 0.0), self._global_locked_until)
+        return max(0.0, until - now)
+    
+    def check(self, username: str) -> bool:
+        """是否允许本次登录尝试"""
+        allowed = self.retry_after(username) == 0
+        with self._lock:
+            self.counters['allowed' if allowed else 'rejected'] += 1
+        return allowed
+    
+    def record_success(self, username: str):
+        """登录成功，清除该用户的失败记录"""
+        with self._lock:
+            self.counters['successes'] += 1
+            self._failures.pop(username, None)
+            self._locked_until.pop(username, None)
+    
+    def record_failure(self, username: str):
+        """记录一次失败，必要时锁定该用户或全局"""
+        now = time.monotonic()
+        with self._lock:
+            self.counters['failures'] += 1
+            
+            failures = self._failures.setdefault(username, deque())
+            self._prune(failures, now)
+            failures.append(now)
+            if len(failures) >= self.user_threshold:
+                self._locked_until[username] = now + self._backoff(len(failures), self.user_threshold)
+                self.counters['user_lockouts'] += 1
+            
+            self._prune(self._global_failures, now)
+            self._global_failures.append(now)
+            if len(self._global_failures) >= self.global_threshold:
+                self._global_locked_until = now + self._backoff(
+                    len(self._global_failures), self.global_threshold)
+                self.counters['global_lockouts'] += 1
+            
+            # 大量随机用户名时清理已过窗口的记录
+            if len(self._failures) > 10000:
+                for name in list(self._failures):
+                    self._prune(self._failures[name], now)
+                    if not self._failures[name] and self._locked_until.get(name, 0) <= now:
+                        del self._failures[name]
+                        self._locked_until.pop(name, None)
+    
+    def metrics(self) -> Dict:
+        """限流计数器"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(self._global_failures, now)
+            return {
+                **self.counters,
+                'window_failures': len(self._global_failures),
+                'locked_users': sum(1 for until in self._locked_until.values() if until > now),
+                'global_locked': self._global_locked_until > now,
+            }
 
 class UserManager:
+    """用户管理器
+    
+    每个数据文件在进程内只有一个共享实例（与RegisterCodeManager相同的单例方式），
+    各窗口再次创建时只在文件大小或修改时间变化后重新加载。
+    """
+    _instances = {}  # 数据文件绝对路径: UserManager
+    _first_run = None  # 首次运行检查结果，每个进程只检查一次
+    hash_config_file = "auth/hash_config.json"
+    
+    def __new__(cls, db_file: str = "users.json"):
+        key = os.path.abspath(db_file)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super(UserManager, cls).__new__(cls)
+            instance._initialized = False
+            cls._instances[key] = instance
+        return instance
+    
     def __init__(self, db_file: str = "users.json"):
+        if self._initialized:
+            self.reload_if_changed()
+            return
+        self._initialized = True
         self.db_file = db_file
-        self.users = {}  # username: User
+        self.users = UserStore(db_file)  # username: User
+        self.throttle = LoginThrottle()
+        self._lock = threading.RLock()
+        self._load_hash_config()
         self._load_users()
     
-    def _is_first_run(self) -> bool:
+    def _load_hash_config(self):
+        """读取本部署校准后的密码哈希迭代次数"""
+        try:
+            with open(self.hash_config_file, 'r') as f:
+                iterations = int(json.load(f)['iterations'])
+            if iterations >= User.LEGACY_ITERATIONS:
+                User.iterations = iterations
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    
+    def calibrate_password_hashing(self, target_seconds: float = 0.1) -> int:
+        """按本机性能校准密码哈希迭代次数并保存
+        
+        已有用户的哈希会在各自下次登录成功时自动升级。
+        
+        Args:
+            target_seconds: 单次密码验证的目标耗时（秒）
+            
+        Returns:
+            int: 新的迭代次数
+        """
+        iterations = User.calibrate_iterations(target_seconds)
+        config_dir = os.path.dirname(self.hash_config_file)
+        if config_dir and not os.path.exists(config_dir):
+            os.makedirs(config_dir)
+        with open(self.hash_config_file, 'w') as f:
+            json.dump({'algorithm': User.HASH_ALGORITHM, 'iterations': iterations,
+                       'target_seconds': target_seconds}, f, indent=4)
+        User.iterations = iterations
+        return iterations
+    
+    def reload_if_changed(self) -> bool:
+        """文件在外部发生变化时重新加载
+        
+        Returns:
+            bool: 是否重新加载
+        """
+        with self._lock:
+            if not self.users.is_stale():
+                return False
+            self._load_users()
+            return True
+    
+    @classmethod
+    def is_first_run(cls) -> bool:
+        """是否第一次运行系统（结果在进程内缓存，step.txt只更新一次）"""
+        if cls._first_run is None:
+            cls._first_run = cls._is_first_run()
+        return cls._first_run
+    
+    @staticmethod
+    def _is_first_run() -> bool:
         """检查是否是第一次运行系统"""
         step_file = "auth/step.txt"
         
@@ -82,41 +520,32 @@ class UserManager:
                 f.write("2")  # 设为第二次运行
             return False
     
+    def _create_default_admin(self) -> bool:
+        """只在第一次运行时创建默认管理员账户"""
+        if not self.is_first_run():
+            return False
+        self.users.put(User("admin", "admin123", "admin"))
+        return True
+    
     def _load_users(self):
-        """从文件加载用户数据"""
-        is_first_run = self._is_first_run()
-        
-        if not os.path.exists(self.db_file):
-            # 只在第一次运行时创建默认管理员账户
-            if is_first_run:
-                admin = User("admin", "admin123", "admin")
-                self.users[admin.username] = admin
-                self._save_users()
+        """从文件加载用户数据
+        
+        首次运行检查只在数据文件缺失或损坏、需要决定是否创建默认管理员时进行。
+        """
+        if not self.users.exists():
+            self._create_default_admin()
             return
         
         try:
-            with open(self.db_file, 'r') as f:
-                data = json.load(f)
-                for user_data in data.values():
-                    user = User(
-                        user_data['username'],
-                        "",  # 密码从文件读取，不需要明文
-                        user_data['role']
-                    )
-                    user._password = user_data['password']  # 设置加密后的密码
-                    self.users[user.username] = user
-        except (json.JSONDecodeError, FileNotFoundError):
+            self.users.load()
+        except (json.JSONDecodeError, FileNotFoundError, KeyError):
             # 文件损坏或不存在，只在第一次运行时创建默认管理员账户
-            if is_first_run:
-                admin = User("admin", "admin123", "admin")
-                self.users[admin.username] = admin
+            if self._create_default_admin():
                 self._save_users()
     
     def _save_users(self):
-        """保存用户数据到文件"""
-        data = {username: user.to_dict() for username, user in self.users.items()}
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        """把所有用户数据完整写入快照文件"""
+        self.users.compact()
     
     @staticmethod
     def _validate_username(username: str) -> bool:
@@ -152,14 +581,100 @@ class UserManager:
             
         if not self._validate_password(password):
             return False
-            
+        
+        # 先合并其他进程的修改，避免基于过期数据写入
+        self.reload_if_changed()
         if username in self.users:
             return False
         
-        self.users[username] = User(username, password, role)
-        self._save_users()
+        self.users.put(User(username, password, role))
         return True
     
+    def bulk_register(self, entries: Iterable[Tuple[str, str, str]], first_row: int = 1,
+                      max_workers: Optional[int] = None) -> List[Dict]:
+        """批量注册用户
+        
+        先校验所有行，再用进程池并行计算密码哈希，最后一次性提交。
+        
+        Args:
+            entries: (用户名, 密码, 角色) 序列，角色为空时默认为user
+            first_row: 第一条记录在报告中的行号
+            max_workers: 哈希计算进程数，默认CPU核数
+            
+        Returns:
+            List[Dict]: 每行的结果 {'row', 'username', 'status', 'error'}
+        """
+        self.reload_if_changed()
+        report = []
+        valid = []  # (报告项, 用户名, 密码, 角色)
+        seen = set()
+        for row, (username, password, role) in enumerate(entries, first_row):
+            username = (username or '').strip()
+            password = password or ''
+            role = (role or 'user').strip()
+            item = {'row': row, 'username': username, 'status': 'error', 'error': None}
+            report.append(item)
+            
+            if not self._validate_username(username):
+                item['error'] = '用户名格式不正确'
+            elif not self._validate_password(password):
+                item['error'] = '密码强度不足'
+            elif role not in ('user', 'admin'):
+                item['error'] = f'未知角色: {role}'
+            elif username in self.users:
+                item['error'] = '用户名已存在'
+            elif username in seen:
+                item['error'] = '用户名在导入文件中重复'
+            else:
+                seen.add(username)
+                valid.append((item, username, password, role))
+        
+        if valid:
+            passwords = [password for _, _, password, _ in valid]
+            if len(valid) > 1:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    # 显式传入迭代次数，子进程不一定继承当前配置
+                    encrypt = partial(User._encrypt_password, iterations=User.iterations)
+                    hashes = list(executor.map(encrypt, passwords,
+                                               chunksize=max(1, len(valid) // 64)))
+            else:
+                hashes = [User._encrypt_password(passwords[0])]
+            
+            users = []
+            for (item, username, _, role), password_hash in zip(valid, hashes):
+                users.append(User.from_dict({'username': username, 'password': password_hash, 'role': role}))
+                item['status'] = 'ok'
+            self.users.put_many(users)
+        
+        return report
+    
+    def import_users(self, file_path: str, max_workers: Optional[int] = None) -> List[Dict]:
+        """从CSV/Excel文件批量导入用户
+        
+        文件需包含用户名、密码列（username/password或用户名/密码），
+        角色列（role/角色）可选。
+        
+        Returns:
+            List[Dict]: 每行的结果，行号与表格中的行号一致（表头为第1行）
+        """
+        from Action import ExcelProcessor
+        
+        processor = ExcelProcessor()
+        processor.set_file(file_path)
+        df = processor.read_sheet(dtype=str)
+        
+        aliases = {'用户名': 'username', '密码': 'password', '角色': 'role'}
+        df = df.rename(columns=lambda c: aliases.get(str(c).strip(), str(c).strip().lower()))
+        missing = {'username', 'password'} - set(df.columns)
+        if missing:
+            raise ValueError(f"导入文件缺少列: {', '.join(sorted(missing))}")
+        if 'role' not in df.columns:
+            df['role'] = None
+        df = df.astype(object).where(df.notna(), None)
+        
+        entries = zip(df['username'], df['password'], df['role'])
+        return self.bulk_register(entries, first_row=2, max_workers=max_workers)
+    
     def change_password(self, username: str, new_password: str) -> bool:
         """修改用户密码
         Args:
@@ -171,20 +686,35 @@ class UserManager:
         if not self._validate_password(new_password):
             return False
             
+        self.reload_if_changed()
         user = self.users.get(username)
         if not user:
             return False
             
         # 使用User类的加密方法更新密码
         user._password = User._encrypt_password(new_password)
-        self._save_users()
+        self.users.put(user)
         return True
     
     def login(self, username: str, password: str) -> Optional[User]:
-        """用户登录验证"""
+        """用户登录验证
+        
+        失败次数过多时直接拒绝（返回None），可通过throttle.retry_after查询剩余等待时间。
+        """
+        if not self.throttle.check(username):
+            return None
+        
         user = self.users.get(username)
         if user and user.verify_password(password):
+            self.throttle.record_success(username)
+            # 旧格式或迭代次数已调整的哈希，在登录成功时用当前配置重新加密；
+            # 只替换密码字段，避免用内存中的旧记录覆盖其他进程修改的角色等信息
+            if user.needs_rehash():
+                if self.users.replace_password(username, user._password,
+                                               User._encrypt_password(password)):
+                    user = self.users.get(username)
             return user
+        self.throttle.record_failure(username)
         return None
     
     def is_admin(self, user: User) -> bool:
@@ -194,6 +194,10 @@ class AdminUserDialog(QDialog):
             return
         
         try:
+            # 首次设置时按本机性能校准密码哈希，两个账号直接使用校准后的迭代次数
+            if not os.path.exists(self.user_manager.hash_config_file):
+                self.user_manager.calibrate_password_hashing()
+            
             # 检查users.json是否存在
             if not os.path.exists("users.json"):
                 # 创建空的users.json文件
@@ -218,6 +222,12 @@ class AdminUserDialog(QDialog):
             return
 
 def main():
+    # python add_admin.py --calibrate-hashing：硬件变化后重新校准密码哈希迭代次数
+    if '--calibrate-hashing' in sys.argv[1:]:
+        iterations = UserManager().calibrate_password_hashing()
+        print(f"密码哈希迭代次数已校准为 {iterations}，已有用户下次登录时自动升级")
+        return
+    
     app = QApplication(sys.argv)
     dialog = AdminUserDialog()
     dialog.exec_()
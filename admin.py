@@ -1,12 +1,139 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QPushButton, QListWidget, QMessageBox, QInputDialog)
-from PyQt5.QtCore import Qt
+                            QPushButton, QListWidget, QMessageBox, QInputDialog,
+                            QFileDialog, QApplication, QTableWidget, QTableWidgetItem,
+                            QHeaderView)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from register import RegisterCodeManager
+from User import UserManager
+import metrics
+
+# 按钮颜色：(背景色, 悬停背景色)
+_GREEN = ('#4CAF50', '#45a049')
+_BLUE = ('#2196F3', '#1976D2')
+_RED = ('#f44336', '#d32f2f')
+
+
+def _button_style(color, hover):
+    """管理面板按钮的样式表"""
+    return f"""
+            QPushButton {{
+                background-color: {color};
+                color: white;
+                border-radius: 5px;
+                padding: 8px;
+                font-size: 14px;
+            }}
+            QPushButton:hover {{
+                background-color: {hover};
+            }}
+        """
+
+
+class ImportWorker(QThread):
+    """在后台线程中读取用户列表并导入，避免读取文件和计算密码哈希阻塞界面"""
+    finished_import = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        
+    def run(self):
+        try:
+            self.finished_import.emit(UserManager().import_users(self.file_path))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class MetricsDialog(QDialog):
+    """性能统计面板：各类操作的延迟分位数、吞吐量和最慢的文件"""
+    
+    OPERATION_NAMES = {'login': '登录', 'conversion': '转换', 'query': '查询', 'profile': '列统计'}
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+        self.refresh()
+        
+    def setup_ui(self):
+        """设置UI界面"""
+        self.setWindowTitle("性能统计")
+        self.resize(720, 520)
+        
+        layout = QVBoxLayout()
+        
+        layout.addWidget(QLabel("最近7天操作统计（耗时单位：秒）"))
+        self.operation_table = QTableWidget(0, 8)
+        self.operation_table.setHorizontalHeaderLabels(
+            ["操作", "次数", "失败", "P50", "P90", "P99", "最大", "每分钟"])
+        self.operation_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.operation_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.operation_table)
+        
+        layout.addWidget(QLabel("最慢的文件"))
+        self.file_table = QTableWidget(0, 4)
+        self.file_table.setHorizontalHeaderLabels(["文件", "操作", "耗时(秒)", "用户"])
+        self.file_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.file_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.file_table)
+        
+        self.throttle_label = QLabel()
+        layout.addWidget(self.throttle_label)
+        
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        layout.addWidget(refresh_btn)
+        
+        self.setLayout(layout)
+        
+    def refresh(self):
+        """重新读取指标并刷新表格"""
+        store = metrics.get_store()
+        # 未启用指标时显示空表
+        summary = store.summary() if store is not None else {'operations': {}, 'slowest_files': []}
+        
+        def fmt(value, digits=3):
+            return "-" if value is None else f"{value:.{digits}f}"
+        
+        operations = summary['operations']
+        self.operation_table.setRowCount(len(operations))
+        for row, (operation, stats) in enumerate(sorted(operations.items())):
+            values = [
+                self.OPERATION_NAMES.get(operation, operation),
+                str(stats['count']),
+                str(stats['errors']),
+                fmt(stats['p50']),
+                fmt(stats['p90']),
+                fmt(stats['p99']),
+                fmt(stats['max']),
+                fmt(stats['per_minute'], 2),
+            ]
+            for column, value in enumerate(values):
+                self.operation_table.setItem(row, column, QTableWidgetItem(value))
+                
+        slowest = summary['slowest_files']
+        self.file_table.setRowCount(len(slowest))
+        for row, record in enumerate(slowest):
+            values = [
+                record['file'],
+                self.OPERATION_NAMES.get(record['op'], record['op']),
+                fmt(record['duration']),
+                record.get('user') or '-',
+            ]
+            for column, value in enumerate(values):
+                self.file_table.setItem(row, column, QTableWidgetItem(value))
+        
+        # 登录限流计数（当前进程）
+        throttle = UserManager().throttle.metrics()
+        self.throttle_label.setText(
+            f"登录限流：拒绝 {throttle['rejected']} 次，失败 {throttle['failures']} 次，"
+            f"当前锁定用户 {throttle['locked_users']} 个"
+        )
 
 class AdminWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.register_code_manager = RegisterCodeManager()
+        self._import_worker = None
         self.setup_ui()
         
     def setup_ui(self):
@@ -24,21 +151,28 @@ class AdminWindow(QDialog):
         
         # 生成注册码按钮
         generate_btn = QPushButton("生成新注册码")
-        generate_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border-radius: 5px;
-                padding: 8px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
+        generate_btn.setStyleSheet(_button_style(*_GREEN))
         generate_btn.clicked.connect(self.generate_code)
         layout.addWidget(generate_btn)
         
+        # 批量导入用户按钮
+        import_btn = self.import_btn = QPushButton("批量导入用户")
+        import_btn.setStyleSheet(_button_style(*_BLUE))
+        import_btn.clicked.connect(self.import_users)
+        layout.addWidget(import_btn)
+        
+        # 导出注册码按钮
+        export_btn = QPushButton("导出注册码")
+        export_btn.setStyleSheet(_button_style(*_BLUE))
+        export_btn.clicked.connect(self.export_codes)
+        layout.addWidget(export_btn)
+        
+        # 性能统计按钮
+        metrics_btn = QPushButton("性能统计")
+        metrics_btn.setStyleSheet(_button_style(*_BLUE))
+        metrics_btn.clicked.connect(self.show_metrics)
+        layout.addWidget(metrics_btn)
+        
         # 注册码列表
         self.code_list = QListWidget()
         self.code_list.setStyleSheet("""
@@ -57,28 +191,31 @@ class AdminWindow(QDialog):
             }
         """)
         layout.addWidget(self.code_list)
+        self.load_codes()
         
         # 关闭按钮
         close_btn = QPushButton("关闭")
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border-radius: 5px;
-                padding: 8px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #d32f2f;
-            }
-        """)
+        close_btn.setStyleSheet(_button_style(*_RED))
         close_btn.clicked.connect(self.close)
         layout.addWidget(close_btn)
         
         self.setLayout(layout)
         
     def generate_code(self):
-        """生成新的注册码"""
+        """批量生成新的注册码"""
+        # 获取数量
+        count, ok = QInputDialog.getInt(
+            self,
+            "设置数量",
+            "请输入要生成的注册码数量：",
+            value=1,
+            min=1,
+            max=10000
+        )
+        
+        if not ok:
+            return
+            
         # 获取有效期
         hours, ok = QInputDialog.getInt(
             self, 
@@ -93,17 +230,107 @@ class AdminWindow(QDialog):
             return
             
         # 生成注册码
-        code = self.register_code_manager.generate_code(valid_hours=hours)
+        codes = self.register_code_manager.generate_codes(count, valid_hours=hours)
         
         # 添加到列表
-        self.code_list.addItem(f"注册码: {code} (有效期: {hours}小时)")
+        self.code_list.addItems([f"注册码: {code} (有效期: {hours}小时)" for code in codes])
         
         # 复制到剪贴板
-        from PyQt5.QtWidgets import QApplication
-        QApplication.clipboard().setText(code)
+        QApplication.clipboard().setText('\n'.join(codes))
+        
+        if count == 1:
+            message = f"注册码已生成并复制到剪贴板：\n{codes[0]}\n\n有效期：{hours}小时"
+        else:
+            message = f"已生成{count}个注册码并复制到剪贴板\n\n有效期：{hours}小时\n可使用“导出注册码”保存为Excel文件"
+        QMessageBox.information(self, "注册码已生成", message)
+        
+    def load_codes(self):
+        """显示所有未使用且未过期的注册码"""
+        self.code_list.clear()
+        self.code_list.addItems([
+            f"注册码: {c.code} (过期时间: {c.expiry.strftime('%Y-%m-%d %H:%M')})"
+            for c in self.register_code_manager.active_codes()
+        ])
         
-        QMessageBox.information(
+    def show_metrics(self):
+        """打开性能统计面板"""
+        MetricsDialog(self).exec_()
+        
+    def export_codes(self):
+        """导出有效注册码到Excel文件"""
+        file_path, _ = QFileDialog.getSaveFileName(
             self,
-            "注册码已生成",
-            f"注册码已生成并复制到剪贴板：\n{code}\n\n有效期：{hours}小时"
-        )
\ No newline at end of file
+            "导出注册码",
+            "注册码.xlsx",
+            "Excel文件 (*.xlsx);;CSV文件 (*.csv)"
+        )
+        if not file_path:
+            return
+            
+        try:
+            count = self.register_code_manager.export_codes(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败：{str(e)}")
+            return
+            
+        QMessageBox.information(self, "导出完成", f"已导出{count}个注册码到：\n{file_path}")
+        
+    def import_users(self):
+        """从CSV/Excel文件批量导入用户"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "选择用户列表",
+            "",
+            "用户列表 (*.xlsx *.xls *.csv)"
+        )
+        if not file_path or self._import_worker is not None:
+            return
+            
+        # 导入在后台线程中进行，完成前禁用导入按钮
+        self.import_btn.setEnabled(False)
+        self.import_btn.setText("正在导入...")
+        self._import_worker = ImportWorker(file_path, self)
+        self._import_worker.finished_import.connect(
+            lambda report: self._on_import_finished(file_path, report))
+        self._import_worker.failed.connect(self._on_import_failed)
+        self._import_worker.finished.connect(self._on_import_done)
+        self._import_worker.start()
+        
+    def done(self, result):
+        """导入进行中不关闭窗口（关闭按钮、Esc和reject最终都会调用done）"""
+        if self._import_worker is not None and self._import_worker.isRunning():
+            QMessageBox.information(self, "提示", "正在导入用户，请等待导入完成后再关闭")
+            return
+        super().done(result)
+        
+    def _on_import_done(self):
+        """后台线程结束后恢复导入按钮"""
+        self._import_worker.deleteLater()
+        self._import_worker = None
+        self.import_btn.setEnabled(True)
+        self.import_btn.setText("批量导入用户")
+        
+    def _on_import_failed(self, error):
+        QMessageBox.critical(self, "错误", f"导入失败：{error}")
+        
+    def _on_import_finished(self, file_path, report):
+        """显示导入结果"""
+        failed = [item for item in report if item['status'] != 'ok']
+        message = f"成功导入 {len(report) - len(failed)} 个用户，失败 {len(failed)} 个。"
+        
+        # 有失败行时写出逐行错误报告
+        if failed:
+            import csv
+            import os
+            report_path = os.path.splitext(file_path)[0] + "_导入报告.csv"
+            try:
+                with open(report_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.DictWriter(f, fieldnames=['row', 'username', 'status', 'error'])
+                    writer.writeheader()
+                    writer.writerows(report)
+                message += f"\n\n详细报告已保存到：\n{report_path}"
+            except OSError as e:
+                # 源文件所在目录可能只读（如网络共享）
+                message += f"\n\n详细报告保存失败：{str(e)}"
+            
+        QMessageBox.information(self, "导入完成", message)
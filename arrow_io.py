@@ -0,0 +1,310 @@
+"""Apache Arrow数据交换
+
+把工作表转换为Arrow记录批次流或表，供Polars、DuckDB和NumPy直接使用；
+也可以接受Arrow数据作为ExcelProcessor的输入。
+pyarrow为可选依赖，只有用到Arrow功能时才需要安装。
+"""
+import itertools
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from reader import _resolve_columns, parse_columns, parse_rows
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow功能需要安装pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _row_blocks(records: Iterable[Sequence], batch_size: int) -> Iterator[List[Sequence]]:
+    """把逐行产生的记录按batch_size分组"""
+    records = iter(records)
+    while True:
+        block = list(itertools.islice(records, batch_size))
+        if not block:
+            return
+        yield block
+
+
+def _transpose(block: List[Sequence], width: int) -> List[list]:
+    if not block:
+        return [[] for _ in range(width)]
+    return [list(column) for column in zip(*block)]
+
+
+def _to_text(values: list) -> list:
+    # value != value 用于识别NaN/NaT
+    return [None if value is None or value != value else str(value) for value in values]
+
+
+def _infer_array(pa, values: list):
+    """推断一列的Arrow类型，混合类型的列按字符串处理"""
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(_to_text(values), type=pa.string())
+    if pa.types.is_null(array.type):
+        return pa.array(_to_text(values), type=pa.string())
+    return array
+
+
+def _convert_array(pa, values: list, field):
+    """按已确定的类型转换一列
+
+    先独立推断再做安全转换（safe=True），不会把1.5截断为1；
+    无法无损转换时抛出SchemaConflict。
+    """
+    if pa.types.is_string(field.type):
+        return pa.array(_to_text(values), type=pa.string())
+    array = _infer_array(pa, values)
+    if array.type == field.type:
+        return array
+    if array.null_count == len(array):
+        return pa.nulls(len(array), type=field.type)
+    # 只在同类类型之间转换，避免把文本 "5" 之类的值悄悄转为数字
+    if _type_group(pa, array.type) != _type_group(pa, field.type) or _type_group(pa, field.type) is None:
+        raise SchemaConflict(field, array.type)
+    try:
+        return array.cast(field.type, safe=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        raise SchemaConflict(field, array.type)
+
+
+def _type_group(pa, data_type):
+    if pa.types.is_integer(data_type) or pa.types.is_floating(data_type):
+        return 'number'
+    if pa.types.is_temporal(data_type):
+        return 'temporal'
+    return None
+
+
+class SchemaConflict(ValueError):
+    """后续批次的值无法无损转换为第一批确定的列类型"""
+
+    def __init__(self, field, found):
+        super().__init__(f"列 {field.name} 的值（{found}）与之前的类型 {field.type} 不一致，"
+                         "可使用to_arrow读取（自动放宽类型）或指定dtype=str按字符串读取")
+        self.field = field
+        self.found = found
+
+
+def _widen_type(pa, current, found):
+    """两种列类型的公共类型：数值之间放宽为float64，其余放宽为字符串"""
+    if _type_group(pa, current) == 'number' and _type_group(pa, found) == 'number':
+        return pa.float64()
+    return pa.string()
+
+
+def _cast_chunks(pa, chunks: list, target) -> list:
+    """把已读取的批次转换为放宽后的类型"""
+    if pa.types.is_string(target):
+        # 与_to_text一致：按Python值转为文本，避免pyarrow的浮点/时间文本格式不同
+        return [pa.array(_to_text(chunk.to_pylist()), type=target) for chunk in chunks]
+    return [chunk.cast(target, safe=True) for chunk in chunks]
+
+
+def record_batch_reader(names: List[str], records: Iterable[Sequence], batch_size: int = 65536, dtype=None):
+    """把逐行产生的记录组装为Arrow记录批次流
+
+    批次在读取过程中逐个生成，不需要先构建完整的数据。列类型由第一批数据确定，
+    第一批中全为空或类型混合的列按字符串处理；流的类型一经确定不能修改，
+    后续批次的值无法无损转换时抛出SchemaConflict（需要放宽类型时使用records_to_table）。
+
+    Args:
+        names: 列名
+        records: 值列表的可迭代对象，每个列表对应一行
+        batch_size: 每批的行数
+        dtype: 为str时所有列都按字符串处理
+
+    Returns:
+        pyarrow.RecordBatchReader
+    """
+    pa = _pyarrow()
+    blocks = _row_blocks(records, batch_size)
+    first = next(blocks, [])
+
+    if dtype is str or not first:
+        schema = pa.schema([pa.field(name, pa.string()) for name in names])
+        first_arrays = None
+    else:
+        first_arrays = [_infer_array(pa, column) for column in _transpose(first, len(names))]
+        schema = pa.schema([pa.field(name, array.type) for name, array in zip(names, first_arrays)])
+
+    def batches():
+        if first_arrays is not None:
+            yield pa.RecordBatch.from_arrays(first_arrays, schema=schema)
+            rest = blocks
+        else:
+            rest = itertools.chain([first], blocks) if first else blocks
+        for block in rest:
+            columns = _transpose(block, len(names))
+            yield pa.RecordBatch.from_arrays(
+                [_convert_array(pa, column, field) for column, field in zip(columns, schema)],
+                schema=schema,
+            )
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+def records_to_table(names: List[str], records: Iterable[Sequence], batch_size: int = 65536, dtype=None):
+    """把逐行产生的记录组装为pyarrow.Table
+
+    与record_batch_reader相同地按批转换，但后续批次与已确定的类型冲突时
+    放宽该列的类型（整数→float64，其他→字符串）并转换之前的批次。
+    """
+    pa = _pyarrow()
+    if dtype is str:
+        return record_batch_reader(names, records, batch_size, dtype).read_all()
+
+    types = None
+    chunks = [[] for _ in names]
+    for block in _row_blocks(records, batch_size):
+        columns = _transpose(block, len(names))
+        if types is None:
+            arrays = [_infer_array(pa, column) for column in columns]
+            types = [array.type for array in arrays]
+        else:
+            arrays = []
+            for index, column in enumerate(columns):
+                field = pa.field(names[index], types[index])
+                try:
+                    arrays.append(_convert_array(pa, column, field))
+                except SchemaConflict as e:
+                    types[index] = _widen_type(pa, types[index], e.found)
+                    chunks[index] = _cast_chunks(pa, chunks[index], types[index])
+                    arrays.append(_convert_array(pa, column, pa.field(names[index], types[index])))
+        for index, array in enumerate(arrays):
+            chunks[index].append(array)
+
+    if types is None:
+        return pa.Table.from_arrays([pa.array([], type=pa.string()) for _ in names], names=names)
+    return pa.Table.from_arrays([pa.chunked_array(chunk, type=kind) for chunk, kind in zip(chunks, types)],
+                                names=names)
+
+
+def table_reader(table, batch_size: int = 65536):
+    """Arrow表的记录批次流（不复制数据）"""
+    pa = _pyarrow()
+    return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(max_chunksize=batch_size))
+
+
+def dataframe_reader(df, batch_size: int = 65536, dtype=None):
+    """DataFrame的记录批次流，无法直接转换的object列退回逐行组装"""
+    pa = _pyarrow()
+    if dtype is None:
+        try:
+            return table_reader(pa.Table.from_pandas(df, preserve_index=False), batch_size)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    names = [str(name) for name in df.columns]
+    # 数据已全部在内存中，直接组装为表，类型冲突时放宽而不是报错
+    return table_reader(records_to_table(names, df.itertuples(index=False, name=None), batch_size, dtype),
+                        batch_size)
+
+
+def csv_reader(path: str, columns=None, batch_size: int = 65536, dtype=None):
+    """用pyarrow的多线程解析器流式读取CSV/TSV文件
+
+    编码和分隔符由reader.sniff_csv探测，非UTF-8编码由pyarrow边读边转码。
+
+    Args:
+        path: 文件路径
+        columns: 列选择（见reader.parse_columns）
+        batch_size: 每批的大约行数（按表头估算块大小）
+        dtype: 为str时所有列都按字符串读取
+    """
+    pa = _pyarrow()
+    from pyarrow import csv
+    from reader import _csv_columns, sniff_csv
+
+    encoding, delimiter = sniff_csv(path)
+    all_names, selected = _csv_columns(path, encoding, delimiter, columns)
+    names = all_names if selected is None else [all_names[i] for i in selected]
+
+    with open(path, 'rb') as f:
+        line = len(f.readline()) or 1
+    read_options = csv.ReadOptions(
+        column_names=all_names, skip_rows=1,
+        encoding='utf8' if encoding in ('utf-8', 'utf-8-sig') else encoding,
+        block_size=max(line * batch_size, 1 << 20),
+    )
+    convert_options = csv.ConvertOptions(
+        include_columns=list(dict.fromkeys(names)),
+        column_types={name: pa.string() for name in names} if dtype is str else None,
+    )
+    reader = csv.open_csv(path, read_options=read_options,
+                          parse_options=csv.ParseOptions(delimiter=delimiter),
+                          convert_options=convert_options)
+    if selected is None or len(set(selected)) == len(selected):
+        return reader
+
+    # 重复选择的列：逐批按请求的顺序重新组装
+    schema = pa.schema([reader.schema.field(name) for name in names])
+
+    def batches():
+        for batch in reader:
+            yield pa.RecordBatch.from_arrays([batch.column(name) for name in names], schema=schema)
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+def to_table(data):
+    """把Arrow数据统一为pyarrow.Table
+
+    支持pyarrow.Table/RecordBatch/RecordBatchReader，实现Arrow PyCapsule接口的对象
+    （如polars.DataFrame），以及提供to_arrow()方法的对象（如DuckDB查询结果）。
+    """
+    pa = _pyarrow()
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    if isinstance(data, pa.RecordBatchReader):
+        return data.read_all()
+    if hasattr(data, '__arrow_c_stream__'):
+        return pa.table(data)
+    if hasattr(data, 'to_arrow'):
+        return to_table(data.to_arrow())
+    raise TypeError(f"不支持的Arrow数据类型: {type(data).__name__}")
+
+
+def select(table, columns=None, rows=None):
+    """列投影和行范围（切片不复制数据）
+
+    Args:
+        table: pyarrow.Table
+        columns: 列选择（见reader.parse_columns）
+        rows: 数据行范围（见reader.parse_rows）
+    """
+    columns = parse_columns(columns)
+    if columns is not None:
+        names = table.column_names
+        selected = _resolve_columns(columns, dict(enumerate(names)))
+        for index in selected:
+            if index >= len(names):
+                raise ValueError(f"列不存在: {index}")
+        table = table.select(selected)
+
+    rows = parse_rows(rows)
+    if rows is not None:
+        first, last = rows
+        table = table.slice(first - 1, None if last is None else last - first + 1)
+    return table
+
+
+def iter_records(table) -> Iterator[List]:
+    """逐行产生表中的值列表，每次只把一个批次转换为Python对象"""
+    for batch in table.to_batches():
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+def filter_rows(table, row_filter: Optional[Callable[[Dict[str, object]], bool]]):
+    """按行过滤函数筛选表中的行"""
+    if row_filter is None:
+        return table
+    pa = _pyarrow()
+    names = table.column_names
+    mask = [bool(row_filter(dict(zip(names, record)))) for record in iter_records(table)]
+    return table.filter(pa.array(mask, type=pa.bool_()))
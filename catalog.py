@@ -0,0 +1,244 @@
+import os
+import json
+import sqlite3
+import hashlib
+import zipfile
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from reader import XlsxWorkbook, is_csv
+
+
+class WorkbookCatalog:
+    """工作簿目录
+
+    使用SQLite记录所有见过的工作簿（路径、大小、修改时间、内容哈希、
+    工作表列表、尺寸、最近转换时间和输出位置），文件选择、批量转换
+    和查询功能可以直接读取目录，而不必每次都访问较慢的网络共享。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS workbooks (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            content_hash TEXT,
+            sheets TEXT,
+            dimensions TEXT,
+            last_seen TEXT,
+            last_converted TEXT,
+            output_path TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_workbooks_directory ON workbooks(directory);
+    """
+
+    def __init__(self, db_file: str = "catalog.db"):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        # 批量转换时多个工作进程会同时写入，等待其他进程释放写锁
+        self._conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(self._SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def compute_hash(path: str, block_size: int = 1024 * 1024) -> str:
+        """计算文件内容的SHA-256哈希"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def inspect_workbook(path: str) -> Dict[str, Optional[str]]:
+        """读取工作表列表及其尺寸
+
+        xlsx只读取workbook.xml和各工作表开头的<dimension>元素，
+        不解析单元格数据；xls只能获取工作表名称；CSV/TSV文件视为以文件名命名的单个工作表。
+
+        Returns:
+            Dict: 工作表名称 -> 尺寸（如"A1:F100"），未知时为None
+        """
+        if is_csv(path):
+            return {os.path.splitext(os.path.basename(path))[0]: None}
+        if not path.lower().endswith('.xlsx'):
+            import pandas as pd
+            with pd.ExcelFile(path) as excel_file:
+                return {name: None for name in excel_file.sheet_names}
+
+        with XlsxWorkbook(path) as workbook:
+            return {name: WorkbookCatalog._read_dimension(workbook.archive, member)
+                    for name, member in workbook.sheets}
+
+    @staticmethod
+    def _read_dimension(archive: zipfile.ZipFile, member: str) -> Optional[str]:
+        """只解析工作表XML直到<dimension>元素为止"""
+        try:
+            with archive.open(member) as f:
+                for _, elem in ET.iterparse(f, events=('start',)):
+                    tag = elem.tag.rsplit('}', 1)[-1]
+                    if tag == 'dimension':
+                        return elem.get('ref')
+                    if tag == 'sheetData':
+                        return None
+        except (KeyError, ET.ParseError):
+            return None
+        return None
+
+    def update_file(self, path: str, stat: Optional[os.stat_result] = None,
+                    inspect: bool = False, content_path: Optional[str] = None) -> Dict:
+        """增量刷新单个文件的目录记录
+
+        大小和修改时间未变化时直接返回已有记录，只有新文件或发生变化的
+        文件才会重新计算哈希（以及可选地读取工作表信息）。
+
+        Args:
+            path: 文件路径
+            stat: 已获取的文件状态，避免重复stat
+            inspect: 是否读取工作表列表和尺寸
+            content_path: 计算哈希和读取工作表时使用的文件，默认为path；
+                预读取时传入本地副本，避免再从网络共享读取一遍
+
+        Returns:
+            Dict: 最新的目录记录
+        """
+        path = self._normalize(path)
+        if stat is None:
+            stat = os.stat(path)
+        if content_path is None:
+            content_path = path
+
+        record = self.get(path)
+        unchanged = (record is not None
+                     and record['size'] == stat.st_size
+                     and record['mtime'] == stat.st_mtime)
+
+        if unchanged:
+            if inspect and record['sheets'] is None:
+                self._store_sheets(path, self.inspect_workbook(content_path))
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE workbooks SET last_seen = ? WHERE path = ?",
+                                   (self._now(), path))
+            return self.get(path)
+
+        content_hash = self.compute_hash(content_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO workbooks (path, name, directory, size, mtime, content_hash, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen,
+                    sheets = NULL,
+                    dimensions = NULL
+                """,
+                (path, os.path.basename(path), os.path.dirname(path),
+                 stat.st_size, stat.st_mtime, content_hash, self._now())
+            )
+        if inspect:
+            self._store_sheets(path, self.inspect_workbook(content_path))
+        return self.get(path)
+
+    def _store_sheets(self, path: str, sheets: Dict[str, Optional[str]]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE workbooks SET sheets = ?, dimensions = ? WHERE path = ?",
+                (json.dumps(list(sheets), ensure_ascii=False),
+                 json.dumps(sheets, ensure_ascii=False), path)
+            )
+
+    def record_conversion(self, path: str, output_path: Optional[str] = None):
+        """记录一次转换的时间和输出位置
+
+        output_path为None（结果直接返回给调用方）时保留之前记录的输出位置。
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE workbooks SET last_converted = ?, output_path = COALESCE(?, output_path) "
+                "WHERE path = ?",
+                (self._now(), output_path, self._normalize(path))
+            )
+
+    def refresh_directory(self, directory: str, files: Optional[List[str]] = None,
+                          inspect: bool = False) -> List[Dict]:
+        """增量刷新一个目录
+
+        Args:
+            directory: 目录路径
+            files: 已扫描到的文件列表，为None时调用find_excel_files扫描
+            inspect: 是否读取工作表列表和尺寸
+
+        Returns:
+            List[Dict]: 该目录下的目录记录
+        """
+        if files is None:
+            from Action import ExcelProcessor
+            files = ExcelProcessor.find_excel_files(directory)
+
+        seen = set()
+        for file in files:
+            # 扫描到的文件即使本次刷新失败（如暂时无法读取）也保留原有记录
+            seen.add(self._normalize(file))
+            try:
+                self.update_file(file, inspect=inspect)
+            except (OSError, zipfile.BadZipFile, ET.ParseError):
+                continue
+
+        # 删除已不存在的文件
+        directory = self._normalize(directory)
+        with self._lock, self._conn:
+            stale = [row['path'] for row in self._conn.execute(
+                "SELECT path FROM workbooks WHERE directory = ?", (directory,)
+            ) if row['path'] not in seen]
+            self._conn.executemany("DELETE FROM workbooks WHERE path = ?",
+                                   [(p,) for p in stale])
+        return self.list_files(directory)
+
+    def get(self, path: str) -> Optional[Dict]:
+        """读取单个文件的目录记录"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM workbooks WHERE path = ?", (self._normalize(path),)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_files(self, directory: Optional[str] = None) -> List[Dict]:
+        """列出目录中的记录（不访问文件系统）"""
+        with self._lock:
+            if directory is None:
+                rows = self._conn.execute("SELECT * FROM workbooks ORDER BY path").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM workbooks WHERE directory = ? ORDER BY name",
+                    (self._normalize(directory),)
+                ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        for key in ('sheets', 'dimensions'):
+            if record[key] is not None:
+                record[key] = json.loads(record[key])
+        return record
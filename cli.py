@@ -0,0 +1,462 @@
+"""Excel转Markdown命令行工具（无界面模式）
+
+不依赖PyQt5，可在无图形界面的服务器上批量转换。pandas只在真正
+开始转换时由工作进程加载。--to-xlsx把Markdown或CSV/TSV表格转换回xlsx。
+
+示例:
+    python cli.py data/ reports/*.xlsx -o out/ -j 8 --json
+    cat book.xlsx | python cli.py - -o - > book.md
+    python cli.py big.xlsx --profile -o reports/
+    python cli.py huge.xlsx -o out/ --parse-workers 16
+    python cli.py data/ -o out/ --memory-budget 2G
+    python cli.py //share/reports/ -o out/ -j 8 --prefetch 4
+    python cli.py out/book_index.md big.csv --to-xlsx -o xlsx/ --column-types "编号=text"
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def convert_file(path, output=None, max_rows=None, max_bytes=None, columns=None, rows=None,
+                 profile=False, parse_workers=None, memory_budget=None, catalog=None, source=None):
+    """转换单个文件，返回可JSON序列化的结果
+
+    Args:
+        path: Excel文件路径
+        output: 输出文件路径；为None时在结果中返回Markdown文本
+        max_rows: 分片的最大行数（与max_bytes任一指定时按分片输出）
+        max_bytes: 分片的最大字节数
+        columns: 只转换指定的列，如 "A,C,F"
+        rows: 只转换指定的数据行范围，如 "1-1000"
+        profile: 为True时输出列统计报告而不是表格
+        parse_workers: 大型xlsx工作表的解码进程数，None表示单进程
+        memory_budget: 内存预算（如 "2G"），超出时的降级记录在结果的degraded中
+        catalog: 工作簿目录的数据库文件，指定时记录文件信息和本次转换
+        source: 原始路径；预读取时path是本地副本，目录中按原始路径记录
+
+    Returns:
+        dict: 转换结果
+    """
+    from Action import ExcelProcessor
+
+    start = time.perf_counter()
+    result = {'input': path, 'output': output, 'status': 'ok', 'error': None}
+    processor = None
+    workbook_catalog = None
+    try:
+        if catalog:
+            from catalog import WorkbookCatalog
+            workbook_catalog = WorkbookCatalog(catalog)
+        # 本地副本不进入目录，转换完成后按原始路径记录
+        copied = source is not None and source != path
+        processor = ExcelProcessor(catalog=None if copied else workbook_catalog,
+                                   parse_workers=parse_workers, memory_budget=memory_budget)
+        processor.set_file(path)
+        if profile:
+            markdown = processor.profile_report(columns=columns, rows=rows)
+            if output is None:
+                result['markdown'] = markdown
+            else:
+                with open(output, 'w', encoding='utf-8') as f:
+                    f.write(markdown)
+        elif max_rows or max_bytes:
+            output_dir = output or os.path.dirname(os.path.abspath(path))
+            result['output'] = processor.to_markdown_parts(output_dir, max_rows, max_bytes,
+                                                           columns=columns, rows=rows)
+        elif output is None:
+            result['markdown'] = processor.to_markdown(columns=columns, rows=rows)
+        else:
+            processor.write_markdown(output, columns=columns, rows=rows)
+        if copied and workbook_catalog is not None and not profile:
+            # 大小和修改时间取自原文件，哈希按已复制到本地的副本计算
+            workbook_catalog.update_file(source, content_path=path)
+            output_path = result['output']
+            workbook_catalog.record_conversion(source, os.path.abspath(output_path) if output_path else None)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        if workbook_catalog is not None:
+            workbook_catalog.close()
+    if processor is not None and processor.memory_budget is not None:
+        result['degraded'] = processor.memory_budget.events
+    result['duration'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def convert_table(path, output, column_types=None, overwrite=False, sheet_name=None):
+    """把Markdown或CSV/TSV表格转换为xlsx，返回可JSON序列化的结果
+
+    Args:
+        path: 输入文件路径
+        output: 输出的xlsx路径
+        column_types: {列名: 类型}（见xlsx_writer.write_xlsx）
+        overwrite: 输出文件已存在时是否覆盖
+        sheet_name: 工作表名称，默认为输入的文件名
+    """
+    from xlsx_writer import convert_to_xlsx
+
+    start = time.perf_counter()
+    result = {'input': path, 'output': output, 'status': 'ok', 'error': None}
+    try:
+        if os.path.exists(output) and not overwrite:
+            raise FileExistsError(f"输出文件已存在: {output}（可使用--overwrite覆盖）")
+        written = convert_to_xlsx(path, output, column_types, sheet_name)
+        result['rows'] = written['rows']
+        result['sheets'] = written['sheets']
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['duration'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _parse_column_types(text):
+    """解析 "列名=类型,列名=类型" 形式的列类型"""
+    column_types = {}
+    for item in (text or '').split(','):
+        if not item.strip():
+            continue
+        name, sep, column_type = item.rpartition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"无效的列类型: {item}")
+        column_types[name.strip()] = column_type.strip()
+    return column_types
+
+
+def expand_inputs(patterns, to_xlsx=False):
+    """展开文件、目录和通配符参数
+
+    Args:
+        patterns: 命令行中的输入参数
+        to_xlsx: 为True时目录中查找Markdown和CSV/TSV文件，否则查找Excel文件
+
+    Returns:
+        tuple: (文件列表, 无法识别的参数列表)
+    """
+    from Action import ExcelProcessor
+    from reader import CSV_EXTENSIONS
+    from xlsx_writer import MARKDOWN_EXTENSIONS
+
+    files, missing = [], []
+    for pattern in patterns:
+        if pattern == '-':
+            files.append(pattern)
+        elif os.path.isdir(pattern) and to_xlsx:
+            files.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(MARKDOWN_EXTENSIONS + CSV_EXTENSIONS)))
+        elif os.path.isdir(pattern):
+            files.extend(sorted(ExcelProcessor.find_excel_files(pattern)))
+        elif os.path.isfile(pattern):
+            files.append(pattern)
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if matches:
+                files.extend(m for m in matches if os.path.isfile(m))
+            else:
+                missing.append(pattern)
+
+    # 去重并保持顺序
+    seen = set()
+    unique = []
+    for file in files:
+        key = file if file == '-' else os.path.abspath(file)
+        if key not in seen:
+            seen.add(key)
+            unique.append(file)
+    return unique, missing
+
+
+def _output_path(path, output, suffix='.md'):
+    """计算单个文件的输出路径，None表示输出到标准输出"""
+    if output == '-':
+        return None
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if output:
+        return os.path.join(output, stem + suffix)
+    return os.path.splitext(path)[0] + suffix
+
+
+def _output_target(path, output, split):
+    """输出位置的比较键：单个输出文件，或分片输出的目录加文件名前缀；输出到标准输出时为None"""
+    if output is None:
+        return None
+    if split:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output = os.path.join(output, stem)
+    return os.path.normcase(os.path.abspath(output))
+
+
+def _read_stdin(suffix):
+    """把标准输入中的工作簿保存到临时文件"""
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        while True:
+            block = sys.stdin.buffer.read(1024 * 1024)
+            if not block:
+                break
+            f.write(block)
+    return temp_path
+
+
+def _error_result(path, output, error):
+    return {'input': path, 'output': output, 'status': 'error', 'error': error, 'duration': 0}
+
+
+def _convert_prefetched(tasks, jobs, prefetch, max_bytes, threads):
+    """先把文件预读到本地再转换，读取后面的文件和转换当前文件同时进行
+
+    Returns:
+        tuple: (按任务顺序排列的结果, 各阶段统计)
+    """
+    from concurrent.futures import wait
+    from prefetch import Prefetcher
+
+    by_source = {task[0]: task for task in tasks}
+    results = {}
+    executor = None
+    workers = min(jobs, len(tasks))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    # 持有的本地副本 = 正在转换的文件 + 预读的文件
+    with Prefetcher([task[0] for task in tasks], depth=workers + prefetch,
+                    max_bytes=max_bytes, threads=threads) as prefetcher:
+        def finish(item, result, start):
+            prefetcher.release(item)
+            prefetcher.stats.add('parse', item.size, start, time.perf_counter())
+            result['input'] = item.source
+            results[item.source] = result
+
+        def done(future, item, start):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _error_result(item.source, by_source[item.source][1], str(e))
+            finish(item, result, start)
+
+        try:
+            futures = []
+            for item in prefetcher:
+                task = by_source[item.source]
+                start = time.perf_counter()
+                if item.error:
+                    finish(item, _error_result(item.source, task[1], item.error), start)
+                elif executor is None:
+                    finish(item, convert_file(item.path, *task[1:], source=item.source), start)
+                else:
+                    try:
+                        future = executor.submit(convert_file, item.path, *task[1:],
+                                                 source=item.source)
+                    except Exception as e:
+                        # 工作进程崩溃后进程池不再接受任务（BrokenProcessPool）
+                        finish(item, _error_result(item.source, task[1], str(e)), start)
+                        continue
+                    future.add_done_callback(
+                        lambda f, item=item, start=start: done(f, item, start))
+                    futures.append(future)
+            # 异常（包括工作进程崩溃）已由done回调记录为对应文件的错误结果
+            wait(futures)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        stats = prefetcher.stats.summary()
+    return [results[task[0]] for task in tasks], stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='批量将Excel文件转换为Markdown（无界面模式）'
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help='Excel文件、目录或通配符；"-"表示从标准输入读取工作簿')
+    parser.add_argument('-o', '--output',
+                        help='输出目录；"-"表示输出到标准输出（默认与输入文件同目录）')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='并行工作进程数（默认CPU核数）')
+    parser.add_argument('--json', action='store_true',
+                        help='输出JSON格式的转换结果')
+    parser.add_argument('--max-rows', type=int,
+                        help='按行数拆分输出，每个分片的最大数据行数')
+    parser.add_argument('--max-bytes', type=int,
+                        help='按大小拆分输出，每个分片的最大字节数')
+    parser.add_argument('--columns',
+                        help='只转换指定的列，列字母或列名，如 "A,C,F" 或 "A:D"')
+    parser.add_argument('--rows',
+                        help='只转换指定的数据行范围（从1开始，不含表头），如 "1-1000"')
+    parser.add_argument('--profile', action='store_true',
+                        help='输出每列的统计报告（类型、空值率、不同值、分位数、常见值），'
+                             '写入 <文件名>.profile.md')
+    parser.add_argument('--parse-workers', type=int,
+                        help='大型xlsx工作表按行切块多进程解码的进程数'
+                             '（默认只有一个文件时等于--jobs，否则为1）')
+    parser.add_argument('--memory-budget',
+                        help='每个工作进程的内存预算，如 "512M"、"2G"；'
+                             '预计超出时改用流式处理，降级情况记录在转换结果中')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='预读取的文件数：转换的同时把后面的文件复制到本地临时目录，'
+                             '适用于网络共享目录（默认不预读取）')
+    parser.add_argument('--prefetch-bytes', default='512M',
+                        help='预读取的本地副本总大小上限（默认512M）')
+    parser.add_argument('--prefetch-threads', type=int, default=2,
+                        help='预读取的线程数（默认2）')
+    parser.add_argument('--catalog',
+                        help='工作簿目录的SQLite文件：记录转换过的文件及其输出位置（默认不记录）')
+    parser.add_argument('--to-xlsx', action='store_true',
+                        help='反向转换：把Markdown（包括本工具输出的分片索引）或CSV/TSV表格'
+                             '转换为 <文件名>.xlsx，超过1048576行时自动拆分到多个工作表')
+    parser.add_argument('--column-types',
+                        help='--to-xlsx的列类型，如 "编号=text,金额=number"；'
+                             '类型为auto、text、number、date或bool（默认auto按内容推断）')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='--to-xlsx的输出文件已存在时覆盖')
+    parser.add_argument('--stdin-format', default='xlsx', choices=('xlsx', 'xls', 'csv', 'tsv', 'md'),
+                        help='标准输入中数据的格式（默认xlsx）')
+    return parser
+
+
+def run(args):
+    """执行转换，返回退出码"""
+    files, missing = expand_inputs(args.inputs, args.to_xlsx)
+    to_stdout = args.output == '-'
+    split = bool(args.max_rows or args.max_bytes)
+
+    if to_stdout and split:
+        print("错误: 分片输出需要指定输出目录", file=sys.stderr)
+        return EXIT_USAGE
+    if args.profile and split:
+        print("错误: --profile不能与分片输出同时使用", file=sys.stderr)
+        return EXIT_USAGE
+    if args.to_xlsx and (to_stdout or split or args.profile or args.prefetch or args.catalog):
+        print("错误: --to-xlsx不能输出到标准输出，也不能与分片输出、--profile、--prefetch或--catalog同时使用",
+              file=sys.stderr)
+        return EXIT_USAGE
+    if not files:
+        print("错误: 没有找到可转换的文件", file=sys.stderr)
+        return EXIT_USAGE
+    from memory_budget import parse_size
+    try:
+        if args.memory_budget:
+            parse_size(args.memory_budget)
+        prefetch_bytes = parse_size(args.prefetch_bytes)
+        column_types = _parse_column_types(args.column_types)
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if args.output and not to_stdout:
+        os.makedirs(args.output, exist_ok=True)
+
+    # 标准输入先落地为临时文件
+    stdin_file = None
+    if '-' in files:
+        stdin_file = _read_stdin('.' + args.stdin_format)
+        files = [stdin_file if f == '-' else f for f in files]
+
+    # 文件级并行用不满进程时（如只有一个巨大的工作表），改为在文件内部并行解码
+    parse_workers = args.parse_workers
+    if parse_workers is None:
+        parse_workers = args.jobs if len(files) == 1 else 1
+
+    suffix = '.xlsx' if args.to_xlsx else '.profile.md' if args.profile else '.md'
+    tasks = []
+    collisions = []
+    targets = {}
+    for path in files:
+        if split:
+            # 预读取时转换的是本地副本，分片目录按原始路径确定
+            output = args.output or os.path.dirname(os.path.abspath(path))
+        else:
+            output = _output_path(path, args.output, suffix)
+        if path == stdin_file and not to_stdout and not split:
+            output = os.path.join(args.output or '.', 'stdin' + suffix)
+        # 不同输入映射到同一输出（如t.csv和t.xlsx都对应t.md）时报错，不互相覆盖
+        target = _output_target(path, output, split)
+        if target is not None and target in targets:
+            collisions.append(_error_result(
+                '-' if path == stdin_file else path, output,
+                f"输出路径与 {targets[target]} 冲突"))
+            continue
+        if target is not None:
+            targets[target] = '-' if path == stdin_file else path
+        if args.to_xlsx:
+            tasks.append((path, output, column_types, args.overwrite,
+                          'stdin' if path == stdin_file else None))
+        else:
+            tasks.append((path, output, args.max_rows, args.max_bytes, args.columns, args.rows,
+                          args.profile, parse_workers if parse_workers > 1 else None,
+                          args.memory_budget, None if path == stdin_file else args.catalog))
+
+    worker = convert_table if args.to_xlsx else convert_file
+    pipeline = None
+    try:
+        if args.prefetch > 0:
+            results, pipeline = _convert_prefetched(tasks, args.jobs, args.prefetch,
+                                                    prefetch_bytes, args.prefetch_threads)
+        elif args.jobs > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(args.jobs, len(tasks))) as executor:
+                results = list(executor.map(worker, *zip(*tasks)))
+        else:
+            results = [worker(*task) for task in tasks]
+    finally:
+        if stdin_file:
+            os.remove(stdin_file)
+
+    for result in results:
+        if result['input'] == stdin_file:
+            result['input'] = '-'
+        if to_stdout and result['status'] == 'ok':
+            if len(results) > 1:
+                sys.stdout.write(f"## {os.path.basename(result['input'])}\n\n")
+            sys.stdout.write(result.pop('markdown') + '\n')
+
+    results.extend(collisions)
+    for pattern in missing:
+        results.append(_error_result(pattern, None, '文件不存在'))
+
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    # 标准输出被Markdown占用时，结果报告写到标准错误
+    report = sys.stderr if to_stdout else sys.stdout
+    if args.json:
+        summary = {'results': results, 'succeeded': len(results) - failed, 'failed': failed}
+        if pipeline is not None:
+            summary['pipeline'] = pipeline
+        json.dump(summary, report, ensure_ascii=False, indent=2)
+        report.write('\n')
+    else:
+        for r in results:
+            if r['status'] == 'ok':
+                print(f"[成功] {r['input']} -> {r['output'] or '<stdout>'} ({r['duration']}s)", file=report)
+            else:
+                print(f"[失败] {r['input']}: {r['error']}", file=report)
+            for event in r.get('degraded') or ():
+                print(f"[降级] {r['input']}: {event['operation']} {event['reason']}", file=report)
+        if pipeline is not None:
+            for stage, name in (('fetch', '读取'), ('parse', '转换')):
+                item = pipeline[stage]
+                speed = f"{item['mb_per_second']} MB/s" if item['mb_per_second'] is not None else '-'
+                print(f"[预读取] {name}: {item['files']} 个文件，{item['bytes'] / (1024 * 1024):.2f} MB，"
+                      f"用时 {item['wall_seconds']}s，吞吐 {speed}", file=report)
+            print(f"[预读取] 转换等待读取 {pipeline['wait_seconds']}s", file=report)
+
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
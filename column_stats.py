@@ -0,0 +1,345 @@
+"""单遍列统计
+
+逐行消费数据，每列只保留固定大小的概要结构，不需要把整张表读入内存：
+    HyperLogLog   近似不同值数量
+    KLLSketch     近似分位数（数值列）
+    SpaceSaving   近似最常见的值（top-k）
+"""
+import json
+import math
+import heapq
+import random
+import numbers
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value: int) -> int:
+    """splitmix64混合函数，使Python内置哈希（整数的哈希是其本身）分布均匀"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class HyperLogLog:
+    """近似不同值计数，标准误差约为 1.04 / sqrt(2^precision)
+
+    使用进程内的哈希值，结果只在同一进程内可合并。
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._shift = 64 - precision
+
+    def add(self, value):
+        hashed = _mix64(hash(value) & _MASK64)
+        index = hashed >> self._shift
+        rest = hashed & ((1 << self._shift) - 1)
+        rank = self._shift - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # 小基数时改用线性计数
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class KLLSketch:
+    """KLL近似分位数概要，内存约为 O(k)，秩误差通常在 2 / k 以内"""
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.compactors: List[list] = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 8)
+
+    def add(self, value: float):
+        self.count += 1
+        self.compactors[0].append(value)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def _compress(self):
+        """从低到高压缩所有超出容量的层"""
+        level = 0
+        while level < len(self.compactors):
+            if len(self.compactors[level]) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                items = sorted(self.compactors[level])
+                # 随机保留奇数位或偶数位，每个保留的元素权重翻倍
+                offset = self._random.random() < 0.5
+                self.compactors[level + 1].extend(items[offset::2])
+                self.compactors[level] = []
+            level += 1
+
+    def quantiles(self, fractions: Sequence[float]) -> List[Optional[float]]:
+        """返回多个分位数的近似值"""
+        if not self.count:
+            return [None] * len(fractions)
+        weighted = sorted((value, 1 << level)
+                          for level, items in enumerate(self.compactors) for value in items)
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            target = fraction * total
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+        return results
+
+
+class SpaceSaving:
+    """近似top-k（Space-Saving算法），最多跟踪capacity个值
+
+    计数可能偏高，偏高的上界为error。
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[object, int] = {}
+        self.errors: Dict[object, int] = {}
+        self._heap: List[tuple] = []  # (计数, 序号, 值)，惰性更新
+        self._serial = 0
+        self.evictions = 0
+
+    def _push(self, value, count):
+        self._serial += 1
+        heapq.heappush(self._heap, (count, self._serial, value))
+        # 过期的堆元素过多时重建
+        if len(self._heap) > self.capacity * 4:
+            self._heap = [(c, self._serial + i, v) for i, (v, c) in enumerate(self.counts.items(), 1)]
+            self._serial += len(self._heap)
+            heapq.heapify(self._heap)
+
+    def add(self, value):
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            self._push(value, counts[value])
+            return
+        if len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+            self._push(value, 1)
+            return
+        # 替换计数最小的值
+        while True:
+            count, _, victim = heapq.heappop(self._heap)
+            if counts.get(victim) == count:
+                break
+        del counts[victim]
+        del self.errors[victim]
+        self.evictions += 1
+        counts[value] = count + 1
+        self.errors[value] = count
+        self._push(value, count + 1)
+
+    def top(self, k: int) -> List[tuple]:
+        """返回 [(值, 计数, 误差上界)]，按计数从大到小
+
+        发生过替换时只返回确定出现超过一次（计数减误差大于1）的值，
+        几乎全是唯一值的列不会报告随机的值。
+        """
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        if self.evictions:
+            items = [(value, count) for value, count in items if count - self.errors[value] > 1]
+        return [(value, count, self.errors[value]) for value, count in items[:k]]
+
+
+def _kind(value) -> str:
+    """值的类别"""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, numbers.Integral):
+        return 'integer'
+    if isinstance(value, numbers.Real):
+        return 'float'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, time):
+        return 'time'
+    return type(value).__name__
+
+
+_KINDS = {bool: 'boolean', int: 'integer', float: 'float', str: 'string',
+          datetime: 'datetime', date: 'date', time: 'time'}
+
+_ORDERED_KINDS = {'integer': 'number', 'float': 'number', 'datetime': 'datetime',
+                  'date': 'date', 'time': 'time', 'string': 'string'}
+
+
+class ColumnProfile:
+    """单列的统计信息"""
+
+    def __init__(self, name: str, top_k: int = 10, hll_precision: int = 12, kll_k: int = 200):
+        self.name = name
+        self.top_k = top_k
+        self.count = 0
+        self.nulls = 0
+        self.kinds: Dict[str, int] = {}
+        self.minimum: Dict[str, object] = {}
+        self.maximum: Dict[str, object] = {}
+        self.distinct = HyperLogLog(hll_precision)
+        self.quantile_sketch = KLLSketch(kll_k)
+        self.frequent = SpaceSaving(max(top_k * 10, 50))
+
+    def add(self, value):
+        self.count += 1
+        # value != value 用于识别NaN/NaT
+        if value is None or value != value or value == '':
+            self.nulls += 1
+            return
+
+        kind = _KINDS.get(type(value)) or _kind(value)
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        self.distinct.add(value)
+        self.frequent.add(value)
+
+        group = _ORDERED_KINDS.get(kind)
+        if group is not None:
+            current = self.minimum.get(group)
+            if current is None or value < current:
+                self.minimum[group] = value
+            current = self.maximum.get(group)
+            if current is None or value > current:
+                self.maximum[group] = value
+            if group == 'number':
+                self.quantile_sketch.add(value)
+
+    def inferred_type(self) -> str:
+        """推断列类型：单一类别取该类别，整数和小数混合为float，其余为mixed"""
+        kinds = set(self.kinds)
+        if not kinds:
+            return 'empty'
+        if len(kinds) == 1:
+            return kinds.pop()
+        if kinds == {'integer', 'float'}:
+            return 'float'
+        return 'mixed'
+
+    def result(self, quantiles: Sequence[float]) -> Dict:
+        """统计结果（可JSON序列化）"""
+        inferred = self.inferred_type()
+        group = _ORDERED_KINDS.get(inferred)
+        if group is None and inferred == 'mixed':
+            # 混合类型时数值优先，其次字符串
+            group = 'number' if 'number' in self.minimum else 'string' if 'string' in self.minimum else None
+        values = self.count - self.nulls
+        return {
+            'name': self.name,
+            'type': inferred,
+            'kinds': dict(sorted(self.kinds.items(), key=lambda item: -item[1])),
+            'count': self.count,
+            'nulls': self.nulls,
+            'null_rate': self.nulls / self.count if self.count else 0.0,
+            'distinct': min(self.distinct.count(), values),
+            'min': _jsonable(self.minimum.get(group)),
+            'max': _jsonable(self.maximum.get(group)),
+            'quantiles': {str(q): value for q, value in
+                          zip(quantiles, self.quantile_sketch.quantiles(quantiles))}
+            if self.quantile_sketch.count else {},
+            'top': [{'value': _jsonable(value), 'count': count, 'error': error}
+                    for value, count, error in self.frequent.top(self.top_k)],
+        }
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return str(value)
+
+
+def profile_records(names: Sequence[str], records: Iterable[Sequence], top_k: int = 10,
+                    quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> Dict:
+    """单遍统计所有列
+
+    Args:
+        names: 列名
+        records: 值列表的可迭代对象，每个列表对应一行
+        top_k: 每列报告的最常见值个数
+        quantiles: 数值列报告的分位数
+
+    Returns:
+        dict: {'rows': 行数, 'columns': [每列的统计结果]}
+    """
+    profiles = [ColumnProfile(str(name), top_k) for name in names]
+    adders = [profile.add for profile in profiles]
+    rows = 0
+    for record in records:
+        rows += 1
+        for add, value in zip(adders, record):
+            add(value)
+    return {'rows': rows, 'columns': [profile.result(quantiles) for profile in profiles]}
+
+
+def _format(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
+
+def to_markdown(report: Dict, title: Optional[str] = None) -> str:
+    """把统计结果渲染为Markdown报告"""
+    lines = []
+    if title:
+        lines.append(f"# {title}\n")
+    lines.append(f"共 {report['rows']} 行，{len(report['columns'])} 列。"
+                 "不同值数量、分位数和常见值为近似值。\n")
+    lines.append("| 列 | 类型 | 空值率 | 不同值(约) | 最小值 | 最大值 | 中位数(约) |")
+    lines.append("| --- | --- | --- | --- | --- | --- | --- |")
+    for column in report['columns']:
+        median = column['quantiles'].get('0.5')
+        lines.append(f"| {_format(column['name'])} | {column['type']} | {column['null_rate']:.1%} "
+                     f"| {column['distinct']} | {_format(column['min'])} | {_format(column['max'])} "
+                     f"| {_format(median)} |")
+
+    for column in report['columns']:
+        lines.append(f"\n## {_format(column['name'])}\n")
+        kinds = '，'.join(f"{kind} {count}" for kind, count in column['kinds'].items())
+        lines.append(f"- 类型: {column['type']}" + (f"（{kinds}）" if kinds else ''))
+        lines.append(f"- 空值: {column['nulls']} / {column['count']}")
+        if column['quantiles']:
+            quantiles = '，'.join(f"P{float(q) * 100:g}={_format(v)}" for q, v in column['quantiles'].items())
+            lines.append(f"- 分位数: {quantiles}")
+        # 全部只出现一次时不列出常见值
+        if column['top'] and column['top'][0]['count'] > 1:
+            top = '，'.join(f"{_format(item['value'])} ({item['count']})" for item in column['top'])
+            lines.append(f"- 常见值: {top}")
+    return '\n'.join(lines) + '\n'
+
+
+def to_json(report: Dict) -> str:
+    return json.dumps(report, ensure_ascii=False, indent=2)
@@ -1,9 +1,11 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QMessageBox
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from User import UserManager
+from session import SessionManager
+import metrics
 import json
 import os
-import base64
+import time
 
 def show_login():
     """显示登录窗口并返回登录结果
@@ -16,44 +18,35 @@ def show_login():
     login_window.is_accepted = (result == QDialog.Accepted)
     return login_window
 
+class LoginWorker(QThread):
+    """在后台线程中验证密码，避免PBKDF2计算阻塞界面"""
+    finished_login = pyqtSignal(object)
+    
+    def __init__(self, user_manager, username, password, parent=None):
+        super().__init__(parent)
+        self.user_manager = user_manager
+        self.username = username
+        self.password = password
+        
+    def run(self):
+        self.finished_login.emit(self.user_manager.login(self.username, self.password))
+
 class LoginWindow(QDialog):
     def __init__(self):
         super().__init__()
         self.user_manager = UserManager()
+        self.session_manager = SessionManager()
         self.config_file = 'login_config.json'
-        # 加密密钥
-        self._encryption_key = "CXF_KEY"
+        # 保存的会话令牌有效时对应的用户
+        self.session_user = None
+        self._worker = None
         self.load_login_config()
         self.init_ui()
         
-        # 检查是否需要自动登录
-        if hasattr(self, 'auto_login') and self.auto_login:
-            # 使用QTimer延迟执行自动登录，确保UI已完全加载
-            from PyQt5.QtCore import QTimer
-            QTimer.singleShot(500, self.login)
-
-    def _encrypt(self, text):
-        """加密文本"""
-        if not text:
-            return ""
-        # 使用异或加密
-        encrypted = ''.join(chr(ord(c) ^ ord(self._encryption_key[i % len(self._encryption_key)])) 
-                          for i, c in enumerate(text))
-        # 转换为base64
-        return base64.b64encode(encrypted.encode()).decode()
-
-    def _decrypt(self, encrypted_text):
-        """解密文本"""
-        if not encrypted_text:
-            return ""
-        try:
-            # 从base64解码
-            decoded = base64.b64decode(encrypted_text.encode()).decode()
-            # 使用异或解密
-            return ''.join(chr(ord(c) ^ ord(self._encryption_key[i % len(self._encryption_key)]))
-                         for i, c in enumerate(decoded))
-        except:
-            return ""
+        # 检查是否需要自动登录（令牌有效时无需重新验证密码）
+        if hasattr(self, 'auto_login') and self.auto_login and self.session_user:
+            # 使用QTimer在事件循环开始后执行自动登录，确保UI已完全加载
+            QTimer.singleShot(0, self.login)
 
     def init_ui(self):
         """初始化UI"""
@@ -84,9 +77,9 @@ class LoginWindow(QDialog):
         self.password_input = QLineEdit()
         self.password_input.setPlaceholderText("请输入密码")
         self.password_input.setEchoMode(QLineEdit.Password)
-        # 设置保存的密码
-        if hasattr(self, 'saved_password') and self.saved_password:
-            self.password_input.setText(self.saved_password)
+        # 已保存登录凭据时无需输入密码
+        if self.session_user:
+            self.password_input.setPlaceholderText("已保存登录凭据，可直接登录")
         password_layout.addWidget(password_label)
         password_layout.addWidget(self.password_input)
         main_layout.addLayout(password_layout)
@@ -111,12 +104,12 @@ class LoginWindow(QDialog):
         
         # 按钮布局
         button_layout = QHBoxLayout()
-        login_button = QPushButton("登录")
-        register_button = QPushButton("注册")
-        login_button.clicked.connect(self.login)
-        register_button.clicked.connect(self.register)
-        button_layout.addWidget(login_button)
-        button_layout.addWidget(register_button)
+        self.login_button = QPushButton("登录")
+        self.register_button = QPushButton("注册")
+        self.login_button.clicked.connect(self.login)
+        self.register_button.clicked.connect(self.register)
+        button_layout.addWidget(self.login_button)
+        button_layout.addWidget(self.register_button)
         main_layout.addLayout(button_layout)
         
         # 忘记密码链接
@@ -134,19 +127,69 @@ class LoginWindow(QDialog):
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
         
+        # 未输入密码且保存的令牌有效时，直接使用令牌登录
+        if not password and self.session_user and self.session_user.username == username:
+            metrics.record('login', 0.0, 'token', user=username)
+            self._finish_login(self.session_user)
+            return
+        
         if not username or not password:
             QMessageBox.warning(self, "警告", "用户名和密码不能为空")
             return
         
-        # 验证用户登录
-        user = self.user_manager.login(username, password)
+        # 失败次数过多时不再尝试验证
+        if self._warn_if_throttled(username):
+            metrics.record('login', 0.0, 'throttled', user=username)
+            return
+        
+        # 在后台线程中验证用户登录
+        self._set_busy(True)
+        self._login_started = time.perf_counter()
+        self._worker = LoginWorker(self.user_manager, username, password, self)
+        self._worker.finished_login.connect(self._on_login_result)
+        self._worker.start()
+        
+    def _on_login_result(self, user):
+        """后台验证完成"""
+        self._set_busy(False)
+        metrics.record('login', time.perf_counter() - self._login_started,
+                       'ok' if user else 'fail', user=self._worker.username)
         if user:
-            # 保存登录配置
-            self.save_login_config()
-            self.current_user = user  # 保存当前登录用户
-            self.accept()
-        else:
+            self._finish_login(user)
+        elif not self._warn_if_throttled(self._worker.username):
             QMessageBox.critical(self, "错误", "用户名或密码错误")
+            
+    def _warn_if_throttled(self, username):
+        """登录被限流时提示剩余等待时间"""
+        wait = self.user_manager.throttle.retry_after(username)
+        if wait <= 0:
+            return False
+        QMessageBox.warning(self, "警告", f"登录失败次数过多，请在{int(wait) + 1}秒后重试")
+        return True
+            
+    def _finish_login(self, user):
+        """登录成功"""
+        self.current_user = user  # 保存当前登录用户
+        # 保存登录配置
+        self.save_login_config()
+        self.accept()
+        
+    def _set_busy(self, busy):
+        """验证期间禁用输入并显示等待状态"""
+        for widget in (self.login_button, self.register_button,
+                       self.username_input, self.password_input):
+            widget.setEnabled(not busy)
+        self.login_button.setText("登录中..." if busy else "登录")
+        if busy:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+            
+    def reject(self):
+        """关闭窗口前等待后台验证结束"""
+        if self._worker is not None and self._worker.isRunning():
+            self._worker.wait()
+        super().reject()
 
     def register(self):
         """打开注册窗口"""
@@ -192,9 +235,10 @@ class LoginWindow(QDialog):
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
                     self.saved_username = config.get('username', '')
-                    # 解密密码
-                    encrypted_password = config.get('password', '')
-                    self.saved_password = self._decrypt(encrypted_password)
+                    # 校验会话令牌（旧版本保存的密码不再使用）
+                    user = self.session_manager.verify(config.get('token', ''), self.user_manager)
+                    if user and user.username == self.saved_username:
+                        self.session_user = user
                     self.auto_login = config.get('auto_login', False)
         except Exception as e:
             print(f"加载配置文件出错: {e}")
@@ -204,14 +248,13 @@ class LoginWindow(QDialog):
         try:
             config = {}
             
-            # 如果选中了"记住密码"，保存用户名和加密后的密码
+            # 如果选中了"记住密码"，保存用户名和会话令牌（不保存密码）
             if self.remember_pwd_checkbox.isChecked():
-                config['username'] = self.username_input.text().strip()
-                # 加密密码
-                config['password'] = self._encrypt(self.password_input.text().strip())
+                config['username'] = self.current_user.username
+                config['token'] = self.session_manager.issue(self.current_user)
             else:
                 config['username'] = ''
-                config['password'] = ''
+                config['token'] = ''
                 
             # 保存自动登录设置
             config['auto_login'] = self.auto_login_checkbox.isChecked()
@@ -3,10 +3,11 @@ import sys
 import configparser
 import subprocess
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox, QPushButton, 
-                            QVBoxLayout, QWidget, QLabel, QHBoxLayout)
+                            QVBoxLayout, QWidget, QLabel, QHBoxLayout, QFileDialog)
 from PyQt5.QtCore import Qt
 from Mode.ExcelToMarkdown import ExcelToMarkdown
 from Mode.ExcelDataQuery import ExcelDataQuery
+import metrics
 
 # 检查是否需要运行add_admin.py
 def check_and_run_admin_setup():
@@ -55,6 +56,8 @@ class MainWindow(QMainWindow):
     def __init__(self, current_user=None):
         super().__init__()
         self.current_user = current_user
+        # 之后的转换和查询操作记录到当前用户名下
+        metrics.set_current_user(current_user.username if current_user else None)
         self.init_ui()
         
     def init_ui(self):
@@ -128,6 +131,13 @@ class MainWindow(QMainWindow):
         self.excel_query_btn.clicked.connect(self.open_excel_data_query)
         button_layout.addWidget(self.excel_query_btn)
         
+        # 大表预览按钮
+        self.preview_btn = QPushButton("大表预览")
+        self.preview_btn.setMinimumSize(200, 60)
+        self.preview_btn.setStyleSheet(button_style)
+        self.preview_btn.clicked.connect(self.open_sheet_preview)
+        button_layout.addWidget(self.preview_btn)
+        
         # 用户管理按钮（仅管理员可见）
         if self.current_user and self.current_user.role == 'admin':
             self.user_manage_btn = QPushButton("用户管理")
@@ -169,6 +179,22 @@ class MainWindow(QMainWindow):
         self.excel_data_query_window = ExcelDataQuery()
         self.excel_data_query_window.show()
         
+    def open_sheet_preview(self):
+        """选择文件并打开大表预览窗口"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择要预览的文件", "", "Excel文件 (*.xlsx *.xls);;CSV文件 (*.csv *.tsv);;所有文件 (*)"
+        )
+        if not file_path:
+            return
+        
+        from preview import PreviewDialog
+        try:
+            self.preview_window = PreviewDialog(file_path)
+        except Exception as e:
+            QMessageBox.warning(self, "预览失败", str(e))
+            return
+        self.preview_window.show()
+        
     def open_user_management(self):
         """打开用户管理窗口"""
         from admin import AdminWindow
@@ -194,6 +220,9 @@ def main():
     # 检查并运行管理员设置
     check_and_run_admin_setup()
     
+    # 桌面应用记录指标供管理员面板统计，与auth目录一样放在工作目录下
+    metrics.configure(os.environ.get(metrics.METRICS_DIR_ENV) or "logs")
+    
     # 启动主应用程序
     app = QApplication(sys.argv)
     
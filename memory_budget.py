@@ -0,0 +1,87 @@
+"""内存预算
+
+根据文件元数据估算整表读入内存所需的内存，超出预算时ExcelProcessor改用流式处理。
+每次降级都记录下来，调用方据此报告。
+
+预算只约束处理过程：写文件（write_markdown、to_markdown_parts、iter_markdown）和
+按块查询不会整表读入，可以保持在预算内；返回DataFrame或完整文本的操作
+（read_sheet、to_markdown），结果本身超出预算时仍然会超出，流式处理只是避免了
+整表解析时额外的开销。
+"""
+import os
+import re
+import time
+import zipfile
+import tempfile
+from typing import Dict, List, Optional
+
+# 读入为DataFrame时峰值内存相对于数据大小的放大系数（经验值）：
+# xlsx按解压后的工作表XML计算，其他格式按文件大小计算
+_EXPANSION = {'.xlsx': 2.0, '.csv': 4.0, '.tsv': 4.0, '.xls': 4.0}
+
+_SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', re.I)
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(text) -> int:
+    """解析内存大小，如 "512M"、"2G"、"1048576"（字节）"""
+    if isinstance(text, int):
+        return text
+    match = _SIZE_RE.match(str(text))
+    if match is None:
+        raise ValueError(f"无效的大小: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def estimate_memory(path: str, sheet=0) -> int:
+    """估算把工作表整体读入DataFrame的峰值内存（字节）"""
+    ext = os.path.splitext(path)[1].lower()
+    factor = _EXPANSION.get(ext, 4.0)
+    if ext == '.xlsx':
+        from reader import XlsxWorkbook
+        try:
+            with XlsxWorkbook(path) as workbook:
+                size = workbook.archive.getinfo(workbook.sheet_member(sheet)).file_size
+                if 'xl/sharedStrings.xml' in workbook.archive.namelist():
+                    size += workbook.archive.getinfo('xl/sharedStrings.xml').file_size
+        except (zipfile.BadZipFile, KeyError, ValueError):
+            size = os.path.getsize(path)
+    else:
+        size = os.path.getsize(path)
+    return int(size * factor)
+
+
+class MemoryBudget:
+    """内存预算和降级记录
+
+    Args:
+        limit: 预算（字节，或parse_size能解析的文本）
+        spill_dir: 临时文件目录，默认为系统临时目录
+    """
+
+    def __init__(self, limit, spill_dir: Optional[str] = None):
+        self.limit = parse_size(limit)
+        if self.limit <= 0:
+            raise ValueError("内存预算必须大于0")
+        self.spill_dir = spill_dir
+        self.events: List[Dict] = []
+
+    def exceeds(self, projected: int) -> bool:
+        return projected > self.limit
+
+    def degrade(self, operation: str, reason: str, file: Optional[str] = None,
+                projected: Optional[int] = None):
+        """记录一次降级"""
+        self.events.append({
+            'ts': round(time.time(), 3),
+            'operation': operation,
+            'file': file,
+            'reason': reason,
+            'projected': projected,
+            'limit': self.limit,
+        })
+
+    def spool(self):
+        """文本缓冲区：超过预算前保存在内存中，之后自动转存到临时文件"""
+        return tempfile.SpooledTemporaryFile(max_size=self.limit, mode='w+', encoding='utf-8',
+                                             newline='', dir=self.spill_dir)
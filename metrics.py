@@ -0,0 +1,282 @@
+"""应用使用情况与延迟指标
+
+每次登录、转换和查询记录一行JSON（时间、操作类型、用户、输入大小、
+耗时、结果），写入按大小轮转的本地日志文件，供管理员面板统计。
+
+指标默认关闭：调用configure(目录)，或设置环境变量EXCEL_TOOLS_METRICS_DIR
+后才会记录。每个进程写自己的文件（metrics-<pid>.jsonl），多进程转换时
+不会同时轮转同一个文件；统计时合并目录中最近的文件。
+
+进程退出后它的文件不会再被写入：超过保留天数或目录总大小超过上限时，
+从最旧的文件开始删除（每个进程首次写入和每次统计时检查）。
+"""
+import os
+import glob
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+# 指定指标目录的环境变量，子进程也能继承
+METRICS_DIR_ENV = 'EXCEL_TOOLS_METRICS_DIR'
+
+# 当前登录用户，由MainWindow设置
+_current_user = None
+_default_store = None
+_configured = False
+_store_lock = threading.Lock()
+
+
+def set_current_user(username: Optional[str]):
+    """设置之后记录的操作所属的用户"""
+    global _current_user
+    _current_user = username
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+class MetricsStore:
+    """轮转的本地指标存储
+
+    Args:
+        log_dir: 指标目录，每个进程写入其中的metrics-<pid>.jsonl
+        max_bytes: 单个文件的轮转大小
+        backup_count: 每个文件保留的轮转份数
+        retention_days: 文件最后写入超过该天数后删除
+        max_total_bytes: 目录中所有指标文件的总大小上限
+    """
+
+    def __init__(self, log_dir: str, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                 retention_days: float = 30, max_total_bytes: int = 200 * 1024 * 1024):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self._logger = None
+        self._pid = None
+
+    @property
+    def log_file(self) -> str:
+        """当前进程的指标文件"""
+        return os.path.join(self.log_dir, f"metrics-{os.getpid()}.jsonl")
+
+    def _get_logger(self) -> logging.Logger:
+        """首次写入时才创建日志目录和文件；fork出的子进程改写自己的文件"""
+        if self._logger is None or self._pid != os.getpid():
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._pid = os.getpid()
+            logger = logging.getLogger(f"excel_tools.metrics.{os.path.abspath(self.log_file)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            self.prune()
+            if not logger.handlers:
+                handler = RotatingFileHandler(self.log_file, maxBytes=self.max_bytes,
+                                              backupCount=self.backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def record(self, operation: str, duration: float, outcome: str = 'ok',
+               size: Optional[int] = None, file: Optional[str] = None, user: Optional[str] = None):
+        """记录一次操作
+
+        Args:
+            operation: 操作类型（login/conversion/query/profile）
+            duration: 耗时（秒）
+            outcome: 结果（ok/error/fail等）
+            size: 输入大小（字节）
+            file: 相关文件
+            user: 用户名，默认为当前登录用户
+        """
+        entry = {
+            'ts': round(time.time(), 3),
+            'op': operation,
+            'user': user if user is not None else _current_user,
+            'size': size,
+            'file': file,
+            'duration': round(duration, 6),
+            'outcome': outcome,
+        }
+        try:
+            self._get_logger().info(json.dumps(entry, ensure_ascii=False))
+        except OSError:
+            # 指标写入失败不影响业务操作
+            pass
+
+    @contextmanager
+    def track(self, operation: str, size: Optional[int] = None,
+              file: Optional[str] = None, user: Optional[str] = None):
+        """计时上下文，出现异常时记录为error并继续抛出"""
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self.record(operation, time.perf_counter() - start, outcome, size, file, user)
+
+    def _files(self) -> List[Tuple[str, float, int]]:
+        """目录中所有进程的指标文件（包括已轮转的文件），按最后写入时间从新到旧
+
+        Returns:
+            List[Tuple[str, float, int]]: [(路径, 修改时间, 大小), ...]
+        """
+        files = []
+        for path in glob.glob(os.path.join(glob.escape(self.log_dir), 'metrics-*.jsonl*')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # 文件恰好被轮转或删除
+                continue
+            files.append((path, stat.st_mtime, stat.st_size))
+        files.sort(key=lambda item: item[1], reverse=True)
+        return files
+
+    def prune(self) -> int:
+        """删除超过保留天数的文件，总大小仍超过上限时从最旧的文件开始删除
+
+        当前进程正在写入的文件不会删除。
+
+        Returns:
+            int: 删除的文件数
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        own_file = os.path.abspath(self.log_file)
+        removed = 0
+        total = 0
+        for path, mtime, size in self._files():
+            if os.path.abspath(path) != own_file:
+                if mtime < cutoff or total + size > self.max_total_bytes:
+                    try:
+                        os.remove(path)
+                        removed += 1
+                        continue
+                    except OSError:
+                        # Windows上其他进程仍打开着该文件
+                        pass
+            total += size
+        return removed
+
+    def load(self, since: Optional[float] = None, max_records: Optional[int] = None) -> List[Dict]:
+        """读取所有进程的记录，按时间从旧到新
+
+        Args:
+            since: 只读取该时间戳之后的记录，更早写完的文件不会打开
+            max_records: 最多返回的记录数，从最近写入的文件开始读取，够数后不再读更旧的文件
+
+        Returns:
+            List[Dict]: 记录列表
+        """
+        records = []
+        for path, mtime, _ in self._files():
+            if since is not None and mtime < since:
+                break
+            if max_records is not None and len(records) >= max_records:
+                break
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if since is None or record.get('ts', 0) >= since:
+                            records.append(record)
+            except OSError:
+                # 读取时文件恰好被轮转
+                continue
+        records.sort(key=lambda r: r.get('ts', 0))
+        if max_records is not None:
+            records = records[-max_records:]
+        return records
+
+    def summary(self, slowest: int = 10, days: Optional[float] = 7,
+                max_records: int = 200000) -> Dict:
+        """按操作类型统计延迟分位数、吞吐量和最慢的文件
+
+        Args:
+            slowest: 返回最慢的文件数
+            days: 只统计最近若干天，None表示不限
+            max_records: 最多统计的记录数（取最近的记录）
+
+        Returns:
+            Dict: {'operations': {操作类型: 统计}, 'slowest_files': [...]}
+        """
+        self.prune()
+        since = time.time() - days * 86400 if days is not None else None
+        records = self.load(since, max_records)
+        by_operation = {}
+        for record in records:
+            by_operation.setdefault(record['op'], []).append(record)
+
+        operations = {}
+        for operation, items in by_operation.items():
+            durations = sorted(r['duration'] for r in items)
+            span = max(items[-1]['ts'] - items[0]['ts'], 60)
+            operations[operation] = {
+                'count': len(items),
+                'errors': sum(1 for r in items if r['outcome'] != 'ok'),
+                'p50': _percentile(durations, 0.50),
+                'p90': _percentile(durations, 0.90),
+                'p99': _percentile(durations, 0.99),
+                'max': durations[-1],
+                'per_minute': len(items) * 60 / span,
+                'bytes': sum(r['size'] or 0 for r in items),
+            }
+
+        # 每个文件取最慢的一次
+        files = {}
+        for record in records:
+            if record.get('file') and record['duration'] > files.get(record['file'], {}).get('duration', -1):
+                files[record['file']] = record
+        slowest_files = sorted(files.values(), key=lambda r: r['duration'], reverse=True)[:slowest]
+
+        return {'operations': operations, 'slowest_files': slowest_files}
+
+
+def configure(log_dir: Optional[str], **kwargs):
+    """启用（log_dir为目录）或关闭（None）进程内共享的指标存储
+
+    其余参数传给MetricsStore。
+    """
+    global _default_store, _configured
+    with _store_lock:
+        _default_store = MetricsStore(log_dir, **kwargs) if log_dir else None
+        _configured = True
+
+
+def get_store() -> Optional[MetricsStore]:
+    """进程内共享的指标存储，未启用指标时为None"""
+    global _default_store, _configured
+    with _store_lock:
+        if not _configured:
+            log_dir = os.environ.get(METRICS_DIR_ENV)
+            _default_store = MetricsStore(log_dir) if log_dir else None
+            _configured = True
+        return _default_store
+
+
+def record(*args, **kwargs):
+    """向共享存储记录一次操作，参数同MetricsStore.record；未启用指标时忽略"""
+    store = get_store()
+    if store is not None:
+        store.record(*args, **kwargs)
+
+
+def track(*args, **kwargs):
+    """共享存储的计时上下文，参数同MetricsStore.track；未启用指标时不计时"""
+    store = get_store()
+    if store is None:
+        return nullcontext()
+    return store.track(*args, **kwargs)
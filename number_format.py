@@ -0,0 +1,443 @@
+"""Excel数字格式
+
+把单元格样式中的数字格式（numFmtId和格式代码）编译为列格式化器，一次格式化
+整列：日期时间、百分比、千位分隔符、固定小数位和科学计数法。格式代码只在编译
+时解析一次，格式化时使用pandas/NumPy的列运算，不逐个单元格调用Python代码。
+无法识别的格式（分数、条件格式等）按常规格式输出。
+"""
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 内置格式（ECMA-376 18.8.30），地区相关的日期格式统一为ISO风格
+BUILTIN_FORMATS = {
+    0: 'General', 1: '0', 2: '0.00', 3: '#,##0', 4: '#,##0.00',
+    9: '0%', 10: '0.00%', 11: '0.00E+00', 12: '# ?/?', 13: '# ??/??',
+    14: 'yyyy-mm-dd', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy',
+    18: 'h:mm AM/PM', 19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss', 22: 'yyyy-mm-dd h:mm',
+    37: '#,##0 ;(#,##0)', 38: '#,##0 ;(#,##0)', 39: '#,##0.00;(#,##0.00)', 40: '#,##0.00;(#,##0.00)',
+    45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mm:ss.0', 48: '##0.0E+0', 49: '@',
+}
+# 中文地区的内置日期格式
+for _format_id in list(range(27, 37)) + list(range(50, 59)):
+    BUILTIN_FORMATS[_format_id] = 'yyyy-mm-dd'
+
+_EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+# 去掉[Red]等颜色和[$-804]等地区标记；[h]/[mm]/[ss]保留
+_COLOR_OR_LOCALE = re.compile(r'\[(?![hms]+\])[^\]]*\]', re.I)
+_DATE_TOKENS = re.compile(
+    r'"[^"]*"|\\.|_.|\*.|\[h+\]|\[m+\]|\[s+\]|am/pm|a/p|yyyy|yy|mmmmm|mmmm|mmm|mm|m'
+    r'|dddd|ddd|dd|d|hh|h|ss|s|\.0+|.', re.I
+)
+_NUMBER_TOKENS = re.compile(r'"[^"]*"|\\.|_.|\*.|.')
+_DATE_FIELD = re.compile(r'yyyy|yy|mmmmm|mmmm|mmm|mm|m|dddd|ddd|dd|d|hh|h|ss|s|am/pm|a/p|\[[hms]+\]|\.0+')
+_THOUSANDS = re.compile(r'(\d)(?=(\d{3})+(?!\d))')
+
+
+def _split_sections(code: str) -> List[str]:
+    """按分号拆分正数;负数;零;文本各节（忽略引号和转义中的分号）"""
+    sections, current, quoted, escaped = [], '', False, False
+    for char in code:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == ';' and not quoted:
+            sections.append(current)
+            current = ''
+            continue
+        current += char
+    sections.append(current)
+    return sections
+
+
+def _literal(token: str) -> str:
+    """格式代码中的字面文本"""
+    if token.startswith('"'):
+        return token[1:-1]
+    if token.startswith('\\'):
+        return token[1:]
+    if token.startswith('_'):
+        return ' '
+    if token.startswith('*'):
+        return ''
+    return token
+
+
+def _escape(text: str) -> str:
+    return text.replace('|', '\\|')
+
+
+def general(values: pd.Series) -> pd.Series:
+    """常规格式：整数不带小数点，布尔值为TRUE/FALSE，空值为空字符串"""
+    nulls = values.isna()
+    kind = values.dtype.kind
+    if kind == 'b':
+        result = values.map({True: 'TRUE', False: 'FALSE'})
+    elif kind in 'iu':
+        result = values.astype(str)
+    elif kind == 'f':
+        numbers = values.to_numpy()
+        integral = np.isfinite(numbers) & (np.abs(numbers) < 1e15) & (numbers == np.round(numbers))
+        result = pd.Series(np.where(integral, np.where(integral, numbers, 0).astype(np.int64).astype(str),
+                                    numbers.astype(str)), index=values.index)
+    elif kind == 'M':
+        result = values.astype(str)
+    else:
+        result = values.map(_general_value).astype(object)
+        result = result.str.replace('|', '\\|', regex=False)
+        result = result.str.replace('\r\n', '<br>', regex=False).str.replace('\n', '<br>', regex=False)
+    return result.where(~nulls, '').astype(object)
+
+
+def _general_value(value) -> str:
+    # value != value 用于识别NaN/NaT
+    if value is None or value != value:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return str(value)
+
+
+def _numeric_mask(values: pd.Series) -> pd.Series:
+    """哪些单元格是数值（布尔值和文本按常规格式输出）"""
+    kind = values.dtype.kind
+    if kind in 'iuf':
+        return values.notna()
+    if kind == 'O':
+        return values.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool)
+                          and v == v)
+    return pd.Series(False, index=values.index)
+
+
+class _NumberSection:
+    """数字格式的一节，如 '"¥"#,##0.00'、'0.0%'、'0.00E+00'"""
+
+    def __init__(self, code: str):
+        tokens = _NUMBER_TOKENS.findall(code)
+        placeholders = [i for i, token in enumerate(tokens) if token in ('0', '#', '?')]
+        self.valid = '/' not in tokens
+        if not placeholders:
+            # 只有文本（如 "-"），数值整体替换为该文本
+            self.prefix = ''.join(_literal(t) for t in tokens if t != '%')
+            self.suffix = ''
+            self.constant = True
+            self.percent = 0
+            return
+        self.constant = False
+        first, last = placeholders[0], placeholders[-1]
+        body = tokens[first:last + 1]
+        self.prefix = ''.join(_literal(t) for t in tokens[:first])
+        # 数字部分紧跟的逗号表示按千缩放
+        tail = tokens[last + 1:]
+        self.scale = 0
+        while tail and tail[0] == ',':
+            self.scale += 1
+            tail = tail[1:]
+        self.suffix = ''.join(_literal(t) for t in tail)
+        self.percent = sum(1 for t in tokens if t == '%')
+
+        self.scientific = 'e' in [t.lower() for t in body]
+        if self.scientific:
+            e = [t.lower() for t in body].index('e')
+            mantissa, exponent = body[:e], body[e + 1:]
+            self.exponent_sign = exponent[0] == '+' if exponent and exponent[0] in '+-' else False
+            self.exponent_digits = sum(1 for t in exponent if t in ('0', '#', '?')) or 1
+            body = mantissa
+
+        if '.' in body:
+            point = body.index('.')
+            integer, fraction = body[:point], body[point + 1:]
+        else:
+            integer, fraction = body, []
+        self.thousands = ',' in integer
+        self.min_integer = sum(1 for t in integer if t == '0')
+        self.decimals = sum(1 for t in fraction if t in ('0', '#', '?'))
+        self.min_decimals = len(''.join(t for t in fraction if t in ('0', '#', '?')).rstrip('#?'))
+
+    def format(self, numbers: np.ndarray) -> np.ndarray:
+        """格式化非负数值（符号由调用方处理）"""
+        if self.constant:
+            return np.full(len(numbers), _escape(self.prefix), dtype=object)
+        numbers = numbers * (100 ** self.percent) / (1000 ** self.scale)
+        if self.scientific:
+            text = self._scientific(numbers)
+        else:
+            text = self._fixed(numbers, self.decimals)
+        return (_escape(self.prefix) + pd.Series(text, dtype=object) + _escape(self.suffix)).to_numpy()
+
+    def _fixed(self, numbers: np.ndarray, decimals: int) -> np.ndarray:
+        factor = 10 ** decimals
+        # 与Excel一致四舍五入（而不是银行家舍入），先消除1.005*100这类浮点误差
+        scaled = np.floor(np.round(numbers * factor, 6) + 0.5)
+        # 超出int64范围的值逐个格式化，其余值仍按整列处理
+        big = scaled >= 2 ** 62
+        if big.any():
+            text = np.empty(len(numbers), dtype=object)
+            text[big] = [self._fixed_one(value) for value in numbers[big]]
+            if not big.all():
+                text[~big] = self._fixed(numbers[~big], decimals)
+            return text
+        scaled = scaled.astype(np.int64)
+        whole = pd.Series(scaled // factor).astype(str)
+        if self.min_integer > 1:
+            whole = whole.str.zfill(self.min_integer)
+        elif self.min_integer == 0:
+            whole = whole.where(whole != '0', '')
+        if self.thousands:
+            whole = whole.str.replace(_THOUSANDS, r'\1,', regex=True)
+        if not decimals:
+            return whole.to_numpy()
+        fraction = pd.Series(scaled % factor).astype(str).str.zfill(decimals)
+        if self.min_decimals < decimals:
+            # '#'位的末尾零不显示
+            fraction = fraction.str.replace(r'0+$', '', regex=True)
+            fraction = fraction.str.pad(self.min_decimals, side='right', fillchar='0')
+            return np.where(fraction == '', whole, whole + '.' + fraction)
+        return (whole + '.' + fraction).to_numpy()
+
+    def _fixed_one(self, value: float) -> str:
+        # 这么大的浮点数没有小数部分，只需按最少小数位补零
+        text = f"{value:,.0f}" if self.thousands else f"{value:.0f}"
+        if self.min_decimals:
+            text += '.' + '0' * self.min_decimals
+        return text
+
+    def _scientific(self, numbers: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exponent = np.where(numbers > 0, np.floor(np.log10(numbers)), 0).astype(np.int64)
+            mantissa = numbers / np.power(10.0, exponent)
+        # 舍入后尾数可能变为10
+        rounded = np.round(mantissa, self.decimals)
+        carry = rounded >= 10
+        mantissa = np.where(carry, mantissa / 10, mantissa)
+        exponent = exponent + carry
+        text = pd.Series(self._fixed(mantissa, self.decimals), dtype=object)
+        sign = np.where(exponent < 0, '-', '+' if self.exponent_sign else '')
+        digits = pd.Series(np.abs(exponent)).astype(str).str.zfill(self.exponent_digits)
+        return (text + 'E' + sign + digits).to_numpy()
+
+
+class _DateSection:
+    """日期时间格式的一节，如 'yyyy"年"m"月"d"日"'、'h:mm AM/PM'、'[h]:mm:ss'"""
+
+    def __init__(self, code: str):
+        tokens = _DATE_TOKENS.findall(code)
+        lowered = [t.lower() for t in tokens]
+        self.ampm = any(t in ('am/pm', 'a/p') for t in lowered)
+        kinds = []
+        for i, token in enumerate(lowered):
+            if token in ('m', 'mm'):
+                # 紧跟小时之后或紧挨秒之前的m表示分钟
+                before = next((k for k in reversed(kinds) if k != 'lit'), None)
+                after = next((t for t in lowered[i + 1:] if _DATE_FIELD.fullmatch(t)), '')
+                if before in ('h', 'hh', '[h]') or after.lstrip('[').startswith('s'):
+                    kinds.append('minute' + token)
+                    continue
+            if re.fullmatch(r'yyyy|yy|mmmmm|mmmm|mmm|mm|m|dddd|ddd|dd|d|hh|h|ss|s|am/pm|a/p', token):
+                kinds.append(token)
+            elif re.fullmatch(r'\[h+\]', token):
+                kinds.append('[h]')
+            elif re.fullmatch(r'\[m+\]', token):
+                kinds.append('[m]')
+            elif re.fullmatch(r'\[s+\]', token):
+                kinds.append('[s]')
+            elif re.fullmatch(r'\.0+', token):
+                kinds.append('fraction')
+            else:
+                kinds.append('lit')
+        self.parts = list(zip(kinds, tokens))
+        self.rounds_seconds = not any(kind == 'fraction' for kind in kinds)
+
+    def format(self, stamps: pd.Series) -> np.ndarray:
+        """格式化datetime64列"""
+        if self.rounds_seconds:
+            stamps = stamps.dt.round('s')
+        dt = stamps.dt
+        hour = dt.hour
+        if self.ampm:
+            hour12 = hour % 12
+            hour = hour12.where(hour12 != 0, 12)
+        elapsed = (stamps - _EXCEL_EPOCH).dt.total_seconds()
+
+        result = pd.Series('', index=stamps.index, dtype=object)
+        for kind, token in self.parts:
+            if kind == 'lit':
+                piece = _escape(_literal(token))
+            elif kind == 'yyyy':
+                piece = dt.year.astype(str).str.zfill(4)
+            elif kind == 'yy':
+                piece = (dt.year % 100).astype(str).str.zfill(2)
+            elif kind == 'mmmmm':
+                piece = dt.month_name().str[:1]
+            elif kind == 'mmmm':
+                piece = dt.month_name()
+            elif kind == 'mmm':
+                piece = dt.month_name().str[:3]
+            elif kind == 'mm':
+                piece = dt.month.astype(str).str.zfill(2)
+            elif kind == 'm':
+                piece = dt.month.astype(str)
+            elif kind == 'dddd':
+                piece = dt.day_name()
+            elif kind == 'ddd':
+                piece = dt.day_name().str[:3]
+            elif kind == 'dd':
+                piece = dt.day.astype(str).str.zfill(2)
+            elif kind == 'd':
+                piece = dt.day.astype(str)
+            elif kind == 'hh':
+                piece = hour.astype(str).str.zfill(2)
+            elif kind == 'h':
+                piece = hour.astype(str)
+            elif kind == 'minutemm':
+                piece = dt.minute.astype(str).str.zfill(2)
+            elif kind == 'minutem':
+                piece = dt.minute.astype(str)
+            elif kind == 'ss':
+                piece = dt.second.astype(str).str.zfill(2)
+            elif kind == 's':
+                piece = dt.second.astype(str)
+            elif kind in ('am/pm', 'a/p'):
+                am, pm = ('AM', 'PM') if kind == 'am/pm' else ('A', 'P')
+                piece = pd.Series(np.where(dt.hour < 12, am, pm), index=stamps.index)
+            elif kind == '[h]':
+                piece = (elapsed // 3600).astype(np.int64).astype(str)
+            elif kind == '[m]':
+                piece = (elapsed // 60).astype(np.int64).astype(str)
+            elif kind == '[s]':
+                piece = elapsed.round().astype(np.int64).astype(str)
+            else:  # fraction
+                digits = len(token) - 1
+                piece = '.' + (dt.microsecond // 10 ** (6 - digits)).astype(str).str.zfill(digits)
+            result = result + piece
+        return result.to_numpy()
+
+
+def _to_timestamps(values: pd.Series) -> pd.Series:
+    """把日期时间、时间对象或日期序列号统一为datetime64列，无法转换的为NaT"""
+    kind = values.dtype.kind
+    if kind == 'M':
+        return values
+    if kind in 'iuf':
+        return _EXCEL_EPOCH + pd.to_timedelta(values, unit='D')
+
+    def convert(value):
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        if isinstance(value, time):
+            # 只有时间的值以1899-12-30为日期，与Excel的序列号一致
+            return datetime.combine(_EXCEL_EPOCH.date(), value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            return _EXCEL_EPOCH + pd.to_timedelta(value, unit='D')
+        return None
+
+    return pd.to_datetime(values.map(convert), errors='coerce')
+
+
+class ColumnFormatter:
+    """编译后的列格式化器"""
+
+    def __init__(self, code: Optional[str]):
+        self.code = code or 'General'
+        self.kind = 'general'
+        sections = [_COLOR_OR_LOCALE.sub('', section) for section in _split_sections(self.code)]
+        if any(re.search(r'\[[<>=]', section) for section in _split_sections(self.code)):
+            return  # 条件格式按常规格式输出
+        first = sections[0]
+        if first.strip().lower() in ('general', ''):
+            return
+        stripped = re.sub(r'"[^"]*"|\\.', '', first).lower()
+        if 'general' in stripped:
+            return
+        if '@' in stripped:
+            self.kind = 'text'
+            tokens = _NUMBER_TOKENS.findall(first)
+            at = tokens.index('@')
+            self.text_prefix = ''.join(_literal(t) for t in tokens[:at])
+            self.text_suffix = ''.join(_literal(t) for t in tokens[at + 1:])
+            return
+        if re.search(r'[ymdhs]', re.sub(r'e[+-]', '', stripped)):
+            self.kind = 'date'
+            self.date = _DateSection(first)
+            return
+
+        self.sections = [_NumberSection(section) for section in sections[:3]]
+        if all(section.valid for section in self.sections):
+            self.kind = 'number'
+
+    def format(self, values: pd.Series) -> pd.Series:
+        """格式化一列，返回字符串列（空值为空字符串）"""
+        if self.kind == 'general':
+            return general(values)
+        if self.kind == 'text':
+            result = general(values)
+            filled = values.notna()
+            return result.where(~filled, _escape(self.text_prefix) + result + _escape(self.text_suffix))
+        if self.kind == 'date':
+            return self._format_dates(values)
+        return self._format_numbers(values)
+
+    def _format_dates(self, values: pd.Series) -> pd.Series:
+        stamps = _to_timestamps(values)
+        valid = stamps.notna()
+        result = general(values)
+        if valid.any():
+            result = result.copy()
+            result[valid] = self.date.format(stamps[valid])
+        return result
+
+    def _format_numbers(self, values: pd.Series) -> pd.Series:
+        result = general(values)
+        mask = _numeric_mask(values)
+        if not mask.any():
+            return result
+        result = result.copy()
+        numbers = pd.to_numeric(values[mask], errors='coerce').to_numpy(dtype=float)
+        positive, negative, zero = (self.sections + [None, None])[:3]
+
+        text = np.empty(len(numbers), dtype=object)
+        negatives = numbers < 0
+        if negative is None:
+            # 只有一节时负数加负号
+            text[:] = positive.format(np.abs(numbers))
+            text[negatives] = '-' + text[negatives]
+        else:
+            text[~negatives] = positive.format(numbers[~negatives])
+            text[negatives] = negative.format(-numbers[negatives])
+            if zero is not None:
+                zeros = numbers == 0
+                text[zeros] = zero.format(numbers[zeros])
+        result[mask] = text
+        return result
+
+
+@lru_cache(maxsize=256)
+def compile_format(format_id: int = 0, format_code: Optional[str] = None) -> ColumnFormatter:
+    """编译数字格式（相同格式只编译一次）
+
+    Args:
+        format_id: 样式中的numFmtId
+        format_code: 自定义格式代码，为None时使用内置格式
+    """
+    return ColumnFormatter(format_code if format_code else BUILTIN_FORMATS.get(format_id, 'General'))
+
+
+def render_markdown_lines(columns: List[pd.Series]) -> List[str]:
+    """把已格式化的字符串列按行拼接为Markdown表格行"""
+    if not columns:
+        return []
+    line = '| ' + columns[0]
+    for column in columns[1:]:
+        line = line + ' | ' + column
+    return (line + ' |\n').tolist()
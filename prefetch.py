@@ -0,0 +1,191 @@
+"""批量转换的预读取
+
+共享目录（SMB/NFS）上的文件读取很慢，逐个"读取-解析"时网络和CPU轮流空闲。
+Prefetcher在后台用有界线程池把接下来的文件复制到本地临时目录，当前文件解析的同时
+读取后面的文件；同时持有的文件数和字节数都有上限。各阶段的吞吐量由PipelineStats统计。
+"""
+import os
+import time
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class StageStats:
+    """单个阶段的计数：文件数、字节数、累计处理时间和首尾时间"""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.busy = 0.0
+        self.first = None
+        self.last = None
+
+    def add(self, size: int, start: float, end: float):
+        self.files += 1
+        self.bytes += size
+        self.busy += end - start
+        self.first = start if self.first is None else min(self.first, start)
+        self.last = end if self.last is None else max(self.last, end)
+
+    def summary(self) -> Dict:
+        wall = (self.last - self.first) if self.files else 0.0
+        return {
+            'files': self.files,
+            'bytes': self.bytes,
+            'busy_seconds': round(self.busy, 4),
+            'wall_seconds': round(wall, 4),
+            'mb_per_second': round(self.bytes / wall / (1024 * 1024), 2) if wall > 0 else None,
+        }
+
+
+class PipelineStats:
+    """预读取流水线的统计：fetch（读取到本地）、parse（转换）和等待时间"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {'fetch': StageStats(), 'parse': StageStats()}
+        # 转换阶段等待预读取的累计时间，较大时说明瓶颈在读取
+        self.wait = 0.0
+
+    def add(self, stage: str, size: int, start: float, end: float):
+        with self._lock:
+            self.stages[stage].add(size, start, end)
+
+    def add_wait(self, seconds: float):
+        with self._lock:
+            self.wait += seconds
+
+    def summary(self) -> Dict:
+        with self._lock:
+            result = {name: stage.summary() for name, stage in self.stages.items()}
+            result['wait_seconds'] = round(self.wait, 4)
+            return result
+
+
+class PrefetchedFile:
+    """已读取到本地的文件"""
+
+    def __init__(self, source: str, path: Optional[str], size: int, error: Optional[str] = None):
+        self.source = source  # 原始路径
+        self.path = path  # 本地副本路径，读取失败时为None
+        self.size = size
+        self.error = error
+        self._released = False
+
+
+class Prefetcher:
+    """按顺序产生预读到本地的文件
+
+    Args:
+        paths: 原始文件路径
+        depth: 同时持有的本地副本数（包括正在转换的），达到后暂停读取
+        max_bytes: 同时持有的本地副本总字节数上限；单个文件超过上限时等其他副本释放后单独读取
+        threads: 读取线程数
+        spool_dir: 本地临时目录，默认为系统临时目录
+        block_size: 每次读取的字节数
+
+    使用完每个文件后调用release删除本地副本并释放额度；close停止读取并清理。
+    """
+
+    def __init__(self, paths: Iterable[str], depth: int = 4, max_bytes: int = 512 * 1024 * 1024,
+                 threads: int = 2, spool_dir: Optional[str] = None, block_size: int = 1024 * 1024):
+        if depth < 1:
+            raise ValueError("depth必须大于0")
+        self.paths = list(paths)
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.stats = PipelineStats()
+        self._spool = tempfile.mkdtemp(prefix='prefetch_', dir=spool_dir)
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._ready = queue.Queue()  # 按顺序排列的Future，末尾为None
+        self._condition = threading.Condition()
+        self._held_files = 0
+        self._held_bytes = 0
+        self._closed = False
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    def _reserve(self, size: int) -> bool:
+        """等待额度，关闭时返回False"""
+        with self._condition:
+            while not self._closed and (
+                    self._held_files >= self.depth or
+                    (self._held_files and self._held_bytes + size > self.max_bytes)):
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._held_files += 1
+            self._held_bytes += size
+            return True
+
+    def _feed(self):
+        """按顺序提交读取任务，额度用完时等待"""
+        try:
+            for index, source in enumerate(self.paths):
+                try:
+                    size = os.path.getsize(source)
+                except OSError:
+                    size = 0
+                if not self._reserve(size):
+                    return
+                self._ready.put(self._executor.submit(self._fetch, index, source, size))
+        finally:
+            self._ready.put(None)
+
+    def _fetch(self, index: int, source: str, size: int) -> PrefetchedFile:
+        """把文件复制到本地临时目录（保留文件名，输出文件按文件名命名）"""
+        start = time.perf_counter()
+        directory = os.path.join(self._spool, str(index))
+        target = os.path.join(directory, os.path.basename(source))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, self.block_size)
+        except OSError as e:
+            shutil.rmtree(directory, ignore_errors=True)
+            return PrefetchedFile(source, None, size, f"读取失败: {str(e)}")
+        self.stats.add('fetch', size, start, time.perf_counter())
+        return PrefetchedFile(source, target, size)
+
+    def __iter__(self) -> Iterator[PrefetchedFile]:
+        while True:
+            # 队列为空说明额度已满（转换跟不上），不计入等待读取的时间
+            future = self._ready.get()
+            if future is None:
+                return
+            start = time.perf_counter()
+            item = future.result()
+            self.stats.add_wait(time.perf_counter() - start)
+            yield item
+
+    def release(self, item: PrefetchedFile):
+        """删除本地副本并释放额度（可在任意线程调用，重复调用无效果）"""
+        with self._condition:
+            if item._released:
+                return
+            item._released = True
+            self._held_files -= 1
+            self._held_bytes -= item.size
+            self._condition.notify_all()
+        if item.path is not None:
+            shutil.rmtree(os.path.dirname(item.path), ignore_errors=True)
+
+    def close(self):
+        """停止读取并删除所有本地副本"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._feeder.join()
+        self._executor.shutdown(wait=True)
+        shutil.rmtree(self._spool, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
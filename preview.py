@@ -0,0 +1,316 @@
+"""大表预览
+
+SheetTableModel只保存最近访问的若干页数据：滚动到底部时由视图通过
+canFetchMore/fetchMore按页加载，页在后台线程中读取，读完后才在界面线程中
+插入行，界面线程从不等待读取；后台线程同时预取相邻页，远离当前位置的页被淘汰，
+再次滚动回去时重新读取。内存和界面响应时间与表的大小无关。
+"""
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from Action import ExcelProcessor
+
+
+class SheetPager:
+    """按页读取工作表
+
+    xlsx和CSV/TSV文件由流式读取层逐行读取，顺序翻页时沿用读取迭代器，只有跳回已淘汰的页时
+    才从文件开头重新解析；保留多个迭代器，重新读取前面的页不会打断向后的加载。
+    Arrow输入直接切片；其他格式一次读入后切片。
+    """
+
+    def __init__(self, processor: ExcelProcessor, sheet_name=0, page_size: int = 1000,
+                 max_cursors: int = 2):
+        self.processor = processor
+        self.sheet_name = sheet_name
+        self.page_size = page_size
+        self.exhausted = False
+        self.total_rows = None  # 读到末尾后才知道
+        self._lock = threading.Lock()
+        self.max_cursors = max_cursors
+        self._cursors = OrderedDict()  # 下一页序号 -> 行迭代器，按使用先后排列
+        self._frame = None
+
+        if processor.arrow_table is not None:
+            self.names = processor.arrow_table.column_names
+            self.total_rows = processor.arrow_table.num_rows
+        elif processor.file_path.lower().endswith(('.xlsx', '.csv', '.tsv')):
+            self.names, records = self._open(0)
+            self._cursors[0] = records
+        else:
+            self._frame = processor.read_sheet(sheet_name)
+            self.names = [str(name) for name in self._frame.columns]
+            self.total_rows = len(self._frame)
+
+    def _open(self, index: int):
+        return self.processor._iter_records(self.sheet_name, rows=(index * self.page_size + 1, None))
+
+    def page(self, index: int) -> list:
+        """读取第index页（从0开始）的行，每行为值列表"""
+        start = index * self.page_size
+        with self._lock:
+            if self.processor.arrow_table is not None:
+                import arrow_io
+                table = self.processor.arrow_table.slice(start, self.page_size)
+                return [list(record) for record in arrow_io.iter_records(table)]
+            if self._frame is not None:
+                return [list(record) for record in
+                        self._frame.iloc[start:start + self.page_size].itertuples(index=False, name=None)]
+
+            records = self._cursors.pop(index, None)
+            if records is None:
+                while len(self._cursors) >= self.max_cursors:
+                    self._cursors.popitem(last=False)[1].close()
+                records = self._open(index)[1]
+            rows = [record for _, record in itertools.islice(records, self.page_size)]
+            self._cursors[index + 1] = records
+            if len(rows) < self.page_size:
+                self.exhausted = True
+                self.total_rows = start + len(rows)
+            return rows
+
+    def close(self):
+        """关闭所有读取迭代器（同时关闭工作簿文件）"""
+        while self._cursors:
+            self._cursors.popitem()[1].close()
+
+
+class SheetTableModel(QAbstractTableModel):
+    """按需分页加载的表格模型"""
+
+    # 后台线程加载完一页或加载失败后发出（跨线程信号，在界面线程中处理）
+    page_loaded = pyqtSignal(int, object)
+    page_failed = pyqtSignal(int, str)
+    # fetchMore请求的页不在缓存中、开始后台加载时发出，参数为该页第一行的行号（从0开始）
+    fetch_started = pyqtSignal(int)
+    load_failed = pyqtSignal(str)
+    # 所有行都已加载，参数为总行数
+    all_loaded = pyqtSignal(int)
+
+    def __init__(self, pager: SheetPager, max_pages: int = 20, prefetch: int = 2, parent=None):
+        super().__init__(parent)
+        self.pager = pager
+        self.page_size = pager.page_size
+        self.max_pages = max(max_pages, prefetch * 2 + 1)
+        self.prefetch = prefetch
+        self._pages = {}  # 页序号 -> 行列表
+        self._pending = {}  # 页序号 -> Future
+        self._lock = threading.Lock()
+        self._focus = 0  # 最近访问的页，淘汰时保留其附近的页
+        self._loaded_rows = 0
+        self._finished = False
+        self._fetching = None  # fetchMore正在等待的页
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.page_loaded.connect(self._on_page_loaded)
+        self.page_failed.connect(self._on_page_failed)
+
+    def close(self):
+        """停止后台加载并释放读取器"""
+        self._executor.shutdown(wait=True)
+        with self.pager._lock:
+            self.pager.close()
+
+    # ---- 分页缓存 ----
+
+    def _load(self, index: int):
+        """在后台线程中读取一页"""
+        try:
+            try:
+                rows = self.pager.page(index)
+            except Exception as e:
+                self.page_failed.emit(index, str(e))
+                raise
+            with self._lock:
+                self._pages[index] = rows
+                self._evict()
+            self.page_loaded.emit(index, rows)
+            return rows
+        finally:
+            with self._lock:
+                self._pending.pop(index, None)
+
+    def _evict(self):
+        """淘汰离当前位置最远的页（调用方持有锁）"""
+        while len(self._pages) > self.max_pages:
+            farthest = max(self._pages, key=lambda page: abs(page - self._focus))
+            del self._pages[farthest]
+
+    def _request(self, index: int):
+        """提交一页的后台加载，已缓存或正在加载时不重复提交"""
+        with self._lock:
+            if index < 0 or index in self._pages:
+                return None
+            future = self._pending.get(index)
+            if future is None:
+                future = self._executor.submit(self._load, index)
+                self._pending[index] = future
+            return future
+
+    def _prefetch(self, index: int, backward: bool = False):
+        """预取之后的页；backward为True时同时预取之前的页（滚动回已淘汰的区域时）"""
+        for offset in range(1, self.prefetch + 1):
+            total = self.pager.total_rows
+            if total is None or (index + offset) * self.page_size < total:
+                self._request(index + offset)
+            if backward:
+                self._request(index - offset)
+
+    def _on_page_loaded(self, index: int, rows: list):
+        """插入fetchMore等待的页，或刷新已显示范围内重新加载的页"""
+        if index == self._fetching:
+            self._fetching = None
+            self._append(index, rows)
+            return
+        first = index * self.page_size
+        if first >= self._loaded_rows:
+            return
+        last = min(first + self.page_size, self._loaded_rows) - 1
+        self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+    # ---- QAbstractTableModel接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.pager.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        page, offset = divmod(index.row(), self.page_size)
+        with self._lock:
+            self._focus = page
+            rows = self._pages.get(page)
+        if rows is None:
+            # 已被淘汰，后台重新读取，加载完成后刷新
+            self._request(page)
+            self._prefetch(page, backward=True)
+            return "…" if role == Qt.DisplayRole else None
+        value = rows[offset][index.column()]
+        # value != value 用于识别NaN/NaT
+        if value is None or value != value:
+            return ''
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.pager.names[section] if section < len(self.pager.names) else None
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._finished
+
+    def _on_page_failed(self, index: int, error: str):
+        """fetchMore等待的页读取失败时停止加载；预取失败的页之后会重新读取"""
+        if index == self._fetching:
+            self._fetching = None
+            self._finished = True
+            self.load_failed.emit(f"读取失败: {error}")
+
+    def fetchMore(self, parent=QModelIndex()):
+        """加载下一页：已预取时直接插入，否则提交后台加载，读完后由_on_page_loaded插入"""
+        if parent.isValid() or self._finished or self._fetching is not None:
+            return
+        index = self._loaded_rows // self.page_size
+        with self._lock:
+            rows = self._pages.get(index)
+        if rows is None:
+            self._fetching = index
+            if self._request(index) is not None:
+                self.fetch_started.emit(index * self.page_size)
+                return
+            # 提交前后台线程恰好加载完成
+            self._fetching = None
+            with self._lock:
+                rows = self._pages.get(index, [])
+        self._append(index, rows)
+
+    def _append(self, index: int, rows: list):
+        """把第index页插入到已加载的行之后，并预取之后的页"""
+        self._finished = len(rows) < self.page_size
+        if rows:
+            self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + len(rows) - 1)
+            self._loaded_rows += len(rows)
+            self.endInsertRows()
+        if self._finished:
+            self.all_loaded.emit(self._loaded_rows)
+        else:
+            self._focus = index
+            self._prefetch(index)
+
+    def loaded_rows(self) -> int:
+        return self._loaded_rows
+
+    def is_fetching(self) -> bool:
+        """是否正在后台加载下一页"""
+        return self._fetching is not None
+
+    def cached_pages(self) -> int:
+        with self._lock:
+            return len(self._pages)
+
+
+class PreviewDialog(QDialog):
+    """大表预览窗口，滚动到底部时自动加载更多行"""
+
+    def __init__(self, source, sheet_name=0, page_size=1000, parent=None):
+        """
+        Args:
+            source: 文件路径或已设置输入的ExcelProcessor
+            sheet_name: 工作表名称或序号
+            page_size: 每页的行数
+        """
+        super().__init__(parent)
+        if isinstance(source, ExcelProcessor):
+            processor = source
+        else:
+            processor = ExcelProcessor()
+            processor.set_file(source)
+        self.processor = processor
+        self.model = SheetTableModel(SheetPager(processor, sheet_name, page_size), parent=self)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置UI界面"""
+        self.setWindowTitle(f"预览 - {self.processor.get_file_info()['name']}")
+        self.resize(900, 600)
+
+        layout = QVBoxLayout()
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        # 固定行高，避免视图为计算行高访问所有行
+        self.table_view.verticalHeader().setDefaultSectionSize(24)
+        self.table_view.verticalHeader().setSectionResizeMode(self.table_view.verticalHeader().Fixed)
+        layout.addWidget(self.table_view)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+        self.model.rowsInserted.connect(self.update_status)
+        self.model.all_loaded.connect(self.update_status)
+        self.model.fetch_started.connect(self.update_status)
+        self.model.load_failed.connect(self.status_label.setText)
+        self.update_status()
+
+    def update_status(self, *args):
+        loaded = self.model.loaded_rows()
+        if self.model.is_fetching():
+            self.status_label.setText(f"已加载 {loaded} 行，正在读取第 {loaded + 1} 行起的 "
+                                      f"{self.model.page_size} 行…")
+        elif self.model.canFetchMore():
+            self.status_label.setText(f"已加载 {loaded} 行，滚动到底部加载更多")
+        else:
+            self.status_label.setText(f"共 {loaded} 行")
+
+    def done(self, result):
+        self.model.close()
+        super().done(result)
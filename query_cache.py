@@ -0,0 +1,103 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+# 引号内的字符串原样保留，其余部分折叠空白
+_QUOTED = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|`[^`]*`)')
+
+
+def normalize_query(expression: str) -> str:
+    """规范化查询表达式，使仅空白不同的查询命中同一缓存项"""
+    parts = _QUOTED.split(expression.strip())
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts))
+
+
+def _result_size(result) -> int:
+    """估算查询结果占用的内存（字节）"""
+    try:
+        return int(result.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return 0
+
+
+class QueryCache:
+    """查询结果缓存
+
+    键由规范化后的查询、文件标识（路径、大小、修改时间，可选内容哈希）
+    和工作表组成；按结果占用的内存做LRU淘汰。文件发生变化时由
+    ExcelProcessor._update_file_info调用invalidate清除对应条目。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, use_hash: bool = False):
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+        self._entries = OrderedDict()  # key: (result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(expression: str, identity: Tuple, sheet: Hashable) -> Tuple:
+        return (normalize_query(expression), identity, sheet)
+
+    def get(self, key: Tuple):
+        """读取缓存结果，未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # 返回副本，调用方原地修改结果不会影响缓存
+            return entry[0].copy()
+
+    def put(self, key: Tuple, result):
+        """写入缓存，超出内存上限时淘汰最久未使用的结果
+
+        缓存保存result的副本，调用方之后修改result不会影响缓存。
+        """
+        size = _result_size(result)
+        if size > self.max_bytes:
+            return
+        result = result.copy()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, path: Optional[str] = None):
+        """清除某个文件的所有缓存结果；path为None时清空缓存"""
+        with self._lock:
+            if path is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if key[1][0] == path]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(keys)
+
+    def stats(self) -> Dict:
+        """命中率等统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,795 @@
+"""工作表读取层
+
+xlsx文件直接流式解析工作表XML，不经过openpyxl，也不构建完整的DataFrame：
+列投影和行范围在解析时下推，不需要的单元格不会被解码，读到行范围末尾
+即停止解析。很大的工作表可以按行边界切块，由多个进程并行解码。
+xls文件交给pandas（usecols/skiprows/nrows）。
+CSV/TSV文件自动探测编码和分隔符，流式处理时按块读取，整表读取时
+优先使用pyarrow的多线程解析。
+"""
+import os
+import re
+import csv
+import html
+import codecs
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_M = f'{{{NS_MAIN}}}'
+_TEXT = _M + 't'
+
+# 工作表XML的正则扫描（元素可能带有命名空间前缀）
+_SHEET_DATA_RE = re.compile(r'<(\w+:)?sheetData\b')
+_ROW_RE = re.compile(r'<(?:\w+:)?row\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?row>)', re.S)
+_ROW_NUMBER_RE = re.compile(r'\br="(\d+)"')
+_CELL_RE = re.compile(r'<(?:\w+:)?c\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?c>)', re.S)
+_CELL_REF_RE = re.compile(r'\br="([A-Z]+)')
+_ATTR_RE = re.compile(r'\b([ts])="([^"]*)"')
+_STYLE_RE = re.compile(r'\bs="(\d+)"')
+# 列选择中的列字母和列字母范围（只接受大写）
+_LETTERS_RE = re.compile(r'[A-Z]{1,3}')
+_LETTER_RANGE_RE = re.compile(r'[A-Z]{1,3}:[A-Z]{1,3}')
+_V_RE = re.compile(r'<(?:\w+:)?v>(.*?)</(?:\w+:)?v>', re.S)
+_T_RE = re.compile(r'<(?:\w+:)?t\b[^>]*>(.*?)</(?:\w+:)?t>', re.S)
+
+# 内置的日期/时间数字格式编号
+_DATE_FORMAT_IDS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+_TIME_FORMAT_IDS = {18, 19, 20, 21, 45, 46, 47}
+# 去掉格式代码中的引号文本、转义字符和[颜色]/[条件]部分后再判断
+_FORMAT_LITERALS = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+
+CSV_EXTENSIONS = ('.csv', '.tsv')
+
+# 工作表XML（解压后）小于该大小时即使指定了多个进程也在当前进程解码，
+# 启动进程和传递共享字符串的开销超过并行的收益
+PARALLEL_MIN_SIZE = 16 * 1024 * 1024
+
+ColumnSpec = Union[str, int]
+
+
+def _unescape(text: str) -> str:
+    return html.unescape(text) if '&' in text else text
+
+
+def column_index(letters: str) -> int:
+    """列字母转为从0开始的序号（A -> 0）"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def column_letter(index: int) -> str:
+    """从0开始的序号转为列字母（0 -> A）"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def parse_columns(spec: Union[str, Sequence[ColumnSpec], None]) -> Optional[List[ColumnSpec]]:
+    """解析列选择
+
+    支持 "A,C,F"、"A:C,F" 这样的列字母（大写），也可以是列名或从0开始的序号组成的列表。
+    文本在读到表头后由_resolve_columns解析：与表头中的列名相同时按列名处理，
+    否则才按列字母处理，表头中的"ID"、"SKU"这样的列名不会被当作列字母。
+    """
+    if spec is None:
+        return None
+    items = spec.split(',') if isinstance(spec, str) else list(spec)
+    columns = []
+    for item in items:
+        if isinstance(item, int):
+            columns.append(item)
+            continue
+        item = str(item).strip()
+        if item:
+            columns.append(item)
+    return columns
+
+
+def parse_rows(spec: Union[str, Tuple[int, Optional[int]], None]) -> Optional[Tuple[int, Optional[int]]]:
+    """解析行范围
+
+    行号从1开始、不含表头，首尾都包含。支持 "100-200"、"100-"、"-50" 或 (首行, 末行)。
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        first, _, last = spec.partition('-')
+        if not _:
+            last = first
+        spec = (int(first) if first.strip() else 1, int(last) if last.strip() else None)
+    first, last = spec
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"无效的行范围: {spec}")
+    return first, last
+
+
+def is_date_format(format_id: int, format_code: Optional[str]) -> bool:
+    """数字格式是否表示日期/时间"""
+    if format_id in _DATE_FORMAT_IDS:
+        return True
+    if not format_code:
+        return False
+    code = _FORMAT_LITERALS.sub('', format_code.split(';')[0]).lower()
+    return any(char in code for char in 'dmyhs') and 'general' not in code
+
+
+class XlsxWorkbook:
+    """xlsx工作簿的流式读取器"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.sheets = self._read_sheets()  # [(工作表名称, 压缩包内路径)]
+        self.date1904 = False
+        self._shared_strings = None
+        self._cell_formats = None  # 样式序号 -> (numFmtId, 格式代码)
+        self._date_styles = None  # 日期样式序号集合
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_sheets(self) -> List[Tuple[str, str]]:
+        workbook = ET.fromstring(self.archive.read('xl/workbook.xml'))
+        rels = ET.fromstring(self.archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target')
+                   for rel in rels.iter(f'{{{NS_PKG_REL}}}Relationship')}
+
+        properties = workbook.find(_M + 'workbookPr')
+        self.date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+
+        sheets = []
+        for sheet in workbook.iter(_M + 'sheet'):
+            target = targets.get(sheet.get(f'{{{NS_REL}}}id'), '')
+            member = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+            sheets.append((sheet.get('name'), member))
+        return sheets
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return [name for name, _ in self.sheets]
+
+    def sheet_member(self, sheet: Union[str, int] = 0) -> str:
+        """工作表名称或序号对应的压缩包内路径"""
+        if isinstance(sheet, int):
+            try:
+                return self.sheets[sheet][1]
+            except IndexError:
+                raise ValueError(f"工作表序号超出范围: {sheet}")
+        for name, member in self.sheets:
+            if name == sheet:
+                return member
+        raise ValueError(f"工作表不存在: {sheet}")
+
+    @property
+    def shared_strings(self) -> List[str]:
+        """共享字符串表（首次访问时加载）"""
+        if self._shared_strings is None:
+            strings = []
+            try:
+                with self.archive.open('xl/sharedStrings.xml') as f:
+                    for _, elem in ET.iterparse(f):
+                        if elem.tag == _M + 'si':
+                            # 富文本由多个<r><t>组成，拼接所有<t>（不含<rPh>注音）
+                            texts = elem.findall(_TEXT) + elem.findall(f'{_M}r/{_TEXT}')
+                            strings.append(''.join(t.text or '' for t in texts))
+                            elem.clear()
+            except KeyError:
+                pass
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _load_styles(self):
+        formats = {}
+        cell_formats = []
+        try:
+            styles = ET.fromstring(self.archive.read('xl/styles.xml'))
+        except KeyError:
+            styles = None
+        if styles is not None:
+            for fmt in styles.iter(_M + 'numFmt'):
+                formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+            cell_xfs = styles.find(_M + 'cellXfs')
+            if cell_xfs is not None:
+                for xf in cell_xfs.iter(_M + 'xf'):
+                    format_id = int(xf.get('numFmtId', 0))
+                    cell_formats.append((format_id, formats.get(format_id)))
+        self._cell_formats = cell_formats
+        self._date_styles = {index for index, (format_id, code) in enumerate(cell_formats)
+                             if is_date_format(format_id, code)}
+
+    @property
+    def cell_formats(self) -> List[Tuple[int, Optional[str]]]:
+        """每个样式序号对应的 (numFmtId, 自定义格式代码)"""
+        if self._cell_formats is None:
+            self._load_styles()
+        return self._cell_formats
+
+    @property
+    def date_styles(self) -> set:
+        if self._date_styles is None:
+            self._load_styles()
+        return self._date_styles
+
+    def column_formats(self, sheet: Union[str, int] = 0, columns: Optional[set] = None,
+                       min_row: int = 1, sample_rows: int = 100) -> Dict[int, Tuple[int, Optional[str]]]:
+        """从min_row开始抽样若干行，取每列最常用的数字格式
+
+        Returns:
+            dict: {列序号: (numFmtId, 自定义格式代码)}，没有样式的列不包含在内
+        """
+        counts: Dict[int, Dict[int, int]] = {}
+        seen = 0
+        for block in self.iter_blocks(sheet):
+            for row_match in _ROW_RE.finditer(block):
+                ref = _ROW_NUMBER_RE.search(row_match.group(1))
+                if ref and int(ref.group(1)) < min_row or not row_match.group(2):
+                    continue
+                column = -1
+                for cell in _CELL_RE.finditer(row_match.group(2)):
+                    attrs = cell.group(1)
+                    ref = _CELL_REF_RE.search(attrs)
+                    column = column_index(ref.group(1)) if ref else column + 1
+                    style = _STYLE_RE.search(attrs)
+                    if not cell.group(2) or style is None or (columns is not None and column not in columns):
+                        continue
+                    styles = counts.setdefault(column, {})
+                    styles[int(style.group(1))] = styles.get(int(style.group(1)), 0) + 1
+                seen += 1
+                if seen >= sample_rows:
+                    break
+            if seen >= sample_rows:
+                break
+
+        formats = {}
+        cell_formats = self.cell_formats
+        for column, styles in counts.items():
+            style = max(styles, key=styles.get)
+            if style < len(cell_formats):
+                formats[column] = cell_formats[style]
+        return formats
+
+    def decoder(self) -> 'RowDecoder':
+        """创建行解码器（包含共享字符串和日期样式，可传给其他进程）"""
+        return RowDecoder(self.shared_strings, self.date_styles, self.time_styles, self.date1904)
+
+    @property
+    def time_styles(self) -> set:
+        """只有时间部分的样式序号集合"""
+        return {index for index, (format_id, _) in enumerate(self.cell_formats)
+                if format_id in _TIME_FORMAT_IDS}
+
+    def iter_blocks(self, sheet: Union[str, int] = 0, block_size: int = 1024 * 1024) -> Iterator[str]:
+        """把工作表XML按<row>边界切分为文本块
+
+        每个块只包含完整的行元素（以及行之前/之后的其他XML），
+        可以独立解码。
+        """
+        member = self.sheet_member(sheet)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        row_tag = None
+        with self.archive.open(member) as f:
+            while True:
+                data = f.read(block_size)
+                text = buffer + decoder.decode(data, final=not data)
+                if row_tag is None:
+                    # 部分生成器给元素加命名空间前缀（如<x:row>）
+                    match = _SHEET_DATA_RE.search(text)
+                    if match is None and data:
+                        buffer = text
+                        continue
+                    row_tag = f"<{(match and match.group(1)) or ''}row"
+                if not data:
+                    if text:
+                        yield text
+                    return
+                cut = text.rfind(row_tag)
+                if cut <= 0:
+                    buffer = text
+                    continue
+                yield text[:cut]
+                buffer = text[cut:]
+
+    def iter_rows(self, sheet: Union[str, int] = 0, columns: Optional[set] = None,
+                  min_row: int = 1, max_row: Optional[int] = None,
+                  workers: Optional[int] = None) -> Iterator[Tuple[int, Dict[int, object]]]:
+        """逐行读取工作表
+
+        Args:
+            sheet: 工作表名称或序号
+            columns: 需要的列序号集合（从0开始），None表示全部
+            min_row: 起始行号（工作表行号，从1开始）
+            max_row: 结束行号（包含），读到之后立即停止解析
+            workers: 解码进程数，大于1且工作表足够大时见iter_rows_parallel
+
+        Yields:
+            tuple: (工作表行号, {列序号: 值})，空行不会产生
+        """
+        if workers is not None and workers > 1 and \
+                self.archive.getinfo(self.sheet_member(sheet)).file_size >= PARALLEL_MIN_SIZE:
+            yield from self.iter_rows_parallel(sheet, columns, min_row, max_row, workers)
+            return
+
+        decoder = self.decoder()
+        row_number = 0
+        for block in self.iter_blocks(sheet):
+            rows, row_number, done = decoder.decode(block, columns, min_row, max_row, row_number)
+            yield from rows
+            if done:
+                return
+
+    def iter_rows_parallel(self, sheet: Union[str, int] = 0, columns: Optional[set] = None,
+                           min_row: int = 1, max_row: Optional[int] = None,
+                           workers: Optional[int] = None,
+                           block_size: int = 4 * 1024 * 1024) -> Iterator[Tuple[int, Dict[int, object]]]:
+        """多进程逐行读取工作表，参数和结果同iter_rows
+
+        当前进程解压工作表XML并按<row>边界切块，各块在工作进程中解码后按原顺序产生。
+        共享字符串和样式随解码器在每个工作进程启动时传递一次；同时处理中的块数
+        不超过进程数的两倍，内存占用与工作表大小无关。
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        decoder = self.decoder()
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(workers, initializer=_init_decode_worker, initargs=(decoder,))
+        blocks = self.iter_blocks(sheet, block_size)
+        pending = deque()  # (文本块, Future)，按块的顺序排列
+
+        def submitted():
+            for block in blocks:
+                pending.append((block, executor.submit(_decode_block, block, columns, min_row, max_row)))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+
+        try:
+            row_number = 0
+            for block, future in submitted():
+                decoded = future.result()
+                if decoded is None:
+                    # 行号需要依赖上一块，在当前进程按顺序解码
+                    decoded = decoder.decode(block, columns, min_row, max_row, row_number)
+                rows, last, done = decoded
+                row_number = last or row_number
+                yield from rows
+                if done:
+                    return
+        finally:
+            blocks.close()
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+_worker_decoder = None
+
+
+def _init_decode_worker(decoder: 'RowDecoder'):
+    """工作进程初始化：保存解码器，之后的任务只需传递文本块"""
+    global _worker_decoder
+    _worker_decoder = decoder
+
+
+def _decode_block(block: str, columns: Optional[set], min_row: int, max_row: Optional[int]):
+    """在工作进程中解码一块
+
+    块的第一个行元素缺少r属性时行号无法独立确定，返回None由调用方按顺序解码。
+    """
+    first = _ROW_RE.search(block)
+    if first is not None and not _ROW_NUMBER_RE.search(first.group(1)):
+        return None
+    return _worker_decoder.decode(block, columns, min_row, max_row)
+
+
+class RowDecoder:
+    """把工作表XML文本块解码为行
+
+    只依赖共享字符串和样式信息，可以序列化后在工作进程中使用。
+    使用正则表达式扫描单元格，不需要的列和行在解码值之前就被跳过。
+    """
+
+    def __init__(self, shared_strings: List[str], date_styles: set, time_styles: set, date1904: bool):
+        self.shared_strings = shared_strings
+        self.date_styles = date_styles
+        self.time_styles = time_styles
+        self.epoch = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+
+    def to_datetime(self, serial: float, style: int):
+        # 与openpyxl一致，时间部分舍入到毫秒以消除浮点误差
+        days, fraction = divmod(serial, 1)
+        value = self.epoch + timedelta(days=days, milliseconds=round(fraction * 86400000))
+        if serial < 1 and style in self.time_styles:
+            return value.time()
+        return value
+
+    def cell_value(self, attrs: str, body: Optional[str]):
+        """解码单元格的值"""
+        if not body:
+            return None
+        cell_type = 'n'
+        style = None
+        for name, value in _ATTR_RE.findall(attrs):
+            if name == 't':
+                cell_type = value
+            elif name == 's':
+                style = int(value)
+
+        if cell_type == 'inlineStr':
+            return _unescape(''.join(_T_RE.findall(body)))
+
+        match = _V_RE.search(body)
+        if match is None:
+            return None
+        text = match.group(1)
+        if cell_type == 's':
+            return self.shared_strings[int(text)]
+        if cell_type == 'b':
+            return text == '1'
+        if cell_type in ('str', 'e'):
+            return _unescape(text)
+
+        number = float(text) if ('.' in text or 'E' in text or 'e' in text) else int(text)
+        if style is not None and style in self.date_styles:
+            return self.to_datetime(float(number), style)
+        return number
+
+    def decode(self, block: str, columns: Optional[set] = None, min_row: int = 1,
+               max_row: Optional[int] = None, row_number: int = 0):
+        """解码一个文本块
+
+        Args:
+            block: iter_blocks产生的文本块
+            columns: 需要的列序号集合，None表示全部
+            min_row: 起始行号
+            max_row: 结束行号（包含）
+            row_number: 上一块最后一行的行号（行元素缺少r属性时用于推算）
+
+        Returns:
+            tuple: (行列表, 最后一行的行号, 是否已超过max_row)
+        """
+        rows = []
+        for row_match in _ROW_RE.finditer(block):
+            ref = _ROW_NUMBER_RE.search(row_match.group(1))
+            row_number = int(ref.group(1)) if ref else row_number + 1
+            if max_row is not None and row_number > max_row:
+                return rows, row_number, True
+            body = row_match.group(2)
+            if row_number < min_row or not body:
+                continue
+
+            values = {}
+            column = -1
+            for cell in _CELL_RE.finditer(body):
+                attrs = cell.group(1)
+                ref = _CELL_REF_RE.search(attrs)
+                column = column_index(ref.group(1)) if ref else column + 1
+                if columns is not None and column not in columns:
+                    continue
+                value = self.cell_value(attrs, cell.group(2))
+                if value is not None:
+                    values[column] = value
+            if values:
+                rows.append((row_number, values))
+        return rows, row_number, False
+
+
+def _resolve_columns(columns: Optional[List[ColumnSpec]], header: Dict[int, object]) -> Optional[List[int]]:
+    """把parse_columns的结果解析为列序号：先匹配表头中的列名，再按列字母或列字母范围解析"""
+    if columns is None:
+        return None
+    names = {}
+    for index, value in sorted(header.items()):
+        names.setdefault(str(value), index)
+    resolved = []
+    for column in columns:
+        if isinstance(column, int):
+            resolved.append(column)
+        elif column in names:
+            resolved.append(names[column])
+        elif _LETTERS_RE.fullmatch(column):
+            resolved.append(column_index(column))
+        elif _LETTER_RANGE_RE.fullmatch(column):
+            first, last = (column_index(part) for part in column.split(':'))
+            if last < first:
+                raise ValueError(f"无效的列范围: {column}")
+            resolved.extend(range(first, last + 1))
+        else:
+            raise ValueError(f"列不存在: {column}")
+    return resolved
+
+
+def iter_xlsx(path: str, sheet: Union[str, int] = 0, columns=None, rows=None,
+              row_filter: Optional[Callable[[Dict[str, object]], bool]] = None,
+              with_formats: bool = False, workers: Optional[int] = None):
+    """逐行读取xlsx工作表
+
+    第一个非空行作为表头；未设置row_filter时中间的空行以空值行产生，
+    与pandas.read_excel一致。
+
+    Args:
+        path: 文件路径
+        sheet: 工作表名称或序号
+        columns: 列选择（见parse_columns）
+        rows: 数据行范围（见parse_rows）
+        row_filter: 行过滤函数，参数为 {列名: 值}，返回False的行被丢弃
+        with_formats: 是否同时返回每列的数字格式
+        workers: 解码进程数（见XlsxWorkbook.iter_rows），None表示在当前进程解码
+
+    Returns:
+        tuple: (列名列表, (数据行号, 值列表)的迭代器)，数据行号从1开始、不含表头；
+            with_formats为True时再加上每列的 (numFmtId, 格式代码)，没有样式的列为None
+    """
+    columns = parse_columns(columns)
+    rows = parse_rows(rows)
+
+    workbook = XlsxWorkbook(path)
+    try:
+        header_iter = workbook.iter_rows(sheet)
+        header_row, header = next(header_iter, (0, {}))
+        header_iter.close()
+
+        selected = _resolve_columns(columns, header)
+        if selected is None:
+            selected = list(range(max(header) + 1)) if header else []
+        names = [str(header[i]) if i in header else f"Unnamed: {i}" for i in selected]
+        if with_formats:
+            found = workbook.column_formats(sheet, set(selected), header_row + (rows or (1, None))[0])
+            formats = [found.get(i) for i in selected]
+    except Exception:
+        workbook.close()
+        raise
+
+    first, last = rows or (1, None)
+    min_row = header_row + first
+    max_row = header_row + last if last is not None else None
+
+    def records():
+        with workbook:
+            expected = min_row
+            for row_number, values in workbook.iter_rows(sheet, set(selected), min_row, max_row, workers):
+                if row_filter is None:
+                    # 补齐中间的空行
+                    for blank in range(expected, row_number):
+                        yield blank - header_row, [None] * len(selected)
+                expected = row_number + 1
+                record = [values.get(i) for i in selected]
+                if row_filter is not None and not row_filter(dict(zip(names, record))):
+                    continue
+                yield row_number - header_row, record
+
+    if with_formats:
+        return names, records(), formats
+    return names, records()
+
+
+def read_xlsx(path: str, sheet: Union[str, int] = 0, columns=None, rows=None,
+              row_filter: Optional[Callable[[Dict[str, object]], bool]] = None,
+              dtype=None, workers: Optional[int] = None):
+    """读取xlsx工作表为DataFrame，列投影、行范围和行过滤在解析时完成
+
+    参数同iter_xlsx，dtype传给DataFrame。
+
+    Returns:
+        DataFrame
+    """
+    import pandas as pd
+
+    names, records = iter_xlsx(path, sheet, columns, rows, row_filter, workers=workers)
+    return pd.DataFrame([record for _, record in records], columns=names, dtype=dtype)
+
+
+def is_csv(path: str) -> bool:
+    return path.lower().endswith(CSV_EXTENSIONS)
+
+
+def sniff_csv(path: str, sample_size: int = 64 * 1024) -> Tuple[str, str]:
+    """探测CSV文件的编码和分隔符
+
+    编码依次尝试BOM、UTF-8和GB18030，都失败时使用latin-1；分隔符在逗号、
+    制表符、分号和竖线中探测，无法判断时.tsv为制表符、其余为逗号。
+
+    Returns:
+        tuple: (编码, 分隔符)
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    elif sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = 'utf-16'
+    else:
+        # 样本可能截断在多字节字符中间，只检查到最后一个换行
+        end = sample.rfind(b'\n') if len(sample) == sample_size else -1
+        probe = sample[:end] if end > 0 else sample
+        encoding = 'latin-1'
+        for candidate in ('utf-8', 'gb18030'):
+            try:
+                probe.decode(candidate)
+            except UnicodeDecodeError:
+                continue
+            encoding = candidate
+            break
+
+    text = sample.decode(encoding, errors='ignore')
+    default = '\t' if path.lower().endswith('.tsv') else ','
+    first_line = text.split('\n', 1)[0]
+    if default in first_line:
+        return encoding, default
+    try:
+        lines = text.splitlines()
+        delimiter = csv.Sniffer().sniff('\n'.join(lines[:50]), delimiters=',\t;|').delimiter
+    except csv.Error:
+        delimiter = default
+    return encoding, delimiter
+
+
+def _csv_columns(path: str, encoding: str, delimiter: str, columns) -> Tuple[List[str], Optional[List[int]]]:
+    """读取CSV表头，把列选择解析为列序号
+
+    Returns:
+        tuple: (全部列名, 选中的列序号，未指定时为None)
+    """
+    import pandas as pd
+
+    header = pd.read_csv(path, sep=delimiter, encoding=encoding, nrows=0)
+    names = [str(name) for name in header.columns]
+    selected = _resolve_columns(parse_columns(columns), dict(enumerate(names)))
+    for index in selected or []:
+        if index >= len(names):
+            raise ValueError(f"列不存在: {column_letter(index)}")
+    return names, selected
+
+
+def iter_csv_frames(path: str, columns=None, rows=None,
+                    row_filter: Optional[Callable[[Dict[str, object]], bool]] = None,
+                    chunk_rows: int = 100000):
+    """按块读取CSV/TSV文件
+
+    每块是一个DataFrame，索引为数据行号（从1开始、不含表头），任何时候只持有一块。
+
+    Returns:
+        tuple: (列名列表, DataFrame块的迭代器)
+    """
+    import pandas as pd
+
+    encoding, delimiter = sniff_csv(path)
+    all_names, selected = _csv_columns(path, encoding, delimiter, columns)
+    names = all_names if selected is None else [all_names[i] for i in selected]
+
+    kwargs = {'sep': delimiter, 'encoding': encoding, 'chunksize': chunk_rows}
+    if selected is not None:
+        kwargs['usecols'] = sorted(set(selected))
+    first, last = parse_rows(rows) or (1, None)
+    if first > 1:
+        kwargs['skiprows'] = range(1, first)
+    if last is not None:
+        kwargs['nrows'] = last - first + 1
+
+    def frames():
+        number = first
+        with pd.read_csv(path, **kwargs) as reader:
+            for chunk in reader:
+                chunk.columns = [str(name) for name in chunk.columns]
+                # usecols按文件中的顺序返回，恢复为请求的顺序
+                chunk = chunk[names] if selected is not None else chunk
+                chunk.index = pd.RangeIndex(number, number + len(chunk))
+                number += len(chunk)
+                if row_filter is not None:
+                    mask = [bool(row_filter(dict(zip(names, record))))
+                            for record in chunk.itertuples(index=False, name=None)]
+                    chunk = chunk[mask]
+                yield chunk
+
+    return names, frames()
+
+
+def iter_csv(path: str, columns=None, rows=None, row_filter=None, with_formats: bool = False):
+    """逐行读取CSV/TSV文件，返回值同iter_xlsx（CSV没有数字格式，格式均为None）"""
+    names, frames = iter_csv_frames(path, columns, rows, row_filter)
+
+    def records():
+        try:
+            for frame in frames:
+                for number, record in zip(frame.index, frame.itertuples(index=False, name=None)):
+                    yield number, list(record)
+        finally:
+            # 提前关闭时同时关闭文件
+            frames.close()
+
+    if with_formats:
+        return names, records(), [None] * len(names)
+    return names, records()
+
+
+def read_csv(path: str, columns=None, rows=None, row_filter=None, dtype=None):
+    """读取CSV/TSV文件为DataFrame
+
+    安装了pyarrow且不需要跳过行时使用其多线程解析器，否则使用pandas的C解析器。
+    """
+    import pandas as pd
+
+    encoding, delimiter = sniff_csv(path)
+    all_names, selected = _csv_columns(path, encoding, delimiter, columns)
+    kwargs = {'sep': delimiter, 'encoding': encoding, 'dtype': dtype}
+    if selected is not None:
+        kwargs['usecols'] = [all_names[i] for i in sorted(set(selected))]
+    rows = parse_rows(rows)
+    if rows is not None:
+        first, last = rows
+        kwargs['skiprows'] = range(1, first)
+        kwargs['nrows'] = None if last is None else last - first + 1
+    else:
+        try:
+            import pyarrow  # noqa: F401
+            kwargs['engine'] = 'pyarrow'
+            if encoding == 'utf-8-sig':
+                kwargs['encoding'] = 'utf-8'
+        except ImportError:
+            pass
+
+    df = pd.read_csv(path, **kwargs)
+    df.columns = [str(name) for name in df.columns]
+    if selected is not None:
+        df = df[[all_names[i] for i in selected]]
+    if row_filter is not None:
+        mask = [bool(row_filter(record)) for record in df.to_dict('records')]
+        df = df[mask]
+    return df
+
+
+def read_sheet(path: str, sheet: Union[str, int] = 0, columns=None, rows=None,
+               row_filter=None, dtype=None, workers: Optional[int] = None):
+    """按文件类型读取工作表，xlsx走流式解析（workers见iter_xlsx），CSV/TSV见read_csv，其余交给pandas"""
+    if path.lower().endswith('.xlsx'):
+        return read_xlsx(path, sheet, columns, rows, row_filter, dtype, workers)
+    if is_csv(path):
+        return read_csv(path, columns, rows, row_filter, dtype)
+
+    import pandas as pd
+
+    columns = parse_columns(columns)
+    rows = parse_rows(rows)
+    kwargs = {'sheet_name': sheet, 'dtype': dtype}
+    selected = None
+    if columns is not None:
+        # 先只读表头，按列名优先的规则解析列选择
+        header = pd.read_excel(path, sheet_name=sheet, nrows=0).columns
+        selected = _resolve_columns(columns, dict(enumerate(header)))
+        for index in selected:
+            if index >= len(header):
+                raise ValueError(f"列不存在: {column_letter(index)}")
+        kwargs['usecols'] = sorted(set(selected))
+    if rows is not None:
+        first, last = rows
+        kwargs['skiprows'] = range(1, first)
+        kwargs['nrows'] = None if last is None else last - first + 1
+    df = pd.read_excel(path, **kwargs)
+    if selected is not None:
+        # usecols按文件中的顺序返回，恢复为请求的顺序
+        positions = {index: position for position, index in enumerate(sorted(set(selected)))}
+        df = df.iloc[:, [positions[index] for index in selected]]
+    if row_filter is not None:
+        mask = [bool(row_filter(record)) for record in df.to_dict('records')]
+        df = df[mask]
+    return df
@@ -1,8 +1,10 @@
-import hashlib
-import random
+import os
+import secrets
+import sqlite3
 import string
+import threading
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from PyQt5.QtWidgets import (QDialog, QLabel, QLineEdit, QPushButton, 
                             QVBoxLayout, QMessageBox, QHBoxLayout)
 from PyQt5.QtCore import Qt
@@ -16,9 +18,15 @@ class RegisterCode:
         self.used = False
 
 class RegisterCodeManager:
-    """注册码管理器"""
+    """注册码管理器
+    
+    注册码保存在SQLite数据库中，重启后仍然有效。过期时间建有索引，
+    清理时只扫描已过期的记录；注册码使用后立即删除。
+    """
     _instance = None
-    _codes = {}  # 存储注册码: RegisterCode对象
+    _db_file = "auth/register_codes.db"
+    _conn = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -26,24 +34,69 @@ class RegisterCodeManager:
         return cls._instance
     
     @classmethod
-    def generate_code(cls, valid_hours: int = 24) -> str:
-        """生成新的注册码
+    def _connection(cls) -> sqlite3.Connection:
+        """打开（必要时创建）注册码数据库"""
+        if cls._conn is None:
+            db_dir = os.path.dirname(cls._db_file)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            conn = sqlite3.connect(cls._db_file, check_same_thread=False)
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS register_codes (
+                        code TEXT PRIMARY KEY,
+                        expiry REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_register_codes_expiry "
+                             "ON register_codes(expiry)")
+            cls._conn = conn
+        return cls._conn
+    
+    @classmethod
+    def generate_codes(cls, count: int = 1, valid_hours: int = 24, length: int = 16) -> List[str]:
+        """批量生成注册码
         
         Args:
+            count: 生成数量
             valid_hours: 注册码有效期（小时）
+            length: 注册码长度
             
         Returns:
-            str: 生成的注册码
+            List[str]: 生成的注册码
         """
-        # 生成16位随机字符串
         chars = string.ascii_letters + string.digits
-        code = ''.join(random.choice(chars) for _ in range(16))
+        expiry = (datetime.now() + timedelta(hours=valid_hours)).timestamp()
         
-        # 创建注册码对象并存储
-        expiry = datetime.now() + timedelta(hours=valid_hours)
-        cls._codes[code] = RegisterCode(code, expiry)
+        codes = []
+        with cls._lock:
+            conn = cls._connection()
+            cls._purge_expired(conn)
+            with conn:
+                while len(codes) < count:
+                    batch = {''.join(secrets.choice(chars) for _ in range(length))
+                             for _ in range(count - len(codes))}
+                    for code in batch:
+                        # 与已有注册码重复时跳过，下一轮补足
+                        cursor = conn.execute(
+                            "INSERT OR IGNORE INTO register_codes (code, expiry) VALUES (?, ?)",
+                            (code, expiry)
+                        )
+                        if cursor.rowcount == 1:
+                            codes.append(code)
+        return codes
+    
+    @classmethod
+    def generate_code(cls, valid_hours: int = 24) -> str:
+        """生成新的注册码
         
-        return code
+        Args:
+            valid_hours: 注册码有效期（小时）
+            
+        Returns:
+            str: 生成的注册码
+        """
+        return cls.generate_codes(1, valid_hours)[0]
     
     @classmethod
     def verify_code(cls, code: str) -> bool:
@@ -55,19 +108,65 @@ class RegisterCodeManager:
         Returns:
             bool: 注册码是否有效
         """
-        reg_code = cls._codes.get(code)
-        if not reg_code:
-            return False
-            
-        if reg_code.used:
-            return False
-            
-        if datetime.now() > reg_code.expiry:
-            return False
+        with cls._lock:
+            conn = cls._connection()
+            with conn:
+                # 有效的注册码在验证时即被消耗
+                cursor = conn.execute(
+                    "DELETE FROM register_codes WHERE code = ? AND expiry > ?",
+                    (code, datetime.now().timestamp())
+                )
+            return cursor.rowcount == 1
+    
+    @staticmethod
+    def _purge_expired(conn: sqlite3.Connection) -> int:
+        """按过期时间索引删除已过期的注册码"""
+        with conn:
+            cursor = conn.execute("DELETE FROM register_codes WHERE expiry <= ?",
+                                  (datetime.now().timestamp(),))
+        return cursor.rowcount
+    
+    @classmethod
+    def purge_expired(cls) -> int:
+        """清理过期注册码，返回删除的数量"""
+        with cls._lock:
+            return cls._purge_expired(cls._connection())
+    
+    @classmethod
+    def active_codes(cls) -> List[RegisterCode]:
+        """所有未使用且未过期的注册码，按过期时间排序"""
+        with cls._lock:
+            conn = cls._connection()
+            cls._purge_expired(conn)
+            rows = conn.execute(
+                "SELECT code, expiry FROM register_codes ORDER BY expiry"
+            ).fetchall()
+        return [RegisterCode(code, datetime.fromtimestamp(expiry)) for code, expiry in rows]
+    
+    @classmethod
+    def export_codes(cls, file_path: str, codes: Optional[List[RegisterCode]] = None) -> int:
+        """导出注册码到Excel（.xlsx）或CSV文件
+        
+        Args:
+            file_path: 输出文件路径
+            codes: 要导出的注册码，默认导出所有有效注册码
             
-        # 标记注册码为已使用
-        reg_code.used = True
-        return True
+        Returns:
+            int: 导出的数量
+        """
+        import pandas as pd
+        
+        if codes is None:
+            codes = cls.active_codes()
+        df = pd.DataFrame({
+            '注册码': [c.code for c in codes],
+            '过期时间': [c.expiry.strftime('%Y-%m-%d %H:%M:%S') for c in codes],
+        })
+        if file_path.lower().endswith('.csv'):
+            df.to_csv(file_path, index=False, encoding='utf-8-sig')
+        else:
+            df.to_excel(file_path, index=False, sheet_name='注册码')
+        return len(df)
 
 class RegisterWindow(QDialog):
     def __init__(self, parent=None):
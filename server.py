@@ -0,0 +1,390 @@
+"""本地Excel转换服务
+
+asyncio前端接收上传的工作簿或服务器上的文件路径，放入有界任务队列，
+由常驻的进程池完成解析和渲染。工作进程每渲染一段就通过有界队列发回，
+前端随即以分块传输编码写出，完整结果不会在任何一个进程中拼接。
+只绑定本机回环地址或Unix套接字，供内部工具调用（按路径转换的接口可以
+读取服务进程能访问的任何文件，不能暴露到网络上）。
+
+接口:
+    POST /convert          请求体为工作簿内容（?format=xls/csv/tsv指定格式，默认xlsx），
+                           或JSON {"path": "..."}
+    GET  /metrics          队列深度、处理数量和延迟统计
+    GET  /health           健康检查
+
+示例:
+    python server.py --port 8765 --workers 4
+    curl --data-binary @book.xlsx http://127.0.0.1:8765/convert
+"""
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import argparse
+import tempfile
+import ipaddress
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+CHUNK_SIZE = 64 * 1024
+# 每个请求在途的分段数上限，客户端读取较慢时工作进程等待
+STREAM_DEPTH = 8
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+def _warm_worker():
+    """工作进程初始化：预先导入pandas和读取引擎，每个进程只付出一次代价"""
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import Action  # noqa: F401
+
+
+class _Cancelled(Exception):
+    """客户端已断开，停止转换"""
+
+
+def _convert_job(channel, cancel, path=None, data=None, suffix='.xlsx', catalog=None):
+    """在工作进程中执行一次转换，结果分段发送到channel
+
+    消息依次为 ('start', None)、若干 ('data', bytes)、('end', None)；
+    开始输出前失败时只发送 ('error', 原因)，输出过程中失败时以 ('error', 原因) 结束。
+    服务器上的文件同时记录到工作簿目录（上传的临时文件不记录）。
+    """
+    from Action import ExcelProcessor
+
+    def send(message):
+        while True:
+            if cancel.is_set():
+                raise _Cancelled()
+            try:
+                channel.put(message, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    temp_path = None
+    workbook_catalog = None
+    try:
+        if data is not None:
+            fd, temp_path = tempfile.mkstemp(suffix=suffix)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            path = temp_path
+        elif catalog:
+            from catalog import WorkbookCatalog
+            workbook_catalog = WorkbookCatalog(catalog)
+        processor = ExcelProcessor(catalog=workbook_catalog)
+        processor.set_file(path)
+        started = False
+        for text in processor.iter_markdown(CHUNK_SIZE):
+            if not started:
+                send(('start', None))
+                started = True
+            send(('data', text.encode('utf-8')))
+        if not started:
+            send(('start', None))
+        send(('end', None))
+    except _Cancelled:
+        pass
+    except Exception as e:
+        try:
+            send(('error', str(e)))
+        except _Cancelled:
+            pass
+    finally:
+        if workbook_catalog is not None:
+            workbook_catalog.close()
+        if temp_path is not None:
+            os.remove(temp_path)
+
+
+class ConversionService:
+    """转换服务：有界队列 + 进程池"""
+
+    def __init__(self, workers=None, queue_size=32, max_upload=200 * 1024 * 1024, catalog=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.max_upload = max_upload
+        # 工作簿目录的数据库文件，None表示不记录
+        self.catalog = catalog
+        self.queue = None
+        self.executor = None
+        # 跨进程的分段队列和取消标志由manager进程提供
+        self._manager = None
+        # 读取分段队列的线程池（见start）
+        self._readers = None
+        self._dispatchers = []
+        self._latencies = deque(maxlen=1000)
+        self.stats = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'in_flight': 0}
+
+    async def start(self):
+        """启动进程池和调度协程"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._manager = multiprocessing.Manager()
+        # 每个已接受、尚未结束的任务最多占用一个线程等待下一段；排队中和执行中的任务
+        # 合计不超过queue_size + workers，线程不会被等待开始的请求占满，
+        # 正在输出的请求总能读到下一段，工作进程不会因分段队列已满而卡住
+        self._readers = ThreadPoolExecutor(max_workers=self.queue_size + self.workers,
+                                           thread_name_prefix='channel-reader')
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # 提前拉起所有工作进程，避免首个请求承担启动成本
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_worker)
+                               for _ in range(self.workers)))
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        # 先关闭manager：还在等待客户端读取的工作进程写分段队列时出错退出，进程池才能关闭
+        self._manager.shutdown()
+        self.executor.shutdown(wait=True)
+        self._readers.shutdown(wait=False)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            kwargs, enqueued = await self.queue.get()
+            self.stats['in_flight'] += 1
+            try:
+                if not kwargs['cancel'].is_set():
+                    await loop.run_in_executor(self.executor, _convert_job_kwargs, kwargs)
+            except Exception as e:
+                # 工作进程异常退出等情况，通知等待结果的请求
+                await loop.run_in_executor(None, _post_failure, kwargs, str(e))
+            finally:
+                self.stats['in_flight'] -= 1
+                self._latencies.append(time.perf_counter() - enqueued)
+                self.queue.task_done()
+
+    def submit(self, **kwargs):
+        """提交任务，返回 (分段队列, 取消标志)；队列已满时返回None（由调用方返回503）"""
+        if self.queue.full():
+            self.stats['rejected'] += 1
+            return None
+        channel = self._manager.Queue(maxsize=STREAM_DEPTH)
+        cancel = self._manager.Event()
+        self.queue.put_nowait((dict(kwargs, channel=channel, cancel=cancel), time.perf_counter()))
+        self.stats['accepted'] += 1
+        return channel, cancel
+
+    def metrics(self):
+        """服务指标"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4)
+
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue_size,
+            'workers': self.workers,
+            **self.stats,
+            'latency': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(latencies[-1], 4) if latencies else None,
+                'samples': len(latencies),
+            },
+        }
+
+    async def handle(self, reader, writer):
+        """处理一个HTTP连接（每个连接一个请求）"""
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            if url.path == '/health':
+                await self._send_json(writer, 200, {'status': 'ok'})
+            elif url.path == '/metrics':
+                await self._send_json(writer, 200, self.metrics())
+            elif url.path == '/convert':
+                if method != 'POST':
+                    await self._send_json(writer, 405, {'error': '只支持POST'})
+                else:
+                    await self._handle_convert(reader, writer, url, headers)
+            else:
+                await self._send_json(writer, 404, {'error': '未知路径'})
+        except asyncio.IncompleteReadError:
+            # 请求体未读完客户端就断开了，无需回复
+            pass
+        except (ValueError, asyncio.LimitOverrunError, ConnectionError) as e:
+            try:
+                await self._send_json(writer, 400, {'error': str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _handle_convert(self, reader, writer, url, headers):
+        length = int(headers.get('content-length', 0))
+        if length > self.max_upload:
+            await self._send_json(writer, 413, {'error': '上传文件过大'})
+            return
+        body = await reader.readexactly(length) if length else b''
+
+        if headers.get('content-type', '').startswith('application/json'):
+            path = json.loads(body or b'{}').get('path')
+            if not path:
+                await self._send_json(writer, 400, {'error': '缺少path参数'})
+                return
+            job = self.submit(path=path, catalog=self.catalog)
+        else:
+            if not body:
+                await self._send_json(writer, 400, {'error': '请求体为空'})
+                return
+            file_format = parse_qs(url.query).get('format', ['xlsx'])[0]
+            if file_format not in ('xlsx', 'xls', 'csv', 'tsv'):
+                await self._send_json(writer, 400, {'error': '不支持的格式'})
+                return
+            job = self.submit(data=body, suffix='.' + file_format)
+
+        if job is None:
+            await self._send_json(writer, 503, {'error': '服务繁忙，请稍后重试'},
+                                  extra_headers={'Retry-After': '1'})
+            return
+
+        channel, cancel = job
+        try:
+            await self._stream_result(writer, channel)
+        except BaseException:
+            # 客户端断开或服务停止时让工作进程尽快结束
+            cancel.set()
+            raise
+
+    async def _stream_result(self, writer, channel):
+        """把工作进程发回的分段以分块传输编码写出"""
+        loop = asyncio.get_running_loop()
+        kind, payload = await loop.run_in_executor(self._readers, channel.get)
+        if kind == 'failed':
+            self.stats['failed'] += 1
+            await self._send_json(writer, 500, {'error': payload})
+            return
+        if kind == 'error':
+            self.stats['failed'] += 1
+            await self._send_json(writer, 422, {'error': payload})
+            return
+
+        self._write_head(writer, 200, {'Content-Type': 'text/markdown; charset=utf-8',
+                                       'Transfer-Encoding': 'chunked'})
+        while True:
+            kind, payload = await loop.run_in_executor(self._readers, channel.get)
+            if kind != 'data':
+                break
+            await self._write_chunk(writer, payload)
+        if kind == 'end':
+            self.stats['completed'] += 1
+            await self._write_chunk(writer, b'')
+        else:
+            # 状态码已经发出，不写结束块，客户端会看到不完整的响应
+            self.stats['failed'] += 1
+
+    @staticmethod
+    def _write_head(writer, status, headers):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+    async def _send_json(self, writer, status, payload, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._write_head(writer, status, {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Length': len(body),
+            **(extra_headers or {}),
+        })
+        writer.write(body)
+        await writer.drain()
+
+    @staticmethod
+    async def _write_chunk(writer, chunk):
+        """写出一个分块，空分块表示结束"""
+        writer.write(f"{len(chunk):X}\r\n".encode('latin-1'))
+        writer.write(chunk)
+        writer.write(b'\r\n')
+        await writer.drain()
+
+
+def _convert_job_kwargs(kwargs):
+    return _convert_job(**kwargs)
+
+
+def _post_failure(kwargs, error):
+    """工作进程没有发出结束消息就失败时，代为通知请求方"""
+    try:
+        kwargs['channel'].put(('failed', error), timeout=5)
+    except queue.Full:
+        pass
+
+
+def is_loopback(host):
+    """监听地址是否只能从本机访问"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(args):
+    service = ConversionService(args.workers, args.queue_size, args.max_upload * 1024 * 1024,
+                                args.catalog)
+    await service.start()
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle, path=args.unix)
+        address = args.unix
+    else:
+        server = await asyncio.start_server(service.handle, host=args.host, port=args.port)
+        address = f"http://{args.host}:{args.port}"
+    print(f"转换服务已启动: {address}（工作进程: {service.workers}）", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='server.py', description='本地Excel转换服务')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='监听地址，只允许回环地址（默认127.0.0.1）；需要跨用户共享时使用--unix')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口（默认8765）')
+    parser.add_argument('--unix', help='改为监听Unix套接字路径')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='工作进程数')
+    parser.add_argument('--queue-size', type=int, default=32, help='任务队列长度，满时返回503')
+    parser.add_argument('--max-upload', type=int, default=200, help='最大上传大小（MB）')
+    parser.add_argument('--catalog', help='工作簿目录的SQLite文件，记录按路径转换的文件（默认不记录）')
+    args = parser.parse_args(argv)
+    if not args.unix and not is_loopback(args.host):
+        parser.error(f"只能监听本机回环地址，{args.host} 不是回环地址（按路径转换的接口可以读取服务器上的任意文件）")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SessionManager:
+    """本地会话令牌管理
+
+    令牌内容为用户名、过期时间和密码哈希指纹，用本机密钥做HMAC签名。
+    自动登录只需校验签名，不需要重新进行PBKDF2计算，也不必保存密码。
+    修改密码后指纹变化，旧令牌随之失效。
+    """
+
+    def __init__(self, key_file: str = "auth/session.key", valid_days: int = 14):
+        self.key_file = key_file
+        self.valid_seconds = valid_days * 24 * 3600
+        self._key = self._load_key()
+
+    def _load_key(self) -> bytes:
+        """读取签名密钥，不存在时生成"""
+        if os.path.exists(self.key_file):
+            with open(self.key_file, 'rb') as f:
+                key = f.read()
+            if len(key) >= 32:
+                return key
+
+        key_dir = os.path.dirname(self.key_file)
+        if key_dir and not os.path.exists(key_dir):
+            os.makedirs(key_dir)
+        key = secrets.token_bytes(32)
+        fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return key
+
+    def _sign(self, data: bytes) -> bytes:
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _fingerprint(self, user) -> str:
+        return _b64encode(self._sign(user._password.encode())[:12])
+
+    def issue(self, user) -> str:
+        """为登录成功的用户签发令牌"""
+        payload = json.dumps({
+            'u': user.username,
+            'exp': int(time.time()) + self.valid_seconds,
+            'fp': self._fingerprint(user),
+        }, separators=(',', ':')).encode()
+        body = _b64encode(payload)
+        return body + '.' + _b64encode(self._sign(body.encode()))
+
+    def verify(self, token: str, user_manager):
+        """校验令牌，有效时返回对应的User对象，否则返回None"""
+        if not token or '.' not in token:
+            return None
+        body, signature = token.rsplit('.', 1)
+        try:
+            if not hmac.compare_digest(_b64decode(signature), self._sign(body.encode())):
+                return None
+            payload = json.loads(_b64decode(body))
+        except (ValueError, TypeError):
+            return None
+
+        if payload.get('exp', 0) < time.time():
+            return None
+        user = user_manager.get_user_by_username(payload.get('u', ''))
+        if user is None or not hmac.compare_digest(payload.get('fp', ''), self._fingerprint(user)):
+            return None
+        return user
@@ -0,0 +1,46 @@
+"""管理面板：后台导入用户"""
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+
+import admin
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_dialog_refuses_to_close_during_import(app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    release = threading.Event()
+    messages = []
+
+    class SlowManager:
+        def import_users(self, path):
+            release.wait(10)
+            return [{'row': 2, 'username': 'bob', 'status': 'error', 'error': '用户名已存在'}]
+
+    monkeypatch.setattr(admin, 'UserManager', SlowManager)
+    monkeypatch.setattr(admin.QFileDialog, 'getOpenFileName',
+                        staticmethod(lambda *args: (str(tmp_path / 'readonly' / 'users.csv'), '')))
+    monkeypatch.setattr(admin.QMessageBox, 'information', lambda *args: messages.append(args[2]))
+
+    window = admin.AdminWindow()
+    window.show()
+    window.import_users()
+    window.reject()
+    assert window.isVisible()
+    assert '正在导入' in messages[-1]
+
+    release.set()
+    window._import_worker.wait()
+    app.processEvents()
+    # 报告所在目录不存在，写入失败时提示而不是抛出异常
+    assert '详细报告保存失败' in messages[-1]
+    window.reject()
+    assert not window.isVisible()
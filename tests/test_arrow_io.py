@@ -0,0 +1,55 @@
+"""arrow_io的类型推断：第一批之后出现更宽类型的列"""
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+import arrow_io
+
+
+def _records(values):
+    return [[index, value] for index, value in enumerate(values)]
+
+
+def test_stream_raises_instead_of_truncating():
+    reader = arrow_io.record_batch_reader(['id', 'x'], _records([1, 2, 3, 1.5]), batch_size=2)
+    with pytest.raises(arrow_io.SchemaConflict):
+        reader.read_all()
+
+
+def test_table_widens_integers_to_float():
+    table = arrow_io.records_to_table(['id', 'x'], _records([1, 2, 3, 1.5]), batch_size=2)
+    assert table.schema.field('x').type == pa.float64()
+    assert table.column('x').to_pylist() == [1.0, 2.0, 3.0, 1.5]
+
+
+def test_table_widens_mixed_values_to_string():
+    table = arrow_io.records_to_table(['id', 'x'], _records([1, 2, 'abc', None]), batch_size=2)
+    assert table.schema.field('x').type == pa.string()
+    assert table.column('x').to_pylist() == ['1', '2', 'abc', None]
+
+
+def test_string_column_is_not_parsed_as_number():
+    with pytest.raises(arrow_io.SchemaConflict):
+        arrow_io.record_batch_reader(['id', 'x'], _records([1, 2, '5', '6']), batch_size=2).read_all()
+
+
+def test_to_arrow_widens_late_float(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    from Action import ExcelProcessor
+
+    path = str(tmp_path / 'late_float.xlsx')
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(['n'])
+    for value in range(70000):
+        sheet.append([value])
+    sheet.append([1.5])
+    workbook.save(path)
+
+    processor = ExcelProcessor()
+    processor.set_file(path)
+    table = processor.to_arrow()
+    assert table.schema.field('n').type == pa.float64()
+    assert table.column('n')[-1].as_py() == 1.5
+    with pytest.raises(Exception):
+        processor.iter_record_batches().read_all()
@@ -0,0 +1,43 @@
+"""工作簿目录：刷新失败的记录保留，转换时记录输出位置"""
+import os
+
+import cli
+from catalog import WorkbookCatalog
+
+
+def _csv(path, text='a,b\n1,2\n'):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_refresh_keeps_records_that_fail_to_update(tmp_path, monkeypatch):
+    first = _csv(tmp_path / 'a.csv')
+    second = _csv(tmp_path / 'b.csv')
+    catalog = WorkbookCatalog(str(tmp_path / 'catalog.db'))
+    catalog.refresh_directory(str(tmp_path), [first, second])
+
+    update_file = catalog.update_file
+
+    def flaky(path, *args, **kwargs):
+        if path == second:
+            raise OSError('暂时无法读取')
+        return update_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(catalog, 'update_file', flaky)
+    records = catalog.refresh_directory(str(tmp_path), [first, second])
+    assert [r['name'] for r in records] == ['a.csv', 'b.csv']
+    catalog.close()
+
+
+def test_cli_records_conversion(tmp_path):
+    source = _csv(tmp_path / 'a.csv')
+    db = str(tmp_path / 'catalog.db')
+    out = tmp_path / 'out'
+
+    assert cli.main([source, '-o', str(out), '--catalog', db, '-j', '1']) == cli.EXIT_OK
+
+    catalog = WorkbookCatalog(db)
+    record = catalog.get(source)
+    assert record['last_converted'] is not None
+    assert record['output_path'] == os.path.abspath(str(out / 'a.md'))
+    catalog.close()
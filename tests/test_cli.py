@@ -0,0 +1,14 @@
+"""命令行：不同输入映射到同一输出文件"""
+import cli
+
+
+def test_same_stem_inputs_report_collision(tmp_path, capsys):
+    (tmp_path / 't.csv').write_text('a,b\n1,2\n', encoding='utf-8')
+    (tmp_path / 't.tsv').write_text('a\tb\n3\t4\n', encoding='utf-8')
+    out = tmp_path / 'out'
+
+    code = cli.main([str(tmp_path / 't.csv'), str(tmp_path / 't.tsv'), '-o', str(out)])
+
+    assert code == cli.EXIT_FAILED
+    assert '冲突' in capsys.readouterr().out
+    assert '| 1 | 2 |' in (out / 't.md').read_text(encoding='utf-8')
@@ -0,0 +1,74 @@
+"""列统计概要：近似结果在理论误差范围内，内存不随行数增长"""
+import random
+from collections import Counter
+
+from column_stats import HyperLogLog, KLLSketch, SpaceSaving, profile_records
+
+
+def test_hyperloglog_error_bound():
+    # precision=12时标准误差约1.6%，取3倍标准误差
+    for values in (range(100000), (f'id-{i}' for i in range(50000))):
+        sketch = HyperLogLog(12)
+        expected = 0
+        for value in values:
+            sketch.add(value)
+            sketch.add(value)
+            expected += 1
+        assert abs(sketch.count() - expected) <= 0.05 * expected
+        assert len(sketch.registers) == 4096
+
+
+def test_hyperloglog_small_cardinality_is_nearly_exact():
+    # 小基数时改用线性计数，200个值的标准误差约1个
+    sketch = HyperLogLog(12)
+    for value in range(200):
+        sketch.add(value)
+    assert abs(sketch.count() - 200) <= 4
+
+
+def test_kll_rank_error_and_size():
+    values = list(range(100000))
+    random.Random(7).shuffle(values)
+    sketch = KLLSketch(200, seed=1)
+    for value in values:
+        sketch.add(value)
+
+    fractions = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+    for fraction, estimate in zip(fractions, sketch.quantiles(fractions)):
+        # 值即秩，秩误差不超过2%
+        assert abs(estimate / len(values) - fraction) <= 0.02
+    assert sum(len(items) for items in sketch.compactors) < 3 * 200 + 8 * len(sketch.compactors)
+    assert KLLSketch().quantiles([0.5]) == [None]
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = random.Random(3)
+    stream = [f'hot{i}' for i in range(5) for _ in range(2000 - i * 100)]
+    stream += [f'cold{rng.randrange(50000)}' for _ in range(20000)]
+    rng.shuffle(stream)
+    sketch = SpaceSaving(100)
+    for value in stream:
+        sketch.add(value)
+
+    truth = Counter(stream)
+    top = sketch.top(5)
+    assert [value for value, _, _ in top] == [f'hot{i}' for i in range(5)]
+    for value, count, error in top:
+        # 计数只会偏高，且偏高不超过误差上界
+        assert count - error <= truth[value] <= count
+    assert len(sketch.counts) == 100
+
+
+def test_profile_records_summary():
+    rows = [[i, f'c{i % 3}', None if i % 4 == 0 else 1.5] for i in range(1, 101)]
+    report = profile_records(['id', 'city', 'score'], rows, top_k=2)
+
+    assert report['rows'] == 100
+    id_col, city_col, score_col = report['columns']
+    assert (id_col['type'], id_col['min'], id_col['max']) == ('integer', 1, 100)
+    # 不同值数量是HyperLogLog的近似值
+    assert abs(id_col['distinct'] - 100) <= 4
+    assert city_col['type'] == 'string' and city_col['distinct'] == 3
+    assert [item['value'] for item in city_col['top']] == ['c1', 'c2']
+    assert score_col['nulls'] == 25 and score_col['null_rate'] == 0.25
+    assert score_col['quantiles']['0.5'] == 1.5
@@ -0,0 +1,42 @@
+"""reader的列选择：列名优先于列字母"""
+import pytest
+
+import reader
+
+
+def _write_xlsx(path):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'ID', 'SKU'])
+    sheet.append(['a', 1, 'x1'])
+    sheet.append(['b', 2, 'x2'])
+    workbook.save(path)
+
+
+def test_header_name_wins_over_column_letter():
+    assert reader._resolve_columns(reader.parse_columns('ID,SKU'), {0: 'Name', 1: 'ID', 2: 'SKU'}) == [1, 2]
+
+
+def test_letters_used_when_no_header_matches():
+    assert reader._resolve_columns(reader.parse_columns('C,A:B'), {0: 'Name', 1: 'ID'}) == [2, 0, 1]
+
+
+def test_lowercase_letters_are_not_column_letters():
+    with pytest.raises(ValueError):
+        reader._resolve_columns(reader.parse_columns('a:b'), {0: 'Name'})
+
+
+def test_iter_xlsx_selects_uppercase_header(tmp_path):
+    path = str(tmp_path / 'ids.xlsx')
+    _write_xlsx(path)
+    names, records = reader.iter_xlsx(path, columns='SKU,ID')
+    assert names == ['SKU', 'ID']
+    assert [values for _, values in records] == [['x1', 1], ['x2', 2]]
+
+
+def test_csv_selects_uppercase_header(tmp_path):
+    path = tmp_path / 'ids.csv'
+    path.write_text('Name,ID\na,1\n', encoding='utf-8')
+    names, records = reader.iter_csv(str(path), columns='ID')
+    assert names == ['ID']
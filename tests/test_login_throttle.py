@@ -0,0 +1,83 @@
+"""登录限流：按用户和全局锁定，指数退避，窗口过后恢复"""
+import time
+import types
+
+import pytest
+
+import User as user_module
+from User import LoginThrottle, User, UserManager, UserStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(user_module, 'time', types.SimpleNamespace(
+        monotonic=lambda: now[0], time=time.time, perf_counter=time.perf_counter))
+    return now
+
+
+def _fail(throttle, username, times):
+    for _ in range(times):
+        throttle.record_failure(username)
+
+
+def test_user_lockout_backs_off_exponentially(clock):
+    throttle = LoginThrottle(window=300, user_threshold=3, base_delay=1.0, max_delay=5)
+    _fail(throttle, 'alice', 2)
+    assert throttle.check('alice')
+
+    _fail(throttle, 'alice', 1)
+    assert not throttle.check('alice')
+    assert throttle.retry_after('alice') == 1.0
+    assert throttle.check('bob')
+
+    clock[0] += 1
+    assert throttle.check('alice')
+    _fail(throttle, 'alice', 1)
+    assert throttle.retry_after('alice') == 2.0
+    _fail(throttle, 'alice', 3)
+    # 退避时间不超过max_delay
+    assert throttle.retry_after('alice') == 5
+    assert throttle.counters['user_lockouts'] == 5
+    assert throttle.counters['rejected'] == 1
+
+
+def test_success_and_window_expiry_reset_failures(clock):
+    throttle = LoginThrottle(window=60, user_threshold=3)
+    _fail(throttle, 'alice', 2)
+    throttle.record_success('alice')
+    _fail(throttle, 'alice', 2)
+    assert throttle.check('alice')
+
+    clock[0] += 61
+    _fail(throttle, 'alice', 1)
+    assert throttle.check('alice')
+
+
+def test_global_lockout_covers_every_user(clock):
+    throttle = LoginThrottle(user_threshold=100, global_threshold=10, base_delay=2.0)
+    for i in range(10):
+        throttle.record_failure(f'user{i}')
+    assert not throttle.check('someone-else')
+    assert throttle.retry_after('someone-else') == 2.0
+    assert throttle.metrics()['global_locked']
+    clock[0] += 2
+    assert throttle.check('someone-else')
+
+
+def test_locked_login_skips_password_check(tmp_path, monkeypatch, clock):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(User, 'iterations', 1000)
+    monkeypatch.setattr(UserManager, '_instances', {})
+    db_file = str(tmp_path / 'users.json')
+    UserStore(db_file).put(User('alice', 'secret'))
+    manager = UserManager(db_file)
+    manager.throttle = LoginThrottle(user_threshold=2)
+
+    assert manager.login('alice', 'wrong') is None
+    assert manager.login('alice', 'wrong') is None
+    verified = []
+    monkeypatch.setattr(User, 'verify_password', lambda self, password: verified.append(password))
+    # 锁定期间即使密码正确也直接拒绝，不进行PBKDF2计算
+    assert manager.login('alice', 'secret') is None
+    assert verified == []
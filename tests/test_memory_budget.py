@@ -0,0 +1,54 @@
+"""内存预算：大小解析、降级记录，按块读取与整表读取结果一致"""
+import pytest
+
+from Action import ExcelProcessor
+from memory_budget import MemoryBudget, estimate_memory, parse_size
+
+
+def _csv(path, rows=2000):
+    path.write_text('id,city,amount\n' + ''.join(
+        f'{i},{"北京" if i % 3 == 0 else "上海"},{i * 1.5}\n' for i in range(rows)), encoding='utf-8')
+    return str(path)
+
+
+def test_parse_size_units():
+    assert parse_size('1048576') == 1048576
+    assert parse_size('512K') == 512 * 1024
+    assert parse_size('2G') == 2 * 1024 ** 3
+    assert parse_size('1.5 MiB') == int(1.5 * 1024 ** 2)
+    with pytest.raises(ValueError):
+        parse_size('lots')
+    with pytest.raises(ValueError):
+        MemoryBudget(0)
+
+
+def test_estimate_scales_csv_size(tmp_path):
+    path = _csv(tmp_path / 'data.csv')
+    assert estimate_memory(path) == (tmp_path / 'data.csv').stat().st_size * 4
+
+
+def test_within_budget_does_not_degrade(tmp_path):
+    processor = ExcelProcessor(memory_budget='1G')
+    processor.set_file(_csv(tmp_path / 'data.csv'))
+    processor.read_sheet()
+    assert processor.memory_budget.events == []
+
+
+def test_chunked_read_and_query_match_whole_load(tmp_path):
+    path = _csv(tmp_path / 'data.csv')
+    whole = ExcelProcessor()
+    whole.set_file(path)
+    processor = ExcelProcessor(memory_budget='1K')
+    processor.set_file(path)
+
+    expected = whole.read_sheet()
+    result = processor.read_sheet()
+    assert result.reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+    expected = whole.query("city == '北京' and amount > 100")
+    result = processor.query("city == '北京' and amount > 100")
+    assert result['id'].tolist() == expected['id'].tolist()
+
+    events = processor.memory_budget.events
+    assert [event['operation'] for event in events] == ['read_sheet', 'query']
+    assert all(event['projected'] > event['limit'] == 1024 for event in events)
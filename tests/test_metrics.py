@@ -0,0 +1,64 @@
+"""指标存储：默认关闭，按进程分文件，过期文件清理"""
+import json
+import os
+import time
+
+import metrics
+
+
+def test_metrics_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(metrics.METRICS_DIR_ENV, raising=False)
+    monkeypatch.setattr(metrics, '_configured', False)
+    monkeypatch.setattr(metrics, '_default_store', None)
+    with metrics.track('conversion'):
+        pass
+    assert metrics.get_store() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_writes_one_file_per_process(tmp_path):
+    store = metrics.MetricsStore(str(tmp_path / 'logs'))
+    store.record('query', 0.5)
+    assert os.listdir(tmp_path / 'logs') == [f"metrics-{os.getpid()}.jsonl"]
+    (tmp_path / 'logs' / 'metrics-1.jsonl').write_text('{"ts": 0, "op": "login", "duration": 0.1}\n',
+                                                       encoding='utf-8')
+    assert [r['op'] for r in store.load()] == ['login', 'query']
+
+
+def test_prune_removes_old_files_and_caps_total_size(tmp_path):
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    now = time.time()
+    for pid, age_days in [(1, 40), (2, 3), (3, 2), (4, 1)]:
+        path = log_dir / f'metrics-{pid}.jsonl'
+        path.write_text('x' * 1000, encoding='utf-8')
+        mtime = now - age_days * 86400
+        os.utime(path, (mtime, mtime))
+
+    store = metrics.MetricsStore(str(log_dir), retention_days=30, max_total_bytes=2500)
+    store.record('query', 0.5)
+    # 40天前的文件过期；剩余总大小超过上限时先删除最旧的metrics-2
+    assert set(os.listdir(log_dir)) == {'metrics-3.jsonl', 'metrics-4.jsonl',
+                                        f'metrics-{os.getpid()}.jsonl'}
+
+
+def test_summary_only_reads_recent_records(tmp_path):
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    now = time.time()
+    old = log_dir / 'metrics-1.jsonl'
+    old.write_text(json.dumps({'ts': now - 10 * 86400, 'op': 'login', 'duration': 9.0,
+                               'outcome': 'ok', 'size': None, 'file': None}) + '\n', encoding='utf-8')
+    os.utime(old, (now - 10 * 86400, now - 10 * 86400))
+    recent = log_dir / 'metrics-2.jsonl'
+    recent.write_text(''.join(json.dumps({'ts': now - i, 'op': 'query', 'duration': i,
+                                          'outcome': 'ok', 'size': 1, 'file': None}) + '\n'
+                              for i in range(5)), encoding='utf-8')
+
+    store = metrics.MetricsStore(str(log_dir))
+    summary = store.summary(days=7, max_records=3)
+    assert list(summary['operations']) == ['query']
+    assert summary['operations']['query']['count'] == 3
+    # 保留最近的3条
+    assert summary['operations']['query']['max'] == 2
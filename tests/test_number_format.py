@@ -0,0 +1,26 @@
+"""数字格式：超大值逐个回退，空工作簿输出为空"""
+import pandas as pd
+import pytest
+
+from number_format import compile_format
+
+
+def test_huge_value_does_not_change_rounding_of_others():
+    formatter = compile_format(2)  # 0.00
+    assert formatter.format(pd.Series([1.005, 2.0 ** 70])).tolist() == ['1.01', '1180591620717411303424.00']
+
+
+def test_huge_value_keeps_thousands_and_optional_decimals():
+    formatter = compile_format(0, '#,##0.0#')
+    assert formatter.format(pd.Series([1234.5, 1e21])).tolist() == ['1,234.5', '1,000,000,000,000,000,000,000.0']
+
+
+def test_empty_workbook_renders_nothing(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    from Action import ExcelProcessor
+
+    path = str(tmp_path / 'empty.xlsx')
+    openpyxl.Workbook().save(path)
+    processor = ExcelProcessor()
+    processor.set_file(path)
+    assert processor.to_markdown() == ''
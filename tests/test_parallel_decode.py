@@ -0,0 +1,59 @@
+"""多进程解码单个xlsx工作表：结果与单进程逐行解码一致"""
+import re
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from reader import XlsxWorkbook
+
+
+@pytest.fixture(scope='module')
+def workbook_path(tmp_path_factory):
+    openpyxl = pytest.importorskip('openpyxl')
+    path = tmp_path_factory.mktemp('xlsx') / 'big.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['id', 'name', 'amount', 'when', 'flag'])
+    for i in range(1, 3001):
+        if i % 500 == 0:
+            sheet.append([])
+            continue
+        sheet.append([i, f'名称{i % 37}', i * 1.25 if i % 7 else None,
+                      datetime(2024, 1, 1 + i % 28, i % 24), i % 2 == 0])
+    workbook.save(path)
+    return str(path)
+
+
+def _rows(path, parallel, **kwargs):
+    with XlsxWorkbook(path) as workbook:
+        if parallel:
+            return list(workbook.iter_rows_parallel(workers=2, block_size=4096, **kwargs))
+        return list(workbook.iter_rows(**kwargs))
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'columns': {0, 3}},
+    {'min_row': 1200, 'max_row': 1800},
+    {'max_row': 10},
+])
+def test_parallel_matches_serial(workbook_path, kwargs):
+    serial = _rows(workbook_path, False, **kwargs)
+    assert serial
+    assert _rows(workbook_path, True, **kwargs) == serial
+
+
+def test_rows_without_numbers_fall_back_to_ordered_decode(workbook_path, tmp_path):
+    # 去掉<row>的r属性后行号依赖前面的块，需要按顺序解码
+    path = str(tmp_path / 'no_row_numbers.xlsx')
+    with zipfile.ZipFile(workbook_path) as source, zipfile.ZipFile(path, 'w') as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename.startswith('xl/worksheets/'):
+                data = re.sub(rb'(<row\b[^>]*?) r="\d+"', rb'\1', data)
+            target.writestr(info, data)
+
+    serial = _rows(path, False)
+    assert len(serial) == 2995
+    assert _rows(path, True) == serial
@@ -0,0 +1,116 @@
+"""预读取：同时持有的文件数和字节数不超过上限；转换失败按文件记录"""
+import os
+import time
+
+import pytest
+
+import cli
+from catalog import WorkbookCatalog
+from prefetch import Prefetcher
+
+
+def _files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f'f{i}.csv'
+        path.write_bytes(b'x' * size)
+        paths.append(str(path))
+    return paths
+
+
+def _settle(prefetcher):
+    """等后台线程读到额度上限"""
+    time.sleep(0.2)
+    return prefetcher._held_files, prefetcher._held_bytes
+
+
+def test_depth_limits_local_copies(tmp_path):
+    paths = _files(tmp_path, [10] * 6)
+    with Prefetcher(paths, depth=2, spool_dir=str(tmp_path)) as prefetcher:
+        seen = []
+        for item in prefetcher:
+            assert _settle(prefetcher)[0] <= 2
+            assert len(os.listdir(prefetcher._spool)) <= 2
+            with open(item.path, 'rb') as f:
+                assert f.read() == b'x' * 10
+            seen.append(item.source)
+            prefetcher.release(item)
+            assert not os.path.exists(item.path)
+        assert seen == paths
+    assert not os.path.exists(prefetcher._spool)
+
+
+def test_byte_limit_and_oversized_file(tmp_path):
+    paths = _files(tmp_path, [100, 100, 100, 1000, 100])
+    with Prefetcher(paths, depth=10, max_bytes=250, spool_dir=str(tmp_path)) as prefetcher:
+        items = iter(prefetcher)
+        first = next(items)
+        assert _settle(prefetcher) == (2, 200)
+        prefetcher.release(first)
+        second = next(items)
+        third = next(items)
+        # 1000字节的文件超过上限，只能在其他副本都释放后单独读取
+        assert _settle(prefetcher) == (2, 200)
+        prefetcher.release(second)
+        prefetcher.release(third)
+        big = next(items)
+        assert big.size == 1000 and big.error is None
+        assert _settle(prefetcher) == (1, 1000)
+        prefetcher.release(big)
+        assert [item.source for item in items] == paths[4:]
+
+
+def test_missing_file_is_reported(tmp_path):
+    paths = _files(tmp_path, [10]) + [str(tmp_path / 'missing.csv')]
+    with Prefetcher(paths, depth=2, spool_dir=str(tmp_path)) as prefetcher:
+        items = list(prefetcher)
+    assert items[0].error is None
+    assert items[1].path is None and '读取失败' in items[1].error
+
+
+def _csv_tasks(tmp_path, count, catalog=None):
+    tasks = []
+    for i in range(count):
+        path = tmp_path / f't{i}.csv'
+        path.write_text(f'a,b\n{i},2\n', encoding='utf-8')
+        tasks.append((str(path), str(tmp_path / f't{i}.md'), None, None, None, None,
+                      False, None, None, catalog))
+    return tasks
+
+
+def test_catalog_hashes_the_local_copy(tmp_path, monkeypatch):
+    catalog_file = str(tmp_path / 'catalog.db')
+    tasks = _csv_tasks(tmp_path, 2, catalog_file)
+    hashed = []
+    compute_hash = WorkbookCatalog.compute_hash
+
+    def tracking(path, *args, **kwargs):
+        hashed.append(path)
+        return compute_hash(path, *args, **kwargs)
+
+    monkeypatch.setattr(WorkbookCatalog, 'compute_hash', staticmethod(tracking))
+    results, _ = cli._convert_prefetched(tasks, 1, 1, 1 << 20, 1)
+
+    assert [r['status'] for r in results] == ['ok', 'ok']
+    sources = {task[0] for task in tasks}
+    assert len(hashed) == 2 and not sources & set(hashed)
+    monkeypatch.undo()
+    catalog = WorkbookCatalog(catalog_file)
+    for task in tasks:
+        record = catalog.get(task[0])
+        assert record['content_hash'] == compute_hash(task[0])
+        assert record['output_path'] == os.path.abspath(task[1])
+    catalog.close()
+
+
+def _crash(path, *args, **kwargs):
+    os._exit(1)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='工作进程需要继承替换后的convert_file')
+def test_crashed_worker_becomes_error_results(tmp_path, monkeypatch):
+    tasks = _csv_tasks(tmp_path, 4)
+    monkeypatch.setattr(cli, 'convert_file', _crash)
+    results, _ = cli._convert_prefetched(tasks, 2, 1, 1 << 20, 1)
+    assert [r['input'] for r in results] == [task[0] for task in tasks]
+    assert all(r['status'] == 'error' for r in results)
@@ -0,0 +1,81 @@
+"""大表预览：按页读取，页在后台加载，缓存的页数有上限"""
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+
+from Action import ExcelProcessor
+from preview import SheetPager, SheetTableModel
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _pager(tmp_path, rows=2500, page_size=1000):
+    path = tmp_path / 'data.csv'
+    path.write_text('id,name\n' + ''.join(f'{i},n{i}\n' for i in range(rows)), encoding='utf-8')
+    processor = ExcelProcessor()
+    processor.set_file(str(path))
+    return SheetPager(processor, page_size=page_size)
+
+
+def _ids(rows):
+    return [int(row[0]) for row in rows]
+
+
+def test_pager_reads_pages_and_jumps_back(tmp_path):
+    pager = _pager(tmp_path)
+    try:
+        assert pager.names == ['id', 'name']
+        assert _ids(pager.page(0)) == list(range(1000))
+        assert _ids(pager.page(1)) == list(range(1000, 2000))
+        assert pager.total_rows is None
+        assert _ids(pager.page(2)) == list(range(2000, 2500))
+        assert pager.exhausted and pager.total_rows == 2500
+        # 跳回第0页需要重新打开，保留的迭代器数不超过max_cursors
+        assert _ids(pager.page(0)) == list(range(1000))
+        assert len(pager._cursors) <= pager.max_cursors
+    finally:
+        pager.close()
+
+
+def _wait(app, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test_fetch_more_loads_in_background(app, tmp_path):
+    pager = _pager(tmp_path, rows=5500, page_size=500)
+    release = threading.Event()
+    page = pager.page
+
+    def slow_page(index):
+        release.wait(10)
+        return page(index)
+
+    pager.page = slow_page
+    model = SheetTableModel(pager, max_pages=5, prefetch=1)
+    try:
+        model.fetchMore()
+        # 界面线程不等待读取
+        assert model.is_fetching() and model.rowCount() == 0
+        release.set()
+        while model.canFetchMore():
+            _wait(app, lambda: not model.is_fetching())
+            model.fetchMore()
+        _wait(app, lambda: not model.is_fetching())
+
+        assert model.rowCount() == 5500
+        assert model.cached_pages() <= 5
+        assert model.data(model.index(5499, 1)) == 'n5499'
+    finally:
+        model.close()
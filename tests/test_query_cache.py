@@ -0,0 +1,17 @@
+"""QueryCache：缓存与调用方互不影响"""
+import pandas as pd
+
+from query_cache import QueryCache
+
+
+def test_mutating_results_does_not_change_cache():
+    cache = QueryCache()
+    key = cache.make_key('a > 0', ('t.xlsx', 1, 1), 0)
+    result = pd.DataFrame({'a': [1, 2]})
+    cache.put(key, result)
+    result.loc[0, 'a'] = 100
+
+    hit = cache.get(key)
+    assert hit['a'].tolist() == [1, 2]
+    hit.loc[1, 'a'] = 200
+    assert cache.get(key)['a'].tolist() == [1, 2]
@@ -0,0 +1,75 @@
+"""转换服务：并发请求、队列上限和监听地址"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+
+pytest.importorskip('pandas')
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('id,name,amount\n')
+        for i in range(rows):
+            f.write(f'{i},name{i},{i * 1.5}\n')
+    return str(path)
+
+
+async def _post_path(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps({'path': path}).encode('utf-8')
+    writer.write(b'POST /convert HTTP/1.1\r\nContent-Type: application/json\r\n'
+                 b'Content-Length: %d\r\n\r\n' % len(body) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def _run(service, requests):
+    async def main():
+        # 默认线程池只有两个线程：读取分段队列不能依赖它
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        await service.start()
+        listener = await asyncio.start_server(service.handle, host='127.0.0.1', port=0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.wait_for(asyncio.gather(*requests(port)), timeout=120)
+        finally:
+            listener.close()
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_concurrent_streams_all_complete(tmp_path):
+    path = _write_csv(tmp_path / 'big.csv', 100000)
+    service = server.ConversionService(workers=1, queue_size=16)
+
+    responses = _run(service, lambda port: [_post_path(port, path) for _ in range(12)])
+
+    assert all(r.startswith(b'HTTP/1.1 200') and r.endswith(b'0\r\n\r\n') for r in responses)
+    assert service.stats['completed'] == 12
+
+
+def test_full_queue_rejects_with_503(tmp_path):
+    path = _write_csv(tmp_path / 'small.csv', 20000)
+    service = server.ConversionService(workers=1, queue_size=1)
+
+    responses = _run(service, lambda port: [_post_path(port, path) for _ in range(6)])
+
+    statuses = [r.split(b' ', 2)[1] for r in responses]
+    assert b'503' in statuses and b'200' in statuses
+    assert service.stats['rejected'] == statuses.count(b'503')
+
+
+def test_only_loopback_hosts_are_accepted():
+    assert server.is_loopback('127.0.0.1')
+    assert server.is_loopback('::1')
+    assert server.is_loopback('localhost')
+    assert not server.is_loopback('0.0.0.0')
+    assert not server.is_loopback('192.168.1.10')
+    with pytest.raises(SystemExit):
+        server.main(['--host', '0.0.0.0'])
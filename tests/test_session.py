@@ -0,0 +1,73 @@
+"""会话令牌：过期、篡改和修改密码后失效"""
+import os
+import types
+
+import session
+from User import User
+from session import SessionManager
+
+
+class _Users:
+    def __init__(self, *users):
+        self.users = {user.username: user for user in users}
+
+    def get_user_by_username(self, username):
+        return self.users.get(username)
+
+
+def _user(name='alice', password='pbkdf2_sha256$1000$salt$hash'):
+    return User.from_dict({'username': name, 'password': password, 'role': 'user'})
+
+
+def _clock(monkeypatch, start):
+    now = [start]
+    monkeypatch.setattr(session, 'time', types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_token_valid_until_expiry(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1_000_000)
+    manager = SessionManager(str(tmp_path / 'auth' / 'session.key'), valid_days=1)
+    user = _user()
+    users = _Users(user)
+    token = manager.issue(user)
+
+    assert manager.verify(token, users) is user
+    now[0] += 24 * 3600
+    assert manager.verify(token, users) is user
+    now[0] += 1
+    assert manager.verify(token, users) is None
+
+
+def test_key_is_reused_and_private(tmp_path):
+    key_file = str(tmp_path / 'auth' / 'session.key')
+    user = _user()
+    token = SessionManager(key_file).issue(user)
+    assert SessionManager(key_file).verify(token, _Users(user)) is user
+    if os.name != 'nt':
+        assert os.stat(key_file).st_mode & 0o777 == 0o600
+
+
+def test_tampered_or_foreign_tokens_are_rejected(tmp_path):
+    manager = SessionManager(str(tmp_path / 'a.key'))
+    other = SessionManager(str(tmp_path / 'b.key'))
+    alice, bob = _user('alice'), _user('bob')
+    users = _Users(alice, bob)
+    token = manager.issue(alice)
+    body, signature = token.rsplit('.', 1)
+    forged = manager.issue(bob).split('.')[0] + '.' + signature
+
+    assert manager.verify(forged, users) is None
+    assert other.verify(token, users) is None
+    assert manager.verify(body, users) is None
+    assert manager.verify('', users) is None
+    assert manager.verify('!!.??', users) is None
+
+
+def test_password_change_invalidates_token(tmp_path):
+    manager = SessionManager(str(tmp_path / 'session.key'))
+    user = _user()
+    token = manager.issue(user)
+    changed = _user(password='pbkdf2_sha256$1000$salt$other')
+    assert manager.verify(token, _Users(changed)) is None
+    assert manager.verify(token, _Users()) is None
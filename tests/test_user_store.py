@@ -0,0 +1,122 @@
+"""用户存储：多个实例共用同一组文件时，追加和压缩不会丢失彼此的记录"""
+import multiprocessing
+import os
+
+import pytest
+
+from User import User, UserStore
+
+
+def _user(name, role='user'):
+    # 直接构造已加密的记录，避免测试中计算PBKDF2
+    return User.from_dict({'username': name, 'password': 'x' * 64, 'role': role})
+
+
+def test_append_does_not_hide_other_instance_changes(tmp_path):
+    db_file = str(tmp_path / 'users.json')
+    first = UserStore(db_file)
+    second = UserStore(db_file)
+    first.load()
+    second.load()
+
+    first.put(_user('alice'))
+    assert second.is_stale()
+    second.put(_user('bob'))
+
+    # 追加前先合并了alice，且写入后记下的文件状态包含两条记录
+    assert set(second) == {'alice', 'bob'}
+    assert first.is_stale()
+    first.load()
+    assert set(first) == {'alice', 'bob'}
+
+
+def test_compact_keeps_concurrent_appends(tmp_path):
+    db_file = str(tmp_path / 'users.json')
+    first = UserStore(db_file)
+    second = UserStore(db_file)
+    first.load()
+    second.load()
+
+    first.put(_user('alice'))
+    second.put(_user('bob'))
+    first.put(_user('carol', 'admin'))
+    # second还没见过carol，压缩时应重新读取日志而不是只写入内存中的数据
+    second.compact()
+
+    assert not os.path.exists(second.journal_file)
+    fresh = UserStore(db_file)
+    fresh.load()
+    assert set(fresh) == {'alice', 'bob', 'carol'}
+    assert fresh.get('carol').role == 'admin'
+
+
+def test_load_replays_journal_over_snapshot(tmp_path):
+    db_file = str(tmp_path / 'users.json')
+    store = UserStore(db_file)
+    store.put(_user('alice'))
+    store.compact()
+    store.put(_user('alice', 'admin'))
+    # 模拟写入中途崩溃留下的半行
+    with open(store.journal_file, 'ab') as f:
+        f.write(b'{"op": "put", "user": {"userna')
+
+    fresh = UserStore(db_file)
+    fresh.load()
+    assert fresh.get('alice').role == 'admin'
+    with open(store.journal_file, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+
+def _register(db_file, prefix, count):
+    store = UserStore(db_file, compact_threshold=7)
+    store.load()
+    for i in range(count):
+        store.put(_user(f'{prefix}{i}'))
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='使用fork启动子进程')
+def test_processes_appending_and_compacting_keep_every_record(tmp_path):
+    db_file = str(tmp_path / 'users.json')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_register, args=(db_file, f'p{n}-', 30))
+                 for n in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = UserStore(db_file)
+    store.load()
+    assert len(store) == 120
+
+
+def test_login_rehash_keeps_changes_made_by_other_processes(tmp_path, monkeypatch):
+    import hashlib
+
+    from User import UserManager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(User, 'iterations', 1000)
+    monkeypatch.setattr(UserManager, '_instances', {})
+    db_file = str(tmp_path / 'users.json')
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    UserStore(db_file).put(User.from_dict({'username': 'alice', 'password': legacy, 'role': 'user'}))
+
+    manager = UserManager(db_file)
+    # 另一个进程在manager加载之后把alice提升为管理员
+    other = UserStore(db_file)
+    other.load()
+    promoted = other.get('alice')
+    promoted.role = 'admin'
+    other.put(promoted)
+
+    user = manager.login('alice', 'secret')
+    assert user is not None and user.role == 'admin'
+    assert not user.needs_rehash()
+
+    fresh = UserStore(db_file)
+    fresh.load()
+    assert fresh.get('alice').role == 'admin'
+    assert fresh.get('alice').verify_password('secret')
+    assert not fresh.get('alice').needs_rehash()
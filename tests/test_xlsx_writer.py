@@ -0,0 +1,71 @@
+"""表格转xlsx：单元格类型推断、显示格式和超出行数时拆分工作表"""
+from datetime import date, datetime, time
+
+import pytest
+
+from xlsx_writer import convert_cell, convert_to_xlsx, write_xlsx
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12', (12, None)),
+    ('-3.20', (-3.2, '0.00')),
+    ('+0.5', (0.5, '0.0')),
+    ('1,234.50', (1234.5, '#,##0.00')),
+    ('1,234', (1234, '#,##0')),
+    ('12.5%', (0.125, '0.0%')),
+    ('1.5e3', (1500.0, None)),
+    ('007', ('007', None)),
+    ('1234567890123456', ('1234567890123456', None)),
+    ('TRUE', (True, None)),
+    ('2024-01-02', (date(2024, 1, 2), None)),
+    ('2024-01-02 03:04:05', (datetime(2024, 1, 2, 3, 4, 5), None)),
+    ('9:05', (time(9, 5), None)),
+    ('2024-13-01', ('2024-13-01', None)),
+    ('abc', ('abc', None)),
+    (None, (None, None)),
+])
+def test_auto_inference(text, expected):
+    value, number_format = convert_cell(text)
+    assert (value, number_format) == expected
+    assert type(value) is type(expected[0])
+
+
+def test_column_type_overrides_inference():
+    assert convert_cell('12', 'text') == ('12', None)
+    assert convert_cell('true', 'number') == ('true', None)
+    assert convert_cell('12', 'bool') == ('12', None)
+    assert convert_cell('2024-01-02', 'date') == (date(2024, 1, 2), None)
+
+
+def test_invalid_column_type(tmp_path):
+    with pytest.raises(ValueError):
+        write_xlsx(str(tmp_path / 'out.xlsx'), ['a'], [], {'a': 'money'})
+
+
+def test_rows_split_across_sheets_with_header(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    output = str(tmp_path / 'out.xlsx')
+    rows = ([str(i), f'{i}.50'] for i in range(5))
+    result = write_xlsx(output, ['id', 'amount'], rows, sheet_name='data', max_rows=3)
+
+    assert result['rows'] == 5
+    assert result['sheets'] == ['data', 'data (2)', 'data (3)']
+    workbook = openpyxl.load_workbook(output)
+    values = [[cell.value for cell in row] for sheet in workbook for row in sheet.iter_rows()]
+    assert values == [['id', 'amount'], [0, 0.5], [1, 1.5],
+                      ['id', 'amount'], [2, 2.5], [3, 3.5],
+                      ['id', 'amount'], [4, 4.5]]
+    assert workbook['data']['B2'].number_format == '0.00'
+
+
+def test_markdown_keeps_decimal_display(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    source = tmp_path / 'report.md'
+    source.write_text('| 名称 | 金额 |\n| --- | --- |\n| a | -3.20 |\n| b | 1,000.00 |\n',
+                      encoding='utf-8')
+    result = convert_to_xlsx(str(source), str(tmp_path / 'report.xlsx'))
+
+    assert result['sheets'] == ['report']
+    sheet = openpyxl.load_workbook(result['output'])['report']
+    assert (sheet['B2'].value, sheet['B2'].number_format) == (-3.2, '0.00')
+    assert (sheet['B3'].value, sheet['B3'].number_format) == (1000, '#,##0.00')
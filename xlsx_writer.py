@@ -0,0 +1,307 @@
+"""Markdown/CSV表格转换为xlsx
+
+逐行解析输入，用openpyxl的只写模式（write_only）写出，单元格数据随写随落盘，
+内存占用与表格大小无关。超过Excel单个工作表的行数上限（1,048,576行）时自动
+拆分到后续工作表，每个工作表都重复表头。
+
+单元格文本按基本类型转换：整数、小数、百分比、千位分隔的数字、布尔值、
+ISO格式的日期/日期时间/时间，其余保留为文本。本工具输出的Markdown
+（包括分片和索引文件）可以直接转换回来。
+"""
+import os
+import re
+import csv
+from datetime import date, datetime, time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Excel单个工作表的最大行数（含表头）
+MAX_SHEET_ROWS = 1048576
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+COLUMN_TYPES = ('auto', 'text', 'number', 'date', 'bool')
+
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+_SEPARATOR_CELL_RE = re.compile(r'^:?-{3,}:?$')
+_LINK_RE = re.compile(r'\]\(([^)]+\.(?:md|markdown))\)', re.I)
+_NUMBER_RE = re.compile(r'^([-+]?)(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?([eE][-+]?\d+)?(%?)$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?)?$')
+_TIME_RE = re.compile(r'^\d{1,2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?$')
+_BOOLEANS = {'true': True, 'false': False}
+
+
+def _unescape_cell(text: str) -> Optional[str]:
+    """还原Markdown单元格（见Action._markdown_cell），空单元格为None"""
+    text = text.strip()
+    if not text:
+        return None
+    return text.replace('\\|', '|').replace('<br>', '\n')
+
+
+def _split_row(line: str) -> Optional[List[Optional[str]]]:
+    """拆分Markdown表格行，不是表格行时返回None"""
+    line = line.strip()
+    if not line.startswith('|'):
+        return None
+    line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [_unescape_cell(cell) for cell in _CELL_SPLIT_RE.split(line)]
+
+
+def _is_separator(cells: Sequence[Optional[str]]) -> bool:
+    return all(cell is not None and _SEPARATOR_CELL_RE.match(cell) for cell in cells)
+
+
+def _markdown_tables(path: str) -> Iterator[Tuple[List[str], Iterator[List[Optional[str]]]]]:
+    """逐个产生Markdown文件中的表格 (表头, 行迭代器)
+
+    文件中没有表格、但链接了其他Markdown文件时（如分片输出的索引文件），
+    按链接的顺序读取这些文件。
+    """
+    links = []
+    found = False
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        previous = None
+        for line in f:
+            cells = _split_row(line)
+            if cells is None:
+                previous = None
+                if not found:
+                    links.extend(_LINK_RE.findall(line))
+                continue
+            if previous is not None and len(cells) == len(previous) and _is_separator(cells):
+                found = True
+                header = ['' if name is None else name for name in previous]
+                yield header, _table_rows(f, len(header))
+                previous = None
+                continue
+            previous = cells
+
+    if not found:
+        directory = os.path.dirname(path)
+        for link in links:
+            yield from _markdown_tables(os.path.join(directory, link))
+
+
+def _table_rows(lines: Iterator[str], width: int) -> Iterator[List[Optional[str]]]:
+    """读取表格的数据行，遇到非表格行时结束"""
+    for line in lines:
+        cells = _split_row(line)
+        if cells is None:
+            return
+        # 列数不一致时截断或补齐
+        if len(cells) < width:
+            cells.extend([None] * (width - len(cells)))
+        yield cells[:width]
+
+
+def read_markdown(paths: Sequence[str]) -> Tuple[List[str], Iterator[List[Optional[str]]]]:
+    """读取一个或多个Markdown文件中的表格，表头相同的表格依次连接
+
+    Returns:
+        tuple: (表头, 行迭代器)
+    """
+    tables = (table for path in paths for table in _markdown_tables(path))
+    first = next(tables, None)
+    if first is None:
+        raise ValueError("没有找到Markdown表格")
+    header, rows = first
+
+    def all_rows():
+        yield from rows
+        for other, more in tables:
+            if other != header:
+                raise ValueError(f"表头不一致: {' | '.join(other)}")
+            yield from more
+
+    return header, all_rows()
+
+
+def read_csv_rows(path: str) -> Tuple[List[str], Iterator[List[Optional[str]]]]:
+    """逐行读取CSV/TSV文件（编码和分隔符见reader.sniff_csv）
+
+    Returns:
+        tuple: (表头, 行迭代器)，空字段为None
+    """
+    from reader import sniff_csv
+
+    encoding, delimiter = sniff_csv(path)
+    f = open(path, 'r', encoding=encoding, newline='')
+    rows = csv.reader(f, delimiter=delimiter)
+    try:
+        header = next(rows, [])
+    except Exception:
+        f.close()
+        raise
+
+    def records():
+        with f:
+            for row in rows:
+                yield [value if value != '' else None for value in row]
+
+    return header, records()
+
+
+def convert_cell(text: Optional[str], column_type: str = 'auto'):
+    """把单元格文本转换为写入xlsx的值
+
+    Returns:
+        tuple: (值, 数字格式)，不需要指定格式时数字格式为None
+    """
+    if text is None or column_type == 'text':
+        return text, None
+    if column_type in ('auto', 'number'):
+        match = _NUMBER_RE.match(text)
+        if match is not None:
+            value = _convert_number(match)
+            if value is not None:
+                return value
+        if column_type == 'number':
+            return text, None
+    if column_type in ('auto', 'bool'):
+        value = _BOOLEANS.get(text.lower())
+        if value is not None:
+            return value, None
+        if column_type == 'bool':
+            return text, None
+    if column_type in ('auto', 'date'):
+        try:
+            if _DATE_RE.match(text):
+                if len(text) == 10:
+                    return date.fromisoformat(text), None
+                return datetime.fromisoformat(text), None
+            if _TIME_RE.match(text):
+                return time.fromisoformat(text.zfill(len(text) + (text.index(':') == 1))), None
+        except ValueError:
+            pass
+    return text, None
+
+
+def _convert_number(match):
+    """转换数字文本，保留百分比、千位分隔符和小数位数的显示格式；不适合作为数字的返回None"""
+    sign, integer, decimals, exponent, percent = match.groups()
+    grouped = ',' in integer
+    integer = integer.replace(',', '')
+    # 有前导零的编号和超过15位的数字保留为文本，避免丢失字符或精度
+    if (len(integer) > 1 and integer[0] == '0') or len(integer) > 15:
+        return None
+
+    decimal_format = '.' + '0' * len(decimals) if decimals else ''
+    if percent:
+        value = float(f"{sign}{integer}.{decimals or 0}{exponent or ''}") / 100
+        return value, '0' + decimal_format + '%'
+    if decimals is None and exponent is None:
+        value = int(sign + integer)
+    else:
+        value = float(f"{sign}{integer}.{decimals or 0}{exponent or ''}")
+    if grouped:
+        return value, '#,##0' + decimal_format
+    # "-3.20"按两位小数显示，否则写入后变成-3.2；科学计数法不指定格式
+    if decimals and exponent is None:
+        return value, '0' + decimal_format
+    return value, None
+
+
+def _sheet_title(base: str, index: int) -> str:
+    """工作表名称最长31个字符，不能包含 []:*?/\\"""
+    base = re.sub(r'[\[\]:*?/\\]', '_', base) or 'Sheet'
+    if index == 1:
+        return base[:31]
+    suffix = f" ({index})"
+    return base[:31 - len(suffix)] + suffix
+
+
+def write_xlsx(output: str, header: Sequence[str], rows: Iterable[Sequence[Optional[str]]],
+               column_types: Optional[Dict[str, str]] = None, sheet_name: str = 'Sheet1',
+               max_rows: int = MAX_SHEET_ROWS) -> Dict:
+    """把逐行产生的文本表格写为xlsx
+
+    Args:
+        output: 输出文件路径
+        header: 表头
+        rows: 单元格文本列表的可迭代对象，None表示空单元格
+        column_types: {列名: 类型}，类型为auto（默认，按内容推断）、text、number、date或bool；
+            无法按指定类型转换的单元格保留为文本，表头中没有的列名被忽略
+        sheet_name: 工作表名称，拆分时后续工作表加上序号
+        max_rows: 每个工作表的最大行数（含表头）
+
+    Returns:
+        dict: {'output': 输出路径, 'rows': 数据行数, 'sheets': [工作表名称]}
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    column_types = column_types or {}
+    for name, column_type in column_types.items():
+        if column_type not in COLUMN_TYPES:
+            raise ValueError(f"不支持的列类型: {name}={column_type}")
+    types = [column_types.get(name, 'auto') for name in header]
+    if max_rows < 2:
+        raise ValueError("max_rows至少为2")
+
+    workbook = Workbook(write_only=True)
+    sheets = []
+    sheet = None
+    sheet_rows = max_rows
+    count = 0
+    try:
+        for row in rows:
+            if sheet_rows >= max_rows:
+                sheet = workbook.create_sheet(_sheet_title(sheet_name, len(sheets) + 1))
+                sheets.append(sheet.title)
+                sheet.append(list(header))
+                sheet_rows = 1
+            values = []
+            for text, column_type in zip(row, types):
+                value, number_format = convert_cell(text, column_type)
+                if number_format is not None:
+                    value = WriteOnlyCell(sheet, value)
+                    value.number_format = number_format
+                values.append(value)
+            sheet.append(values)
+            sheet_rows += 1
+            count += 1
+        if sheet is None:
+            sheet = workbook.create_sheet(_sheet_title(sheet_name, 1))
+            sheets.append(sheet.title)
+            sheet.append(list(header))
+        workbook.save(output)
+    finally:
+        workbook.close()
+    return {'output': output, 'rows': count, 'sheets': sheets}
+
+
+def convert_to_xlsx(inputs, output: str, column_types: Optional[Dict[str, str]] = None,
+                    sheet_name: Optional[str] = None, max_rows: int = MAX_SHEET_ROWS) -> Dict:
+    """把Markdown或CSV/TSV表格转换为xlsx
+
+    Args:
+        inputs: 输入文件路径或路径列表；多个Markdown文件（如分片）的表格依次连接，
+            CSV/TSV只能有一个
+        output: 输出的xlsx路径
+        column_types: 见write_xlsx
+        sheet_name: 工作表名称，默认为第一个输入的文件名
+        max_rows: 见write_xlsx
+    """
+    from reader import is_csv
+
+    paths = [inputs] if isinstance(inputs, str) else list(inputs)
+    if not paths:
+        raise ValueError("没有输入文件")
+    if all(path.lower().endswith(MARKDOWN_EXTENSIONS) for path in paths):
+        header, rows = read_markdown(paths)
+    elif len(paths) == 1 and is_csv(paths[0]):
+        header, rows = read_csv_rows(paths[0])
+    else:
+        raise ValueError("输入需要是Markdown文件或单个CSV/TSV文件")
+
+    if sheet_name is None:
+        sheet_name = os.path.splitext(os.path.basename(paths[0]))[0]
+        # 分片输出的索引文件名去掉_index
+        if sheet_name.endswith('_index'):
+            sheet_name = sheet_name[:-len('_index')]
+    try:
+        return write_xlsx(output, header, rows, column_types, sheet_name, max_rows)
+    finally:
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()